@@ -0,0 +1,116 @@
+"""Benchmark SurpriseBot's handlers against a fake Discord backend.
+
+Usage: python -m benchmarks [--members N] [--latency SECONDS] [--json PATH] ...
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import typing as t
+
+from benchmarks import harness
+from benchmarks.fake_rest import FakeREST
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--members", type=int, default=2000, help="members to seed the database with")
+    parser.add_argument("--expired", type=int, default=500, help="seeded members whose surprise day has to be reset")
+    parser.add_argument("--joins", type=int, default=200, help="members joining in one burst")
+    parser.add_argument("--commands", type=int, default=500, help="invocations of /join and /leave each")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent handlers and commands")
+    parser.add_argument("--latency", type=float, default=0.02, help="mean latency of a REST call, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.005, help="standard deviation of the REST latency")
+    parser.add_argument("--route-limit", type=int, default=5, help="requests per second per route bucket")
+    parser.add_argument("--global-limit", type=int, default=50, help="requests per second over all routes")
+    parser.add_argument("--cache-size", type=int, default=None, help="size of the database cache, off by default")
+    parser.add_argument("--read-pool-size", type=int, default=4, help="read-only database connections, 0 for none")
+    parser.add_argument("--database-url", help="benchmark against a PostgreSQL database instead of SQLite")
+    parser.add_argument("--channel-pool", type=int, default=0, help="spare channels to create before the joins")
+    parser.add_argument("--channel-pool-rate", type=float, default=5.0, help="spare channels created per second")
+    parser.add_argument(
+        "--reset-mode", choices=("edit", "recreate"), default="edit", help="how resets update pinned messages"
+    )
+    parser.add_argument("--balance", action="store_true", help="balance surprise days over the calendar")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes for reconciliation and resets")
+    parser.add_argument("--seed", type=int, default=0, help="seed for reproducible runs")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace, db_file: str) -> t.List[harness.Result]:
+    rng = random.Random(args.seed)
+    rest = FakeREST(
+        harness.GUILD_ID,
+        harness.CATEGORY_ID,
+        latency=args.latency,
+        jitter=args.jitter,
+        route_limit=(args.route_limit, 1.0),
+        global_limit=(args.global_limit, 1.0),
+        seed=args.seed,
+    )
+    bot = harness.BenchBot(
+        rest,
+        db_file,
+        reset_concurrency=args.concurrency,
+        cache_size=args.cache_size,
+        read_pool_size=args.read_pool_size,
+        database_url=args.database_url,
+        channel_pool_size=args.channel_pool,
+        channel_pool_rate=args.channel_pool_rate,
+        reset_edits_messages=args.reset_mode == "edit",
+        balance_surprise_days=args.balance,
+        worker_processes=args.workers,
+        logs="WARNING",
+    )
+    await bot.open_database()
+
+    if bot.channel_pool is not None:
+        start = time.perf_counter()
+        bot.channel_pool.load(harness.GUILD_ID, [])
+        await bot.channel_pool.refill()
+        # Claimed channels are replaced while the joins are handled, like in the bot.
+        bot.channel_pool.start()
+        print(f"Created {len(bot.channel_pool)} spare channels in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    members = await harness.seed(bot, rest, args.members, args.expired, rng)
+    await bot.db.warm_cache()
+    print(f"Seeded {args.members} members in {time.perf_counter() - start:.2f}s")
+
+    results = [
+        await harness.bench_join(bot, members, args.commands, args.concurrency, rng),
+        await harness.bench_leave(bot, rest, members, args.commands, args.concurrency, rng),
+        await harness.bench_join_many(bot, members, args.commands // 10, args.concurrency, rng),
+        await harness.bench_leave_all(bot, members, args.commands // 10, args.concurrency, rng),
+        await harness.bench_calendar(bot, members, args.commands, rng),
+        await harness.bench_reset(bot),
+        await harness.bench_member_create(bot, rest, args.joins, args.concurrency),
+    ]
+
+    if bot.channel_pool is not None:
+        await bot.channel_pool.stop()
+    await bot.offloader.close()
+    await bot.db.close()
+    print(f"REST calls: {dict(rest.calls)}")
+    print(f"429s: {dict(rest.rate_limited)}")
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        results = asyncio.run(run(args, os.path.join(directory, "database.db")))
+
+    harness.print_results(results)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"args": vars(args), "results": {result.name: result.summary() for result in results}}, file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import itertools
+import random
+import time
+import typing as t
+
+import attr
+import hikari
+
+
+@attr.define()
+class FakeMember:
+    """Stand-in for hikari.Member, with only the attributes the bot uses."""
+
+    id: int = attr.field()
+    username: str = attr.field()
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def __int__(self) -> int:
+        return self.id
+
+
+@attr.define()
+class FakeOverwrite:
+    """Stand-in for hikari.PermissionOverwrite."""
+
+    id: int = attr.field()
+    allow: hikari.Permissions = attr.field()
+    deny: hikari.Permissions = attr.field(default=hikari.Permissions.NONE)
+
+
+@attr.define()
+class FakeChannel:
+    """Stand-in for hikari.GuildTextChannel and hikari.GuildCategory."""
+
+    id: int = attr.field()
+    guild_id: int = attr.field()
+    parent_id: t.Optional[int] = attr.field(default=None)
+    name: str = attr.field(default="")
+    overwrites: t.Dict[int, hikari.Permissions] = attr.field(factory=dict)
+
+    @property
+    def permission_overwrites(self) -> t.Mapping[int, FakeOverwrite]:
+        return {target: FakeOverwrite(target, allow) for target, allow in self.overwrites.items()}
+
+    def __int__(self) -> int:
+        return self.id
+
+
+@attr.define()
+class FakeMessage:
+    """Stand-in for hikari.Message."""
+
+    id: int = attr.field()
+    channel_id: int = attr.field()
+    content: str = attr.field()
+    pinned: bool = attr.field(default=False)
+
+    def __int__(self) -> int:
+        return self.id
+
+
+class FakeCache:
+    """Stand-in for hikari's gateway cache, seeing every channel of the FakeREST."""
+
+    __slots__: t.Sequence[str] = ("_rest",)
+
+    def __init__(self, rest: FakeREST) -> None:
+        self._rest = rest
+
+    def get_guild_channel(self, channel: hikari.SnowflakeishOr[hikari.GuildChannel]) -> t.Optional[FakeChannel]:
+        return self._rest.channels.get(int(channel))
+
+    def get_guild_channels_view_for_guild(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild]
+    ) -> t.Mapping[int, FakeChannel]:
+        return {id: channel for id, channel in self._rest.channels.items() if channel.guild_id == int(guild)}
+
+
+class _Bucket:
+    __slots__: t.Sequence[str] = ("limit", "period", "remaining", "reset_at")
+
+    def __init__(self, limit: int, period: float) -> None:
+        self.limit = limit
+        self.period = period
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def wait_time(self, now: float) -> float:
+        """The amount of seconds until the bucket has room for a request again, 0 if it has room now."""
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.period
+        if self.remaining > 0:
+            return 0.0
+        return self.reset_at - now
+
+
+class _LazyMembers:
+    def __init__(self, rest: FakeREST, members: t.Sequence[FakeMember]) -> None:
+        self._rest = rest
+        self._members = members
+
+    async def collect(self, collector: t.Callable[[t.Sequence[FakeMember]], t.Any]) -> t.Any:
+        # hikari fetches members 1000 at a time.
+        for _ in range(0, len(self._members), 1000):
+            await self._rest._request("fetch_members", self._rest.guild_id)
+        return collector(self._members)
+
+
+class FakeREST:
+    """An in-process stand-in for hikari's REST client.
+
+    Every call sleeps for a random latency and goes through a per-route bucket (keyed by the route and
+    its major parameter, like Discord's) and a global bucket. When a bucket is empty the call is counted
+    as a 429 and waits for the bucket to reset, which is what hikari does for the bot.
+    """
+
+    def __init__(
+        self,
+        guild_id: int,
+        category_id: int,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        route_limit: t.Tuple[int, float] = (5, 1.0),
+        global_limit: t.Tuple[int, float] = (50, 1.0),
+        seed: t.Optional[int] = None,
+    ) -> None:
+        self.guild_id = guild_id
+        self.category_id = category_id
+        self.latency = latency
+        self.jitter = jitter
+        self.route_limit = route_limit
+        self.channels: t.Dict[int, FakeChannel] = {
+            category_id: FakeChannel(category_id, guild_id, name="surprise days"),
+        }
+        self.messages: t.Dict[int, FakeMessage] = {}
+        self.members: t.Dict[int, FakeMember] = {}
+        self.calls: t.Counter[str] = collections.Counter()
+        self.rate_limited: t.Counter[str] = collections.Counter()
+        self._buckets: t.Dict[t.Tuple[str, int], _Bucket] = {}
+        self._global = _Bucket(*global_limit)
+        self._ids = itertools.count(10**17)
+        self._rng = random.Random(seed)
+
+    def next_id(self) -> int:
+        """Generate a new unique snowflake."""
+        return next(self._ids)
+
+    def add_channel(self, member: FakeMember) -> FakeChannel:
+        """Create a surprise day channel without simulating a request, for seeding."""
+        channel = FakeChannel(self.next_id(), self.guild_id, self.category_id, member.username)
+        self.channels[channel.id] = channel
+        return channel
+
+    def add_message(self, channel_id: int, content: str = "") -> FakeMessage:
+        """Create a pinned message without simulating a request, for seeding."""
+        message = FakeMessage(self.next_id(), channel_id, content, pinned=True)
+        self.messages[message.id] = message
+        return message
+
+    def _not_found(self, route: str) -> hikari.NotFoundError:
+        return hikari.NotFoundError(route, {}, b"")
+
+    async def _request(self, route: str, major: int) -> None:
+        self.calls[route] += 1
+
+        bucket = self._buckets.get((route, major))
+        if bucket is None:
+            bucket = self._buckets[(route, major)] = _Bucket(*self.route_limit)
+
+        while wait := max(bucket.wait_time(time.monotonic()), self._global.wait_time(time.monotonic())):
+            self.rate_limited[route] += 1
+            await asyncio.sleep(wait)
+        bucket.remaining -= 1
+        self._global.remaining -= 1
+
+        await asyncio.sleep(max(0.0, self._rng.gauss(self.latency, self.jitter)))
+
+    async def fetch_channel(self, channel: hikari.SnowflakeishOr[hikari.PartialChannel]) -> FakeChannel:
+        await self._request("fetch_channel", int(channel))
+        if (found := self.channels.get(int(channel))) is None:
+            raise self._not_found("fetch_channel")
+        return found
+
+    async def fetch_guild_channels(self, guild: hikari.SnowflakeishOr[hikari.PartialGuild]) -> t.Sequence[FakeChannel]:
+        await self._request("fetch_guild_channels", int(guild))
+        return list(self.channels.values())
+
+    def fetch_members(self, guild: hikari.SnowflakeishOr[hikari.PartialGuild]) -> _LazyMembers:
+        return _LazyMembers(self, list(self.members.values()))
+
+    async def fetch_member(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], user: hikari.SnowflakeishOr[hikari.PartialUser]
+    ) -> FakeMember:
+        await self._request("fetch_member", int(guild))
+        if (found := self.members.get(int(user))) is None:
+            raise self._not_found("fetch_member")
+        return found
+
+    async def create_guild_text_channel(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], name: str, **kwargs: t.Any
+    ) -> FakeChannel:
+        await self._request("create_guild_channel", int(guild))
+        channel = FakeChannel(self.next_id(), int(guild), kwargs.get("category"), name)
+        self.channels[channel.id] = channel
+        return channel
+
+    async def edit_channel(self, channel: hikari.SnowflakeishOr[hikari.GuildChannel], **kwargs: t.Any) -> FakeChannel:
+        await self._request("edit_channel", int(channel))
+        if (found := self.channels.get(int(channel))) is None:
+            raise self._not_found("edit_channel")
+        found.name = kwargs.get("name", found.name)
+        return found
+
+    async def delete_channel(self, channel: hikari.SnowflakeishOr[hikari.PartialChannel]) -> None:
+        await self._request("delete_channel", int(channel))
+        if self.channels.pop(int(channel), None) is None:
+            raise self._not_found("delete_channel")
+
+    async def create_message(self, channel: hikari.SnowflakeishOr[hikari.TextableChannel], content: str) -> FakeMessage:
+        await self._request("create_message", int(channel))
+        if int(channel) not in self.channels:
+            raise self._not_found("create_message")
+        message = FakeMessage(self.next_id(), int(channel), content)
+        self.messages[message.id] = message
+        return message
+
+    async def edit_message(
+        self,
+        channel: hikari.SnowflakeishOr[hikari.TextableChannel],
+        message: hikari.SnowflakeishOr[hikari.PartialMessage],
+        content: str,
+    ) -> FakeMessage:
+        await self._request("edit_message", int(channel))
+        if (found := self.messages.get(int(message))) is None:
+            raise self._not_found("edit_message")
+        found.content = content
+        return found
+
+    async def delete_message(
+        self,
+        channel: hikari.SnowflakeishOr[hikari.TextableChannel],
+        message: hikari.SnowflakeishOr[hikari.PartialMessage],
+    ) -> None:
+        await self._request("delete_message", int(channel))
+        if self.messages.pop(int(message), None) is None:
+            raise self._not_found("delete_message")
+
+    async def pin_message(
+        self,
+        channel: hikari.SnowflakeishOr[hikari.TextableChannel],
+        message: hikari.SnowflakeishOr[hikari.PartialMessage],
+    ) -> None:
+        await self._request("pin_message", int(channel))
+        if (found := self.messages.get(int(message))) is None:
+            raise self._not_found("pin_message")
+        found.pinned = True
+
+    async def edit_permission_overwrites(
+        self,
+        channel: hikari.SnowflakeishOr[hikari.GuildChannel],
+        target: hikari.SnowflakeishOr[hikari.PartialUser],
+        **kwargs: t.Any,
+    ) -> None:
+        await self._request("edit_permission_overwrites", int(channel))
+        self.channels[int(channel)].overwrites[int(target)] = kwargs.get("allow", hikari.Permissions.NONE)
+
+    async def delete_permission_overwrite(
+        self,
+        channel: hikari.SnowflakeishOr[hikari.GuildChannel],
+        target: hikari.SnowflakeishOr[hikari.PartialUser],
+    ) -> None:
+        await self._request("delete_permission_overwrite", int(channel))
+        self.channels[int(channel)].overwrites.pop(int(target), None)
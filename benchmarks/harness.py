@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import random
+import statistics
+import time
+import typing as t
+
+import attr
+import hikari
+
+import utils
+from benchmarks.fake_rest import FakeCache
+from benchmarks.fake_rest import FakeChannel
+from benchmarks.fake_rest import FakeMember
+from benchmarks.fake_rest import FakeREST
+from models.bot import SurpriseBot
+from models.event_queue import CoalescingQueue
+from models.surprise_day import SurpriseDay
+
+GUILD_ID = 1
+CATEGORY_ID = 2
+
+
+@attr.define()
+class FakeMemberEvent:
+    """Stand-in for hikari.MemberCreateEvent and hikari.MemberDeleteEvent."""
+
+    guild_id: int = attr.field()
+    member: FakeMember = attr.field()
+    joined: bool = attr.field(default=True)
+    """True for a member joining, False for a member leaving."""
+
+    @property
+    def user_id(self) -> int:
+        return self.member.id
+
+
+@attr.define()
+class FakeContext:
+    """Stand-in for lightbulb.SlashContext."""
+
+    app: SurpriseBot = attr.field()
+    member: FakeMember = attr.field()
+    channel_id: int = attr.field()
+    options: t.Dict[str, t.Any] = attr.field(factory=dict)
+
+    @property
+    def guild_id(self) -> int:
+        return GUILD_ID
+
+    async def respond(self, *args: t.Any, **kwargs: t.Any) -> None:
+        pass
+
+
+@attr.define()
+class Result:
+    """The latencies of one benchmarked operation."""
+
+    name: str = attr.field()
+    latencies: t.List[float] = attr.field(factory=list)
+    elapsed: float = attr.field(default=0.0)
+
+    @property
+    def throughput(self) -> float:
+        """Operations per second."""
+        return len(self.latencies) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """The latency, in seconds, that percent of the operations were faster than."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def summary(self) -> t.Dict[str, float]:
+        return {
+            "count": len(self.latencies),
+            "ops_per_second": self.throughput,
+            "mean": statistics.fmean(self.latencies) if self.latencies else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": max(self.latencies, default=0.0),
+        }
+
+
+def print_results(results: t.Iterable[Result]) -> None:
+    """Print the latency profile of every operation as a table."""
+    print(f"{'operation':<24}{'count':>8}{'ops/s':>10}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for result in results:
+        summary = result.summary()
+        print(
+            f"{result.name:<24}{summary['count']:>8}{summary['ops_per_second']:>10.1f}"
+            + "".join(f"{summary[key] * 1000:>8.1f}ms" for key in ("mean", "p50", "p90", "p99", "max"))
+        )
+
+
+class BenchBot(SurpriseBot):
+    """SurpriseBot talking to a FakeREST instead of Discord, timing every reset row."""
+
+    def __init__(self, fake_rest: FakeREST, db_file: str, **kwargs: t.Any) -> None:
+        super().__init__(
+            db_file,
+            {fake_rest.guild_id: fake_rest.category_id},
+            token="benchmark",
+            banner=None,
+            reconcile_on_start=False,
+            **kwargs,
+        )
+        self._fake_rest = fake_rest
+        self._fake_cache = FakeCache(fake_rest)
+        self.reset_latencies: t.List[float] = []
+
+    @property
+    def rest(self) -> t.Any:
+        return self._fake_rest
+
+    @property
+    def cache(self) -> t.Any:
+        return self._fake_cache
+
+    async def _reset_day(self, day: SurpriseDay, *args: t.Any) -> None:
+        start = time.perf_counter()
+        await super()._reset_day(day, *args)
+        self.reset_latencies.append(time.perf_counter() - start)
+
+
+async def seed(bot: SurpriseBot, rest: FakeREST, members: int, expired: int, rng: random.Random) -> t.List[FakeMember]:
+    """Fill the database and the fake guild with members that already have a channel.
+
+    The first expired members get a reset day in the past.
+    """
+    seeded = [FakeMember(rest.next_id(), f"member-{index}") for index in range(members)]
+    await seed_members(bot, rest, seeded, expired, rng)
+    return seeded
+
+
+async def seed_members(
+    bot: SurpriseBot, rest: FakeREST, members: t.Sequence[FakeMember], expired: int, rng: random.Random
+) -> t.List[FakeChannel]:
+    """Add members to the database and the fake guild, each with a channel and a pinned message, like seed().
+
+    Returns
+    -------
+    t.List[FakeChannel]
+        The channel of every member, in the same order.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    past = now - datetime.timedelta(days=1)
+    surprise_days, reset_days = utils.generate_random_day_numbers(len(members), now, rng)
+
+    channels: t.List[FakeChannel] = []
+    for batch in utils.chunked(range(len(members)), 1000):
+        rows = []
+        for index in batch:
+            member = members[index]
+            rest.members[member.id] = member
+            channel = rest.add_channel(member)
+            message = rest.add_message(channel.id)
+            reset_day = past if index < expired else utils.from_epoch_day(reset_days[index])
+            rows.append(
+                (rest.guild_id, member, message, channel, utils.from_epoch_day(surprise_days[index]), reset_day)
+            )
+            channels.append(channel)
+        await bot.db.create_days(rows)
+    return channels
+
+
+async def bench_member_create(bot: SurpriseBot, rest: FakeREST, joins: int, concurrency: int) -> Result:
+    """New members joining in one burst, through the same coalescing queue the bot uses."""
+    result = Result("on_member_create")
+    queued: t.Dict[int, float] = {}
+
+    async def handle(event: FakeMemberEvent) -> None:
+        await bot.on_member_create(t.cast(hikari.MemberCreateEvent, event))
+        result.latencies.append(time.perf_counter() - queued[event.user_id])
+
+    queue: CoalescingQueue[FakeMemberEvent] = CoalescingQueue(handle, concurrency=concurrency, linger=0.0)
+    queue.start()
+    start = time.perf_counter()
+    for index in range(joins):
+        member = FakeMember(rest.next_id(), f"joined-{index}")
+        rest.members[member.id] = member
+        queued[member.id] = time.perf_counter()
+        queue.put((GUILD_ID, member.id), FakeMemberEvent(GUILD_ID, member))
+
+    while queue.processed < joins:
+        await asyncio.sleep(0.01)
+    result.elapsed = time.perf_counter() - start
+    await queue.stop()
+    return result
+
+
+async def bench_reset(bot: BenchBot) -> Result:
+    """The reset job over every expired row."""
+    bot.reset_latencies.clear()
+    stats = await bot.reset_expired_days()
+    return Result("reset_surprisedays", list(bot.reset_latencies), stats.elapsed)
+
+
+async def _bench_command(
+    name: str, invocations: t.Sequence[t.Callable[[], t.Awaitable[None]]], concurrency: int
+) -> Result:
+    result = Result(name)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def invoke(callback: t.Callable[[], t.Awaitable[None]]) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await callback()
+            result.latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(invoke(callback) for callback in invocations))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+async def bench_join(
+    bot: SurpriseBot, members: t.Sequence[FakeMember], invocations: int, concurrency: int, rng: random.Random
+) -> Result:
+    """/join invoked by random members for other random members."""
+    from commands.join import join
+
+    def invocation(member: FakeMember, user: FakeMember) -> t.Callable[[], t.Awaitable[None]]:
+        return lambda: join.callback(FakeContext(bot, member, 0), user=user)
+
+    pairs = [(rng.choice(members), rng.choice(members)) for _ in range(invocations)]
+    return await _bench_command("/join", [invocation(*pair) for pair in pairs], concurrency)
+
+
+async def bench_leave(
+    bot: SurpriseBot,
+    rest: FakeREST,
+    members: t.Sequence[FakeMember],
+    invocations: int,
+    concurrency: int,
+    rng: random.Random,
+) -> Result:
+    """/leave invoked by random members in random surprise day channels they were let into beforehand."""
+    from commands.leave import leave
+
+    channels = [day.channel for day in await bot.db.fetch_all_days() if day.channel is not None]
+
+    def invocation(member: FakeMember, channel: int) -> t.Callable[[], t.Awaitable[None]]:
+        return lambda: leave.callback(FakeContext(bot, member, channel))
+
+    # Distinct pairs, so every /leave revokes an overwrite instead of being skipped by the cache.
+    chosen = [(rng.choice(members), rng.choice(channels)) for _ in range(invocations)]
+    pairs = list({(member.id, channel): (member, channel) for member, channel in chosen}.values())
+    for member, channel in pairs:
+        rest.channels[channel].overwrites[member.id] = hikari.Permissions.VIEW_CHANNEL
+    return await _bench_command("/leave", [invocation(*pair) for pair in pairs], concurrency)
+
+
+async def bench_join_many(
+    bot: SurpriseBot, members: t.Sequence[FakeMember], invocations: int, concurrency: int, rng: random.Random
+) -> Result:
+    """/join-many invoked by random members for ten other random members each."""
+    from commands.join_many import join_many
+
+    def invocation(member: FakeMember, users: t.Sequence[FakeMember]) -> t.Callable[[], t.Awaitable[None]]:
+        mentions = " ".join(user.mention for user in users)
+        return lambda: join_many.callback(FakeContext(bot, member, 0), users=mentions)
+
+    pairs = [(rng.choice(members), rng.sample(members, min(10, len(members)))) for _ in range(invocations)]
+    return await _bench_command("/join-many", [invocation(*pair) for pair in pairs], concurrency)
+
+
+async def bench_leave_all(
+    bot: SurpriseBot, members: t.Sequence[FakeMember], invocations: int, concurrency: int, rng: random.Random
+) -> Result:
+    """/leave-all invoked by random members."""
+    from commands.leave_all import leave_all
+
+    def invocation(member: FakeMember) -> t.Callable[[], t.Awaitable[None]]:
+        return lambda: leave_all.callback(FakeContext(bot, member, 0))
+
+    chosen = rng.sample(members, min(invocations, len(members)))
+    return await _bench_command("/leave-all", [invocation(member) for member in chosen], concurrency)
+
+
+async def bench_calendar(
+    bot: SurpriseBot, members: t.Sequence[FakeMember], invocations: int, rng: random.Random
+) -> Result:
+    """/surprise-days week and upcoming, invoked by random members one after another."""
+    from commands.calendar import surprise_days_upcoming
+    from commands.calendar import surprise_days_week
+
+    def invocation(member: FakeMember, week: bool) -> t.Callable[[], t.Awaitable[None]]:
+        if week:
+            return lambda: surprise_days_week.callback(FakeContext(bot, member, 0))
+        return lambda: surprise_days_upcoming.callback(FakeContext(bot, member, 0), count=25)
+
+    calls = [invocation(rng.choice(members), rng.random() < 0.5) for _ in range(invocations)]
+    return await _bench_command("/surprise-days", calls, 1)
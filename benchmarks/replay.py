@@ -0,0 +1,241 @@
+"""Replay a recording of member events and slash commands against a fake Discord backend, and profile the latency
+of every handler.
+
+Usage: python -m benchmarks.replay recording.ndjson [--speed 10] [--guild ID] [--members N] [--json PATH] ...
+
+Recordings are made by running the bot with RECORD_EVENTS set. Every user the recording mentions before they join
+is seeded as a member with a surprise day channel, and each channel commands were used in stands for the channel
+of one of them. Member events go through the bot's coalescing queue and are timed until they were handled, slash
+commands are timed from their invocation.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import tempfile
+import time
+import typing as t
+
+import hikari
+
+from benchmarks import harness
+from benchmarks.fake_rest import FakeMember
+from benchmarks.fake_rest import FakeREST
+from models.recorder import RecordedEvent
+from models.recorder import open_recording
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.replay", description=__doc__)
+    parser.add_argument("recording", help="the file recorded with RECORD_EVENTS")
+    parser.add_argument("--guild", type=int, help="the guild to replay, the one with the most events by default")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="how much faster than recorded to replay, 0 for no waiting at all"
+    )
+    parser.add_argument("--members", type=int, default=0, help="members to seed besides the recorded ones")
+    parser.add_argument("--latency", type=float, default=0.02, help="mean latency of a REST call, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.005, help="standard deviation of the REST latency")
+    parser.add_argument("--route-limit", type=int, default=5, help="requests per second per route bucket")
+    parser.add_argument("--global-limit", type=int, default=50, help="requests per second over all routes")
+    parser.add_argument("--cache-size", type=int, default=None, help="size of the database cache, off by default")
+    parser.add_argument("--seed", type=int, default=0, help="seed for reproducible runs")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    return parser.parse_args()
+
+
+class ReplayBot(harness.BenchBot):
+    """BenchBot timing every handler it runs, member events from the moment they were queued."""
+
+    def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.results: t.Dict[str, harness.Result] = {}
+        self.errors: t.Counter[str] = collections.Counter()
+        self.queued: t.Dict[int, float] = {}
+
+    def result(self, name: str) -> harness.Result:
+        """The latencies of a handler, created on first use."""
+        if name not in self.results:
+            self.results[name] = harness.Result(name)
+        return self.results[name]
+
+    def queue_member_event(self, event: harness.FakeMemberEvent) -> None:
+        # Coalesced events are timed from the first one, like the queue's lag.
+        self.queued.setdefault(event.user_id, time.perf_counter())
+        self.member_events.put((event.guild_id, event.user_id), event)
+
+    async def _handle_member_event(self, event: t.Any) -> None:
+        name = "on_member_create" if event.joined else "on_member_delete"
+        try:
+            if event.joined:
+                await self.on_member_create(event)
+            else:
+                await self.on_member_delete(event)
+        except Exception:
+            self.errors[name] += 1
+            raise
+        finally:
+            self.result(name).latencies.append(time.perf_counter() - self.queued.pop(event.user_id))
+
+
+def pick_guild(events: t.Sequence[RecordedEvent]) -> int:
+    """The guild with the most events."""
+    return collections.Counter(event.guild for event in events).most_common(1)[0][0]
+
+
+def existing_users(events: t.Iterable[RecordedEvent]) -> t.List[int]:
+    """The users that are mentioned before they join, who were members when the recording started."""
+    seen: t.Dict[int, bool] = {}
+    for event in events:
+        if event.kind == "create":
+            seen.setdefault(event.user, False)
+            continue
+        seen.setdefault(event.user, True)
+        for _, option_type, value in event.options:
+            if option_type == hikari.OptionType.USER:
+                seen.setdefault(int(value), True)
+    return [user for user, existing in seen.items() if existing]
+
+
+def find_command(bot: harness.BenchBot, name: str) -> t.Any:
+    """Look up a slash command or subcommand by its full name, like "surprise-days week"."""
+    group, *subcommands = name.split()
+    command = bot.get_slash_command(group)
+    for subcommand in subcommands:
+        command = command.get_subcommand(subcommand) if command is not None else None
+    return command
+
+
+async def replay(args: argparse.Namespace, events: t.Sequence[RecordedEvent], db_file: str) -> ReplayBot:
+    rng = random.Random(args.seed)
+    rest = FakeREST(
+        harness.GUILD_ID,
+        harness.CATEGORY_ID,
+        latency=args.latency,
+        jitter=args.jitter,
+        route_limit=(args.route_limit, 1.0),
+        global_limit=(args.global_limit, 1.0),
+        seed=args.seed,
+    )
+    bot = ReplayBot(rest, db_file, cache_size=args.cache_size, logs="WARNING")
+    await bot.open_database()
+    try:
+        bot.load_extensions_from(os.path.join(bot.path, "commands"), must_exist=True)
+
+        start = time.perf_counter()
+        members = [FakeMember(user, f"member-{user}") for user in existing_users(events)]
+        members += [FakeMember(rest.next_id(), f"member-{index}") for index in range(args.members)]
+        surprise_channels = [channel.id for channel in await harness.seed_members(bot, rest, members, 0, rng)]
+        await bot.db.warm_cache()
+        print(f"Seeded {len(members)} members in {time.perf_counter() - start:.2f}s")
+
+        channels: t.Dict[int, int] = {}
+
+        def channel_for(recorded: int) -> int:
+            if recorded not in channels:
+                channels[recorded] = (
+                    surprise_channels[len(channels) % len(surprise_channels)] if surprise_channels else 0
+                )
+            return channels[recorded]
+
+        def member_for(user: int) -> FakeMember:
+            return rest.members.get(user) or FakeMember(user, f"member-{user}")
+
+        def option_value(option_type: int, value: t.Any) -> t.Any:
+            if option_type == hikari.OptionType.USER:
+                return member_for(int(value))
+            if option_type == hikari.OptionType.CHANNEL:
+                return channel_for(int(value))
+            return value
+
+        async def invoke(event: RecordedEvent) -> None:
+            command = find_command(bot, event.command)
+            name = f"/{event.command}"
+            if command is None:
+                bot.errors[f"{name} (unknown command)"] += 1
+                return
+
+            options = {option.name: option.default for option in command.options.values()}
+            options.update({key: option_value(option_type, value) for key, option_type, value in event.options})
+            context = harness.FakeContext(bot, member_for(event.user), channel_for(event.channel), options)
+            start = time.perf_counter()
+            try:
+                await command.callback(context, **(options if command.pass_options else {}))
+            except Exception:
+                bot.errors[name] += 1
+            finally:
+                bot.result(name).latencies.append(time.perf_counter() - start)
+
+        bot.member_events.start()
+        commands: t.Set[asyncio.Task[None]] = set()
+        member_events = 0
+        origin = events[0].timestamp
+        start = time.perf_counter()
+        for event in events:
+            if args.speed > 0:
+                await asyncio.sleep(max(0.0, (event.timestamp - origin) / args.speed - (time.perf_counter() - start)))
+
+            if event.kind == "command":
+                task = asyncio.create_task(invoke(event))
+                commands.add(task)
+                task.add_done_callback(commands.discard)
+                continue
+
+            member = member_for(event.user)
+            if event.kind == "create":
+                rest.members[member.id] = member
+            else:
+                rest.members.pop(member.id, None)
+            bot.queue_member_event(harness.FakeMemberEvent(harness.GUILD_ID, member, event.kind == "create"))
+            member_events += 1
+
+        await asyncio.gather(*commands)
+        while bot.member_events.processed + bot.member_events.coalesced < member_events:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        for result in bot.results.values():
+            result.elapsed = elapsed
+
+        await bot.member_events.stop()
+    finally:
+        await bot.offloader.close()
+        await bot.db.close()
+    print(f"Replayed {len(events)} events in {elapsed:.2f}s, recorded over {events[-1].timestamp - origin:.2f}s")
+    print(f"Coalesced member events: {bot.member_events.coalesced}")
+    print(f"REST calls: {dict(rest.calls)}")
+    print(f"429s: {dict(rest.rate_limited)}")
+    print(f"Errors: {dict(bot.errors)}")
+    return bot
+
+
+def main() -> None:
+    args = parse_args()
+    events = list(open_recording(args.recording))
+    if not events:
+        raise SystemExit(f"{args.recording} has no events")
+    guild = args.guild if args.guild is not None else pick_guild(events)
+    events = [event for event in events if event.guild == guild]
+    if not events:
+        raise SystemExit(f"{args.recording} has no events of guild {guild}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        bot = asyncio.run(replay(args, events, os.path.join(directory, "database.db")))
+
+    results = sorted(bot.results.values(), key=lambda result: result.name)
+    harness.print_results(results)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(
+                {
+                    "args": vars(args),
+                    "guild": guild,
+                    "results": {result.name: result.summary() for result in results},
+                    "errors": dict(bot.errors),
+                },
+                file,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import time
+import typing as t
+
+import hikari
+import lightbulb
+
+import utils
+from models.bot import SurpriseBot
+
+plugin = lightbulb.Plugin(name="calendar")
+
+MAX_LISTED = 25
+"""The maximum amount of days listed in one response, which has to fit in a Discord message."""
+
+
+def today() -> int:
+    """The UNIX timestamp of the start of the current day, in UTC like the surprise days."""
+    return int(time.time()) // utils.SECONDS_PER_DAY * utils.SECONDS_PER_DAY
+
+
+def format_days(entries: t.Sequence[t.Tuple[int, int]]) -> str:
+    lines = [f"<@{user}>: <t:{timestamp}:D>, <t:{timestamp}:R>" for timestamp, user in entries[:MAX_LISTED]]
+    if len(entries) > MAX_LISTED:
+        lines.append(f"...and {len(entries) - MAX_LISTED} more.")
+    return "\n".join(lines)
+
+
+@plugin.command()
+@lightbulb.app_command_permissions(hikari.Permissions.NONE, dm_enabled=False)
+@lightbulb.command("surprise-days", "See whose surprise day is coming up!")
+@lightbulb.implements(lightbulb.SlashCommandGroup)
+async def surprise_days(_: lightbulb.SlashContext) -> None:
+    pass
+
+
+@surprise_days.child()
+@lightbulb.command("today", "See whose surprise day is today!")
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def surprise_days_today(ctx: lightbulb.SlashContext) -> None:
+    assert ctx.member is not None and ctx.guild_id is not None
+    # This could be handled by subclassing lightbulb.Context as well, but it works for now.
+    assert isinstance(ctx.app, SurpriseBot)
+
+    start = today()
+    entries = await ctx.app.db.fetch_surprise_days(ctx.guild_id, start, start + utils.SECONDS_PER_DAY)
+    # Don't spoil the surprise of the member asking.
+    entries = [(timestamp, user) for timestamp, user in entries if user != ctx.member.id]
+    if not entries:
+        await ctx.respond("Nobody has their surprise day today.", flags=hikari.MessageFlag.EPHEMERAL)
+        return
+
+    users = ", ".join(f"<@{user}>" for _, user in entries[:MAX_LISTED])
+    if len(entries) > MAX_LISTED:
+        users += f" and {len(entries) - MAX_LISTED} more"
+    await ctx.respond(f"Today is the surprise day of {users}!", flags=hikari.MessageFlag.EPHEMERAL)
+
+
+@surprise_days.child()
+@lightbulb.command("week", "See whose surprise day is in the next 7 days!")
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def surprise_days_week(ctx: lightbulb.SlashContext) -> None:
+    assert ctx.member is not None and ctx.guild_id is not None
+    # This could be handled by subclassing lightbulb.Context as well, but it works for now.
+    assert isinstance(ctx.app, SurpriseBot)
+
+    start = today()
+    entries = await ctx.app.db.fetch_surprise_days(ctx.guild_id, start, start + 7 * utils.SECONDS_PER_DAY)
+    # Don't spoil the surprise of the member asking.
+    entries = [(timestamp, user) for timestamp, user in entries if user != ctx.member.id]
+    if not entries:
+        await ctx.respond("Nobody has their surprise day this week.", flags=hikari.MessageFlag.EPHEMERAL)
+        return
+
+    await ctx.respond(f"Surprise days this week:\n{format_days(entries)}", flags=hikari.MessageFlag.EPHEMERAL)
+
+
+@surprise_days.child()
+@lightbulb.option(
+    "count", "The amount of surprise days to show", int, required=False, default=10, min_value=1, max_value=MAX_LISTED
+)
+@lightbulb.command("upcoming", "See the next surprise days!", pass_options=True)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def surprise_days_upcoming(ctx: lightbulb.SlashContext, count: int) -> None:
+    assert ctx.member is not None and ctx.guild_id is not None
+    # This could be handled by subclassing lightbulb.Context as well, but it works for now.
+    assert isinstance(ctx.app, SurpriseBot)
+
+    count = min(max(count, 1), MAX_LISTED)
+    # Today's surprise days are listed by /surprise-days today.
+    start = today() + utils.SECONDS_PER_DAY
+    # One more, in case the member asking is among them.
+    entries = await ctx.app.db.fetch_surprise_days(ctx.guild_id, start, 2**63 - 1, count + 1)
+    entries = [(timestamp, user) for timestamp, user in entries if user != ctx.member.id][:count]
+    if not entries:
+        await ctx.respond("There are no upcoming surprise days.", flags=hikari.MessageFlag.EPHEMERAL)
+        return
+
+    await ctx.respond(f"Upcoming surprise days:\n{format_days(entries)}", flags=hikari.MessageFlag.EPHEMERAL)
+
+
+def load(bot: SurpriseBot):
+    bot.add_plugin(plugin)
+
+
+def unload(bot: SurpriseBot):
+    bot.remove_plugin(plugin)
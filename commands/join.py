@@ -12,7 +12,7 @@ plugin = lightbulb.Plugin(name="join")
 @lightbulb.command("join", "Join someone else's surprise day!", pass_options=True)
 @lightbulb.implements(lightbulb.SlashCommand)
 async def join(ctx: lightbulb.SlashContext, user: hikari.User) -> None:
-    assert ctx.member is not None
+    assert ctx.member is not None and ctx.guild_id is not None
     # This could be handled by subclassing lightbulb.Context as well, but it works for now.
     assert isinstance(ctx.app, SurpriseBot)
 
@@ -22,7 +22,7 @@ async def join(ctx: lightbulb.SlashContext, user: hikari.User) -> None:
 
     await ctx.respond(hikari.ResponseType.DEFERRED_MESSAGE_CREATE, flags=hikari.MessageFlag.EPHEMERAL)
 
-    day = await ctx.app.db.fetch_day_by_user(user)
+    day = await ctx.app.db.fetch_day_by_user(ctx.guild_id, user)
     if day is None or day.channel is None:
         await ctx.respond(
             "This user does not have a celebratory channel, or they are not a member of this server!",
@@ -30,12 +30,9 @@ async def join(ctx: lightbulb.SlashContext, user: hikari.User) -> None:
         )
         return
 
-    await ctx.app.rest.edit_permission_overwrites(
-        hikari.Snowflake(day.channel),
-        ctx.member.id,
-        target_type=hikari.PermissionOverwriteType.MEMBER,
-        allow=hikari.Permissions.VIEW_CHANNEL,
-    )
+    if not await ctx.app.grant_access(hikari.Snowflake(day.channel), ctx.member.id):
+        await ctx.respond(f"You already joined {user.mention}'s surprise channel!", flags=hikari.MessageFlag.EPHEMERAL)
+        return
 
     await ctx.respond(f"Joined {user.mention}'s surprise channel!", flags=hikari.MessageFlag.EPHEMERAL)
 
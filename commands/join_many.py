@@ -0,0 +1,69 @@
+import asyncio
+import re
+
+import hikari
+import lightbulb
+
+from models.bot import SurpriseBot
+
+plugin = lightbulb.Plugin(name="join-many")
+
+MAX_USERS = 25
+"""The maximum amount of users one invocation can join."""
+
+CONCURRENCY = 5
+"""The maximum amount of channels joined at the same time."""
+
+USER_PATTERN = re.compile(r"<@!?(\d+)>|\b(\d{15,21})\b")
+
+
+@plugin.command()
+@lightbulb.app_command_permissions(hikari.Permissions.NONE, dm_enabled=False)
+@lightbulb.option("users", "The users to join, as mentions or IDs separated by spaces", str)
+@lightbulb.command("join-many", "Join several surprise days at once!", pass_options=True)
+@lightbulb.implements(lightbulb.SlashCommand)
+async def join_many(ctx: lightbulb.SlashContext, users: str) -> None:
+    assert ctx.member is not None and ctx.guild_id is not None
+    # This could be handled by subclassing lightbulb.Context as well, but it works for now.
+    assert isinstance(ctx.app, SurpriseBot)
+
+    user_ids = list(dict.fromkeys(int(mention or id) for mention, id in USER_PATTERN.findall(users)))
+    user_ids = [user_id for user_id in user_ids if user_id != ctx.member.id]
+    if not user_ids:
+        await ctx.respond("Mention the users whose channels you want to join!", flags=hikari.MessageFlag.EPHEMERAL)
+        return
+    if len(user_ids) > MAX_USERS:
+        await ctx.respond(f"You can join at most {MAX_USERS} users at once!", flags=hikari.MessageFlag.EPHEMERAL)
+        return
+
+    await ctx.respond(hikari.ResponseType.DEFERRED_MESSAGE_CREATE, flags=hikari.MessageFlag.EPHEMERAL)
+
+    app = ctx.app
+    member_id = ctx.member.id
+    guild_id = ctx.guild_id
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def join(user_id: int) -> bool:
+        day = await app.db.fetch_day_by_user(guild_id, user_id)
+        if day is None or day.channel is None:
+            return False
+        async with semaphore:
+            await app.grant_access(hikari.Snowflake(day.channel), member_id)
+        return True
+
+    results = await asyncio.gather(*(join(user_id) for user_id in user_ids), return_exceptions=True)
+    joined = [f"<@{user_id}>" for user_id, result in zip(user_ids, results) if result is True]
+    missing = [f"<@{user_id}>" for user_id, result in zip(user_ids, results) if result is not True]
+
+    response = f"Joined the surprise channels of {', '.join(joined)}!" if joined else "Joined no surprise channels."
+    if missing:
+        response += f"\nCould not join {', '.join(missing)}."
+    await ctx.respond(response, flags=hikari.MessageFlag.EPHEMERAL)
+
+
+def load(bot: SurpriseBot):
+    bot.add_plugin(plugin)
+
+
+def unload(bot: SurpriseBot):
+    bot.remove_plugin(plugin)
@@ -23,7 +23,10 @@ async def leave(ctx: lightbulb.Context):
         return
 
     assert day.channel is not None
-    await ctx.app.rest.delete_permission_overwrite(hikari.Snowflake(day.channel), ctx.member)
+    if not await ctx.app.revoke_access(hikari.Snowflake(day.channel), ctx.member.id):
+        await ctx.respond("You haven't joined this channel!", flags=hikari.MessageFlag.EPHEMERAL)
+        return
+
     await ctx.respond("Successfully left channel!", flags=hikari.MessageFlag.EPHEMERAL)
 
 
@@ -0,0 +1,52 @@
+import asyncio
+
+import hikari
+import lightbulb
+
+from models.bot import SurpriseBot
+
+plugin = lightbulb.Plugin(name="leave-all")
+
+CONCURRENCY = 5
+"""The maximum amount of channels left at the same time."""
+
+
+@plugin.command()
+@lightbulb.app_command_permissions(hikari.Permissions.NONE, dm_enabled=False)
+@lightbulb.command("leave-all", "Leave every surprise day channel you joined ;(")
+@lightbulb.implements(lightbulb.SlashCommand)
+async def leave_all(ctx: lightbulb.Context):
+    assert ctx.member is not None and ctx.guild_id is not None
+    # This could be handled by subclassing lightbulb.Context as well, but it works for now.
+    assert isinstance(ctx.app, SurpriseBot)
+
+    await ctx.respond(hikari.ResponseType.DEFERRED_MESSAGE_CREATE, flags=hikari.MessageFlag.EPHEMERAL)
+
+    app = ctx.app
+    member_id = ctx.member.id
+    channels = await app.joined_channels(ctx.guild_id, member_id)
+    if not channels:
+        await ctx.respond("You haven't joined any surprise channels!", flags=hikari.MessageFlag.EPHEMERAL)
+        return
+
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def leave(channel: hikari.Snowflake) -> None:
+        async with semaphore:
+            await app.revoke_access(channel, member_id)
+
+    results = await asyncio.gather(*(leave(channel) for channel in channels), return_exceptions=True)
+    failed = sum(isinstance(result, BaseException) for result in results)
+
+    response = f"Left {len(channels) - failed} surprise channels!"
+    if failed:
+        response += f" {failed} could not be left, try again later."
+    await ctx.respond(response, flags=hikari.MessageFlag.EPHEMERAL)
+
+
+def load(bot: SurpriseBot):
+    bot.add_plugin(plugin)
+
+
+def unload(bot: SurpriseBot):
+    bot.remove_plugin(plugin)
@@ -0,0 +1,55 @@
+import hikari
+import lightbulb
+
+from models.bot import SurpriseBot
+
+plugin = lightbulb.Plugin(name="reload")
+
+
+@plugin.command()
+@lightbulb.app_command_permissions(hikari.Permissions.ADMINISTRATOR, dm_enabled=False)
+# The commands of every guild are reloaded, so only the owners of the bot can do it.
+@lightbulb.add_checks(lightbulb.owner_only)
+@lightbulb.command("reload", "Reload the bot's commands without restarting it.")
+@lightbulb.implements(lightbulb.SlashCommand)
+async def reload(ctx: lightbulb.SlashContext) -> None:
+    # This could be handled by subclassing lightbulb.Context as well, but it works for now.
+    assert isinstance(ctx.app, SurpriseBot)
+
+    await ctx.respond(hikari.ResponseType.DEFERRED_MESSAGE_CREATE, flags=hikari.MessageFlag.EPHEMERAL)
+    try:
+        stats = await ctx.app.reload_commands()
+    except Exception as e:
+        await ctx.respond(f"Failed to reload the commands: {e!r}", flags=hikari.MessageFlag.EPHEMERAL)
+        return
+
+    response = (
+        f"Reloaded {len(stats.reloaded) + len(stats.loaded)} command plugins in {stats.timings['reload'] * 1000:.1f}ms"
+    )
+    if stats.loaded:
+        response += f", new: {', '.join(stats.loaded)}"
+    if stats.unloaded:
+        response += f", removed: {', '.join(stats.unloaded)}"
+    if stats.synced:
+        response += f".\nThe slash commands changed and were synced in {stats.timings['sync'] * 1000:.0f}ms."
+    else:
+        response += ".\nThe slash commands did not change."
+    await ctx.respond(response, flags=hikari.MessageFlag.EPHEMERAL)
+
+
+@reload.set_error_handler
+async def on_reload_error(event: lightbulb.CommandErrorEvent) -> bool:
+    if isinstance(event.exception, lightbulb.NotOwner):
+        await event.context.respond(
+            "Only the owners of the bot can reload its commands.", flags=hikari.MessageFlag.EPHEMERAL
+        )
+        return True
+    return False
+
+
+def load(bot: SurpriseBot):
+    bot.add_plugin(plugin)
+
+
+def unload(bot: SurpriseBot):
+    bot.remove_plugin(plugin)
@@ -1,29 +1,128 @@
 import os
 
-import dotenv
-import hikari
+from models.startup_profile import StartupProfile
 
-from models.bot import SurpriseBot
+PROFILE = StartupProfile()
 
-dotenv.load_dotenv()
+# Spawned worker processes import this module as well, they only need the functions they run.
+if __name__ == "__main__":
+    with PROFILE.phase("import_hikari"):
+        import dotenv
+        import hikari
 
-TOKEN = os.getenv("TOKEN")
-assert TOKEN is not None
+    with PROFILE.phase("import_bot"):
+        from models.bot import SurpriseBot
 
-CATEGORY = os.getenv("CATEGORY")
-assert CATEGORY is not None
-CATEGORY = hikari.Snowflake(CATEGORY)
+    dotenv.load_dotenv()
 
-GUILD = os.getenv("GUILD")
-assert GUILD is not None
-GUILD = hikari.Snowflake(GUILD)
+    TOKEN = os.getenv("TOKEN")
+    assert TOKEN is not None
 
-bot = SurpriseBot(
-    db_file="database.db",
-    token=TOKEN,
-    category=CATEGORY,
-    default_enabled_guilds=(GUILD,),
-    intents=hikari.Intents.ALL_UNPRIVILEGED | hikari.Intents.GUILD_MEMBERS,
-)
+    # The surprise day category of each guild, as comma separated guild:category pairs.
+    # A single guild can also be configured with GUILD and CATEGORY.
+    GUILDS = os.getenv("GUILDS")
+    if GUILDS:
+        CATEGORIES = {
+            hikari.Snowflake(guild): hikari.Snowflake(category)
+            for guild, category in (pair.split(":") for pair in GUILDS.split(","))
+        }
+    else:
+        GUILD = os.getenv("GUILD")
+        assert GUILD is not None
+        CATEGORY = os.getenv("CATEGORY")
+        assert CATEGORY is not None
+        CATEGORIES = {hikari.Snowflake(GUILD): hikari.Snowflake(CATEGORY)}
 
-bot.run()
+    # Optional, for running one process per group of shards: the total amount of shards, and the
+    # comma separated shard IDs this process runs. hikari picks both automatically if unset.
+    SHARD_COUNT = os.getenv("SHARD_COUNT")
+    SHARD_IDS = os.getenv("SHARD_IDS")
+
+    # Optional, the amount of surprise days to keep in memory. Caching is disabled if unset.
+    CACHE_SIZE = os.getenv("CACHE_SIZE")
+
+    # Optional, a postgresql:// URI to store surprise days in PostgreSQL instead of database.db, so several bot
+    # processes can share them. The cache and the calendar index of every process only see its own writes, so either
+    # each guild is handled by a single process, see SHARD_IDS, or every process serving the same guilds leaves
+    # CACHE_SIZE unset and sets CALENDAR_INDEX to 0. Needs the packages in requirements-postgres.txt.
+    DATABASE_URL = os.getenv("DATABASE_URL")
+
+    # Optional, set to 0 to answer /surprise-days from the database instead of an index of every surprise day kept in
+    # memory. Required for replicas sharing a PostgreSQL database with other processes serving the same guilds.
+    CALENDAR_INDEX = os.getenv("CALENDAR_INDEX") != "0"
+
+    # Optional, the amount of read-only database connections, 4 by default. 0 sends reads through the writer connection.
+    READ_POOL_SIZE = os.getenv("READ_POOL_SIZE")
+
+    # Optional, comma separated name=value SQLite pragmas, replacing models.database.DEFAULT_PRAGMAS.
+    SQLITE_PRAGMAS = os.getenv("SQLITE_PRAGMAS")
+
+    # Optional, the amount of hidden channels to create in advance per guild, so joining members get one instantly.
+    # Disabled if unset. Spare channels are created at most once every 2 seconds.
+    CHANNEL_POOL_SIZE = os.getenv("CHANNEL_POOL_SIZE")
+
+    # Optional, how the reset job updates pinned messages: "edit" (the default) edits them in place, "recreate"
+    # deletes them and pins a new one.
+    RESET_MODE = os.getenv("RESET_MODE") or "edit"
+    assert RESET_MODE in ("edit", "recreate")
+
+    # Optional, set to 1 to post a reminder in the channel of every member whose surprise day starts, at midnight UTC.
+    ANNOUNCE_SURPRISE_DAYS = os.getenv("ANNOUNCE_SURPRISE_DAYS") == "1"
+
+    # Optional, set to 1 to spread new surprise days evenly over the calendar instead of picking them uniformly, so
+    # few dates get many surprise days. See python manage.py simulate for how even they get.
+    BALANCE_SURPRISE_DAYS = os.getenv("BALANCE_SURPRISE_DAYS") == "1"
+
+    # Optional, a secret that makes picking surprise days reproducible: re-rolling a member's day with the same seed
+    # and the same other days gives the same day. Anyone knowing it can work out the surprise days.
+    SURPRISE_DAY_SEED = os.getenv("SURPRISE_DAY_SEED")
+
+    # Optional, the port to serve Prometheus metrics on. Metrics are not served if unset.
+    METRICS_PORT = os.getenv("METRICS_PORT")
+
+    # Optional, set to 1 to log every timed operation as JSON to the surprise.trace logger.
+    TRACE = os.getenv("TRACE") == "1"
+
+    # Optional, a file to append the member joins, leaves and slash commands the bot receives to, for replaying them
+    # offline with python -m benchmarks.replay. Nothing is recorded if unset.
+    RECORD_EVENTS = os.getenv("RECORD_EVENTS")
+
+    # Optional, set to 1 to log how long each phase of the startup took, from the imports to serving commands.
+    PROFILE.enabled = os.getenv("STARTUP_PROFILE") == "1"
+
+    # Optional, set to 0 to open the database before connecting to the gateway and to sync the slash commands on
+    # every start, instead of only when they changed.
+    FAST_STARTUP = os.getenv("FAST_STARTUP") != "0"
+
+    # Optional, the amount of worker processes to run the CPU-bound steps of reconciliation and bulk resets in, so the
+    # bot keeps answering commands during them in large guilds. They run in the bot process if unset or 0.
+    WORKER_PROCESSES = os.getenv("WORKER_PROCESSES")
+
+    bot = SurpriseBot(
+        db_file="database.db",
+        token=TOKEN,
+        categories=CATEGORIES,
+        cache_size=int(CACHE_SIZE) if CACHE_SIZE else None,
+        database_url=DATABASE_URL or None,
+        calendar_index=CALENDAR_INDEX,
+        read_pool_size=int(READ_POOL_SIZE) if READ_POOL_SIZE else 4,
+        sqlite_pragmas=dict(pragma.split("=", 1) for pragma in SQLITE_PRAGMAS.split(",")) if SQLITE_PRAGMAS else None,
+        channel_pool_size=int(CHANNEL_POOL_SIZE) if CHANNEL_POOL_SIZE else 0,
+        reset_edits_messages=RESET_MODE == "edit",
+        announce_surprise_days=ANNOUNCE_SURPRISE_DAYS,
+        balance_surprise_days=BALANCE_SURPRISE_DAYS,
+        surprise_day_seed=SURPRISE_DAY_SEED or None,
+        metrics_port=int(METRICS_PORT) if METRICS_PORT else None,
+        trace=TRACE,
+        record_events=RECORD_EVENTS or None,
+        worker_processes=int(WORKER_PROCESSES) if WORKER_PROCESSES else 0,
+        fast_startup=FAST_STARTUP,
+        startup_profile=PROFILE,
+        default_enabled_guilds=tuple(CATEGORIES),
+        intents=hikari.Intents.ALL_UNPRIVILEGED | hikari.Intents.GUILD_MEMBERS,
+    )
+
+    bot.run(
+        shard_count=int(SHARD_COUNT) if SHARD_COUNT else None,
+        shard_ids=[int(shard) for shard in SHARD_IDS.split(",")] if SHARD_IDS else None,
+    )
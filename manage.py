@@ -0,0 +1,133 @@
+"""Maintenance commands for the surprise day database.
+
+Usage:
+    python manage.py export days.ndjson [--guild ID ...]
+    python manage.py import days.csv
+    python manage.py simulate --members 5000
+
+Exports read a consistent snapshot of the database, streamed in chunks, and are safe to run while the bot is running.
+
+Imports go through the batch insert path, one transaction per chunk. Stop the bot before importing: a running bot
+doesn't see days written by other processes in its cache and calendar index, so it may create channels for
+imported members that already have a day, and it only schedules the resets of imported days when it starts.
+
+Simulations don't touch the database, they compare how evenly uniform and balanced scheduling spread the surprise days
+of a guild.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import sys
+import time
+import typing as t
+
+import dotenv
+
+from models import balancer
+from models import transfer
+from models.database import Database
+from models.storage import Storage
+
+DEFAULT_DATABASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database.db")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python manage.py", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database", default=DEFAULT_DATABASE, help="the SQLite database file, database.db by default")
+    parser.add_argument(
+        "--database-url", default=os.getenv("DATABASE_URL"), help="a PostgreSQL database, DATABASE_URL by default"
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000, help="days held in memory at a time")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="write every surprise day to a file")
+    export.add_argument("path", help="the file to write, - for stdout")
+    export.add_argument("--format", choices=transfer.FORMATS, help="guessed from the file extension by default")
+    export.add_argument("--guild", type=int, action="append", dest="guilds", help="only export this guild's days")
+
+    import_ = subparsers.add_parser(
+        "import", help="create a surprise day for every record of a file, with the bot stopped"
+    )
+    import_.add_argument("path", help="the file to read, - for stdin")
+    import_.add_argument("--format", choices=transfer.FORMATS, help="guessed from the file extension by default")
+
+    simulate = subparsers.add_parser("simulate", help="compare how evenly surprise days are spread over the calendar")
+    simulate.add_argument("--members", type=int, required=True, help="the amount of members of the guild")
+    simulate.add_argument(
+        "--choices",
+        type=int,
+        default=balancer.DEFAULT_CHOICES,
+        help=f"candidate days per member when balancing, {balancer.DEFAULT_CHOICES} by default like the bot",
+    )
+    simulate.add_argument("--seed", default=os.getenv("SURPRISE_DAY_SEED"), help="SURPRISE_DAY_SEED by default")
+    return parser.parse_args()
+
+
+async def connect(args: argparse.Namespace) -> Storage:
+    if args.database_url:
+        # asyncpg is only installed for PostgreSQL deployments.
+        from models.postgres import PostgresDatabase
+
+        return await PostgresDatabase.connect(args.database_url, min_size=1, max_size=2)
+    if args.command == "export" and not os.path.exists(args.database):
+        raise SystemExit(f"Database {args.database} does not exist")
+    # A read-only connection, so exports read a snapshot instead of going through the writer connection.
+    return await Database.connect(args.database, read_pool_size=1)
+
+
+@contextlib.contextmanager
+def open_file(path: str, mode: str) -> t.Iterator[t.TextIO]:
+    if path == "-":
+        yield sys.stdout if mode == "w" else sys.stdin
+        return
+    with open(path, mode, newline="", encoding="utf-8") as file:
+        yield file
+
+
+async def run(args: argparse.Namespace) -> None:
+    format = args.format or transfer.format_for(args.path)
+    storage = await connect(args)
+    start = time.perf_counter()
+    try:
+        # The schema must be up to date before reading or writing, like when the bot starts.
+        await storage.create_schema()
+        if args.command == "export":
+            with open_file(args.path, "w") as file:
+                count = await transfer.export_days(storage, file, format, args.guilds, args.chunk_size)
+            verb = "Exported"
+        else:
+            with open_file(args.path, "r") as file:
+                count = await transfer.import_days(storage, file, format, args.chunk_size)
+            verb = "Imported"
+    finally:
+        await storage.close()
+    print(f"{verb} {count} surprise days in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+def simulate(args: argparse.Namespace) -> None:
+    print(f"{'scheduling':<20} {'mean':>8} {'stdev':>8} {'min':>6} {'max':>6} {'max/mean':>9} {'empty':>6}")
+    for name, choices in (("uniform", 1), (f"balanced ({args.choices})", args.choices)):
+        days = balancer.simulate(balancer.DayBalancer(args.seed, choices), args.members)
+        mean = statistics.fmean(days)
+        print(
+            f"{name:<20} {mean:>8.2f} {statistics.pstdev(days):>8.2f} {min(days):>6} {max(days):>6}"
+            f" {max(days) / mean if mean else 0:>9.2f} {days.count(0):>6}"
+        )
+    print(f"{args.members} members over {len(days)} days", file=sys.stderr)
+
+
+def main() -> None:
+    dotenv.load_dotenv()
+    args = parse_args()
+    if args.command == "simulate":
+        simulate(args)
+    else:
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import typing as t
+
+import utils
+
+logger = logging.getLogger(__name__)
+
+AnnounceCallback = t.Callable[[int], t.Awaitable[None]]
+
+
+class Announcer:
+    """Fires a callback with the UNIX timestamp of every new day, at midnight UTC.
+
+    Days that start while the bot is offline are not announced afterwards, so a restart never announces a day twice.
+    """
+
+    __slots__: t.Sequence[str] = ("_callback", "_task")
+
+    def __init__(self, callback: AnnounceCallback) -> None:
+        self._callback = callback
+        self._task: t.Optional[asyncio.Task[None]] = None
+
+    @property
+    def is_running(self) -> bool:
+        """True if days are being announced."""
+        return self._task is not None and not self._task.done()
+
+    @staticmethod
+    def next_day(now: t.Optional[float] = None) -> int:
+        """The UNIX timestamp of the next midnight UTC."""
+        now = time.time() if now is None else now
+        return (int(now) // utils.SECONDS_PER_DAY + 1) * utils.SECONDS_PER_DAY
+
+    def start(self) -> None:
+        """Start announcing days in the background."""
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop announcing days."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            day = self.next_day()
+            # Sleeping can end slightly early, so wait until the day really started.
+            while (remaining := day - time.time()) > 0:
+                await asyncio.sleep(remaining)
+            try:
+                await self._callback(day)
+            except Exception:
+                logger.exception(f"Failed to announce the surprise days of {day}")
@@ -0,0 +1,142 @@
+"""Balanced surprise day scheduling.
+
+This module only imports the standard library and utils, so it can run in the worker processes of the Offloader.
+"""
+from __future__ import annotations
+
+import array
+import datetime
+import random
+import typing as t
+
+import utils
+
+Occupancy = t.MutableMapping[int, int]
+"""The amount of days of a guild per surprise day, keyed by days since the UNIX epoch."""
+
+DEFAULT_CHOICES = 3
+"""The amount of candidate days drawn per member, see DayBalancer."""
+
+_rng = random.Random()
+"""The generator used without a seed. Every process gets its own, seeded by the operating system."""
+
+
+class DayBalancer:
+    """Picks surprise days that spread evenly over the calendar, so announcements and channel traffic don't pile up
+    on a few dates.
+
+    Every member draws a few candidate days over the same range as utils.generate_random_day_numbers(), and gets
+    the one with the fewest surprise days so far. Few candidates keep the days unpredictable, and members picking
+    at the same time from the same counts rarely share candidates, so they don't all pile onto the emptiest day.
+    One candidate picks uniformly like before.
+
+    With a seed, the candidates of a member only depend on the seed, their guild, their user ID and their reset
+    day, so re-rolling with the same counts gives the same day again. Anyone knowing the seed can work out the
+    surprise days, it has to be kept secret.
+    """
+
+    __slots__: t.Sequence[str] = ("_seed", "_choices")
+
+    def __init__(self, seed: t.Optional[str] = None, choices: int = DEFAULT_CHOICES) -> None:
+        if choices < 1:
+            raise ValueError("choices must be at least 1.")
+        self._seed = seed
+        self._choices = choices
+
+    @property
+    def seed(self) -> t.Optional[str]:
+        """The seed of the per-member generators, or None if days are not reproducible."""
+        return self._seed
+
+    @property
+    def choices(self) -> int:
+        """The amount of candidate days drawn per member."""
+        return self._choices
+
+    def rng(self, guild: int, user: int, reset_day: int) -> random.Random:
+        """The generator a member draws their candidates from until reset_day."""
+        if self._seed is None:
+            return _rng
+        # Seeding with a str hashes it with SHA-512, which unlike hash() is the same in every process.
+        return random.Random(f"{self._seed}:{guild}:{user}:{reset_day}")
+
+    def _pick(self, occupancy: Occupancy, guild: int, user: int, day_range: t.Tuple[int, int, int]) -> int:
+        start_day, end_day, reset_day = day_range
+        rng = self.rng(guild, user, reset_day)
+        candidates = [rng.randrange(start_day, end_day) for _ in range(self._choices)]
+        # min() keeps the first of equally occupied candidates, so seeded picks stay reproducible.
+        day = min(candidates, key=lambda candidate: occupancy.get(candidate, 0))
+        occupancy[day] = occupancy.get(day, 0) + 1
+        return day
+
+    def pick(
+        self, occupancy: Occupancy, guild: int, user: int, now: t.Optional[datetime.datetime] = None
+    ) -> t.Tuple[int, int]:
+        """Pick the surprise day and reset day of a member, as days since the UNIX epoch.
+
+        Parameters
+        ----------
+        occupancy: Occupancy
+            The amount of days of the member's guild per surprise day. The picked day is counted in it.
+        guild: int
+            The guild of the member.
+        user: int
+            The user ID of the member.
+        now: t.Optional[datetime.datetime]
+            The date to pick the days from. Defaults to the current time.
+
+        Returns
+        -------
+        t.Tuple[int, int]
+            The surprise day and the reset day.
+        """
+        day_range = utils.surprise_day_range(now)
+        return self._pick(occupancy, guild, user, day_range), day_range[2]
+
+    def pick_many(
+        self,
+        occupancy: t.Mapping[int, Occupancy],
+        guilds: t.Sequence[int],
+        users: t.Sequence[int],
+        now: t.Optional[datetime.datetime] = None,
+    ) -> t.Tuple[array.array[int], array.array[int]]:
+        """Pick the surprise days and reset days of several members in turn, like pick().
+
+        Parameters
+        ----------
+        occupancy: t.Mapping[int, Occupancy]
+            The occupancy of every guild in guilds. The picked days are counted in them.
+        guilds: t.Sequence[int]
+            The guild of every member.
+        users: t.Sequence[int]
+            The user ID of every member.
+        now: t.Optional[datetime.datetime]
+            The date to pick the days from. Defaults to the current time.
+
+        Returns
+        -------
+        t.Tuple[array.array[int], array.array[int]]
+            The surprise days and the reset days, index i of both arrays belongs to member i.
+        """
+        day_range = utils.surprise_day_range(now)
+        surprise_days = array.array(
+            "q", (self._pick(occupancy[guild], guild, user, day_range) for guild, user in zip(guilds, users))
+        )
+        reset_days = array.array("q", [day_range[2]]) * len(surprise_days)
+        return surprise_days, reset_days
+
+
+def simulate(
+    balancer: DayBalancer, members: int, now: t.Optional[datetime.datetime] = None, guild: int = 0
+) -> t.List[int]:
+    """Pick the surprise days of a guild of members at once, like when the bot is added to it.
+
+    Returns
+    -------
+    t.List[int]
+        The amount of surprise days on every day that can be picked, in order.
+    """
+    occupancy: Occupancy = {}
+    balancer.pick_many({guild: occupancy}, [guild] * members, range(members), now)
+    start_day, end_day, _ = utils.surprise_day_range(now)
+    return [occupancy.get(day, 0) for day in range(start_day, end_day)]
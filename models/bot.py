@@ -1,27 +1,147 @@
+import array
+import asyncio
+import contextlib
 import datetime
+import hashlib
+import importlib
 import logging
 import os
+import sys
+import time
 import typing as t
 
-import aiosqlite
 import hikari
 import lightbulb
-from lightbulb.ext import tasks
 
 import utils
+from models import bulk
+from models import metrics
+from models.announcer import Announcer
+from models.balancer import DEFAULT_CHOICES
+from models.balancer import DayBalancer
+from models.balancer import Occupancy
+from models.channel_pool import SPARE_CHANNEL_NAME
+from models.channel_pool import ChannelPool
 from models.database import Database
+from models.event_queue import CoalescingQueue
+from models.message_registry import MessageRegistry
+from models.offload import Offloader
+from models.outbox import Outbox
+from models.reconcile_stats import ReconcileStats
+from models.recorder import EventRecorder
+from models.reload_stats import ReloadStats
+from models.reset_stats import ResetStats
+from models.scheduler import ResetScheduler
+from models.startup_profile import StartupProfile
+from models.storage import NewDay
+from models.storage import Storage
+from models.surprise_day import SurpriseDay
 
 logger = logging.getLogger(__name__)
 
+T = t.TypeVar("T")
+
+MemberEvent = t.Union[hikari.MemberCreateEvent, hikari.MemberDeleteEvent]
+
+COMMAND_HASH_FILE = ".command_hash"
+"""The file the fingerprint of the last synced slash commands is kept in, relative to the bot's directory."""
+
+
+class ProvisionError(Exception):
+    """Raised when the surprise day message of a member could not be posted after their channel was created.
+
+    The channel is kept, so a retry doesn't create another one.
+    """
+
+    def __init__(
+        self, channel_id: hikari.Snowflake, surprise_day: datetime.datetime, reset_day: datetime.datetime
+    ) -> None:
+        super().__init__(f"Failed to post the surprise day message in channel {channel_id}")
+        self.channel_id = channel_id
+        self.surprise_day = surprise_day
+        self.reset_day = reset_day
+
 
 class SurpriseBot(lightbulb.BotApp):
-    def __init__(self, db_file: str, category: int, *args, **kwargs) -> None:
+    def __init__(
+        self,
+        db_file: str,
+        categories: t.Mapping[int, int],
+        *args,
+        reset_concurrency: int = 8,
+        reset_batch_size: int = 100,
+        cache_size: t.Optional[int] = None,
+        read_pool_size: int = 4,
+        sqlite_pragmas: t.Optional[t.Mapping[str, str]] = None,
+        database_url: t.Optional[str] = None,
+        calendar_index: bool = True,
+        reset_spread: float = 86400.0,
+        member_event_concurrency: int = 8,
+        channel_pool_size: int = 0,
+        channel_pool_rate: float = 0.5,
+        reset_edits_messages: bool = True,
+        announce_surprise_days: bool = False,
+        balance_surprise_days: bool = False,
+        surprise_day_seed: t.Optional[str] = None,
+        worker_processes: int = 0,
+        reconcile_on_start: bool = True,
+        metrics_port: t.Optional[int] = None,
+        trace: bool = False,
+        record_events: t.Optional[str] = None,
+        fast_startup: bool = True,
+        startup_profile: t.Optional[StartupProfile] = None,
+        **kwargs,
+    ) -> None:
         super().__init__(*args, **kwargs)
         self._db_file: str = os.path.join(self.path, db_file)
-        self._db: t.Optional[Database] = None
-        self._category: hikari.Snowflake = hikari.Snowflake(category)
+        self._db: t.Optional[Storage] = None
+        self._database_url: t.Optional[str] = database_url
+        self._cache_size: t.Optional[int] = cache_size
+        self._read_pool_size: int = read_pool_size
+        self._sqlite_pragmas: t.Optional[t.Mapping[str, str]] = sqlite_pragmas
+        self._calendar_index: bool = calendar_index
+        self._categories: t.Dict[hikari.Snowflake, hikari.Snowflake] = {
+            hikari.Snowflake(guild): hikari.Snowflake(category) for guild, category in categories.items()
+        }
+        self._reset_concurrency: int = reset_concurrency
+        self._reset_batch_size: int = reset_batch_size
+        self._last_reset: t.Optional[ResetStats] = None
+        self._scheduler: ResetScheduler = ResetScheduler(self._reset_due, spread=reset_spread)
+        self._member_events: CoalescingQueue[MemberEvent] = CoalescingQueue(
+            self._handle_member_event, concurrency=member_event_concurrency
+        )
+        self._channel_pool: t.Optional[ChannelPool] = (
+            ChannelPool(self._create_spare_channel, channel_pool_size, channel_pool_rate) if channel_pool_size else None
+        )
+        self._reset_edits_messages: bool = reset_edits_messages
+        self._messages: MessageRegistry = MessageRegistry()
+        self._outbox: t.Optional[Outbox] = None
+        self._announcer: t.Optional[Announcer] = (
+            Announcer(self.announce_surprise_days) if announce_surprise_days else None
+        )
+        # A seed alone makes the uniform picks reproducible.
+        self._balancer: t.Optional[DayBalancer] = (
+            DayBalancer(surprise_day_seed, DEFAULT_CHOICES if balance_surprise_days else 1)
+            if balance_surprise_days or surprise_day_seed is not None
+            else None
+        )
+        self._reconcile_on_start: bool = reconcile_on_start
+        self._offloader: Offloader = Offloader(worker_processes)
+        self._instrumented_rest = metrics.InstrumentedREST(super().rest)
+        self._metrics_server: t.Optional[metrics.MetricsServer] = (
+            metrics.MetricsServer(metrics.REGISTRY, port=metrics_port) if metrics_port else None
+        )
+        self._command_starts: t.Dict[int, float] = {}
+        self._recorder: t.Optional[EventRecorder] = (
+            EventRecorder(os.path.join(self.path, record_events)) if record_events else None
+        )
+        self._fast_startup: bool = fast_startup
+        self._startup: StartupProfile = startup_profile or StartupProfile(enabled=False)
+        self._database_opening: t.Optional[asyncio.Task[bool]] = None
+        self._gateway_connecting: float = 0.0
+        metrics.REGISTRY.tracing = trace
+        self.register_gauges()
         self.subscribe_listeners()
-        tasks.load(self)
 
     @property
     def path(self) -> str:
@@ -29,113 +149,1023 @@ class SurpriseBot(lightbulb.BotApp):
         return os.path.abspath(os.path.join(os.path.abspath(__file__), os.pardir, os.pardir))
 
     @property
-    def db(self) -> Database:
+    def rest(self) -> hikari.api.RESTClient:
+        """The REST client of the bot, timing every call for the metrics."""
+        return t.cast(hikari.api.RESTClient, self._instrumented_rest)
+
+    @property
+    def db(self) -> Storage:
         """The current database connection of the bot."""
         if db := self._db:
             return db
         raise hikari.ComponentStateConflictError("Database is not yet initialized.")
 
     @property
-    def category(self) -> hikari.Snowflake:
-        """The category ID of the surprise day channels the bot handles."""
-        return self._category
+    def categories(self) -> t.Mapping[hikari.Snowflake, hikari.Snowflake]:
+        """The category ID of the surprise day channels in each guild the bot handles, by guild ID."""
+        return self._categories
+
+    @property
+    def owned_guilds(self) -> t.FrozenSet[hikari.Snowflake]:
+        """The configured guilds on the shards this process runs, or every configured guild before the bot started.
+
+        Each process of a sharded deployment only resets and reconciles the surprise days of its own guilds.
+        """
+        if not self.shard_count:
+            return frozenset(self._categories)
+        # Discord's sharding formula, see https://discord.com/developers/docs/topics/gateway#sharding
+        return frozenset(guild for guild in self._categories if (guild >> 22) % self.shard_count in self.shards)
+
+    def category_for(self, guild: hikari.SnowflakeishOr[hikari.PartialGuild]) -> t.Optional[hikari.Snowflake]:
+        """The category ID of the surprise day channels in a guild, or None if the bot does not handle the guild."""
+        return self._categories.get(hikari.Snowflake(guild))
+
+    @property
+    def last_reset(self) -> t.Optional[ResetStats]:
+        """Statistics about the last run of the reset job, or None if it did not run yet."""
+        return self._last_reset
+
+    @property
+    def scheduler(self) -> ResetScheduler:
+        """The scheduler that resets each surprise day once its reset day has passed."""
+        return self._scheduler
+
+    @property
+    def member_events(self) -> CoalescingQueue[MemberEvent]:
+        """The queue member join and leave events are buffered in before being handled."""
+        return self._member_events
+
+    @property
+    def outbox(self) -> Outbox:
+        """The outbox failed Discord side effects are retried from."""
+        if outbox := self._outbox:
+            return outbox
+        raise hikari.ComponentStateConflictError("Database is not yet initialized.")
+
+    @property
+    def offloader(self) -> Offloader:
+        """Runs the CPU-bound steps of reconciliation and bulk resets, in worker processes if there are any."""
+        return self._offloader
+
+    @property
+    def messages(self) -> MessageRegistry:
+        """The surprise day messages known to exist or to be deleted."""
+        return self._messages
+
+    @property
+    def startup(self) -> StartupProfile:
+        """The timings of the bot's startup phases."""
+        return self._startup
+
+    @property
+    def channel_pool(self) -> t.Optional[ChannelPool]:
+        """The pool of pre-created channels handed to joining members, or None if it is disabled."""
+        return self._channel_pool
+
+    def register_gauges(self) -> None:
+        """Expose the state of the background jobs as metrics."""
+        metrics.REGISTRY.gauge(
+            "member_events_depth", lambda: self.member_events.depth, "Member events waiting to be handled."
+        )
+        metrics.REGISTRY.gauge(
+            "member_events_lag_seconds", lambda: self.member_events.lag, "Age of the oldest pending member event."
+        )
+        metrics.REGISTRY.gauge(
+            "reset_overdue", lambda: self.scheduler.overdue(), "Surprise days past their deadline, not yet reset."
+        )
+        metrics.REGISTRY.gauge("reset_scheduled", lambda: len(self.scheduler), "Surprise days waiting for a reset.")
+        metrics.REGISTRY.gauge(
+            "database_readers_idle",
+            lambda: self._db.readers.idle if isinstance(self._db, Database) and self._db.readers else 0,
+            "Read-only database connections not in use.",
+        )
+        metrics.REGISTRY.gauge(
+            "channel_pool_spares",
+            lambda: len(self.channel_pool) if self.channel_pool else 0,
+            "Pre-created channels waiting for a joining member.",
+        )
+        metrics.REGISTRY.gauge(
+            "reset_rows_per_second",
+            lambda: self.last_reset.rows_per_second if self.last_reset else 0.0,
+            "Throughput of the last reset run.",
+        )
 
     def subscribe_listeners(self) -> None:
         """Start all listeners located in this class."""
         self.subscribe(hikari.StartingEvent, self.on_starting)
         self.subscribe(hikari.StartedEvent, self.on_started)
         self.subscribe(hikari.StoppingEvent, self.on_stopping)
-        self.subscribe(hikari.MemberCreateEvent, self.on_member_create)
-        self.subscribe(hikari.MemberDeleteEvent, self.on_member_delete)
+        self.subscribe(hikari.MemberCreateEvent, self.on_member_event)
+        self.subscribe(hikari.MemberDeleteEvent, self.on_member_event)
+        self.subscribe(hikari.GuildMessageDeleteEvent, self.on_message_delete)
+        self.subscribe(lightbulb.CommandInvocationEvent, self.on_command_invocation)
+        self.subscribe(lightbulb.CommandCompletionEvent, self.on_command_completion)
+        self.subscribe(lightbulb.CommandErrorEvent, self.on_command_error)
+        if self._recorder is not None:
+            self.subscribe(hikari.InteractionCreateEvent, self.on_interaction_create)
 
     async def on_starting(self, _: hikari.StartingEvent) -> None:
         """Called once when the bot is starting up."""
 
+        if self._metrics_server is not None:
+            with self.startup.phase("start_metrics_server"):
+                await self._metrics_server.start()
+
+        if self._fast_startup:
+            # The gateway only connects once every StartingEvent listener returned, so the database is opened
+            # while it connects and awaited in on_started.
+            self._database_opening = asyncio.create_task(self._open_database())
+        elif not await self._open_database():
+            await self.close()
+
+        with self.startup.phase("load_extensions"):
+            self.load_extensions_from(os.path.join(self.path, "commands"), must_exist=True)
+        self._gateway_connecting = time.perf_counter()
+
+    async def _open_database(self) -> bool:
         try:
-            self._db = Database(await aiosqlite.connect(self._db_file))
+            with self.startup.phase("open_database"):
+                await self.open_database()
         except Exception as e:
             logger.critical(f"Failed to initialize database: {e}.")
-            await self.close()
+            return False
+        return True
+
+    async def open_database(self) -> Storage:
+        """Connect to the database and bring its schema up to date.
 
-        await self.db.create_schema()
+        The database is PostgreSQL if a database URL was passed, otherwise the SQLite file.
+        """
+        with self.startup.phase("connect_database"):
+            if self._database_url is not None:
+                # asyncpg is only installed for PostgreSQL deployments.
+                from models.postgres import PostgresDatabase
 
-        self.load_extensions_from(os.path.join(self.path, "commands"), must_exist=True)
+                self._db = await PostgresDatabase.connect(
+                    self._database_url, cache_size=self._cache_size, calendar=self._calendar_index
+                )
+            else:
+                self._db = await Database.connect(
+                    self._db_file,
+                    cache_size=self._cache_size,
+                    read_pool_size=self._read_pool_size,
+                    pragmas=self._sqlite_pragmas,
+                    calendar=self._calendar_index,
+                )
+        with self.startup.phase("create_schema"):
+            await self.db.create_schema()
+
+        # Days from before the guild column existed can only belong to a single configured guild.
+        if len(self._categories) == 1 and (adopted := await self.db.adopt_days(next(iter(self._categories)))):
+            logger.info(f"Assigned {adopted} surprise days to guild {next(iter(self._categories))}")
+
+        with self.startup.phase("warm_cache"):
+            await self.db.warm_cache()
+        self._outbox = Outbox(
+            self.db,
+            {"provision": self._retry_provision, "clean_up": self._retry_clean_up, "reset": self._retry_reset},
+            guilds=lambda: self.owned_guilds,
+        )
+        return self.db
+
+    async def database_ready(self) -> bool:
+        """Wait until the database opened while the gateway connects is open, False if it failed to open."""
+        if (opening := self._database_opening) is not None:
+            # Shielded, so a cancelled waiter doesn't cancel the opening for everyone else.
+            return await asyncio.shield(opening)
+        # The outbox is created last, once the database is ready.
+        return self._outbox is not None
 
     async def on_started(self, _: hikari.StartedEvent) -> None:
         """Called once when the bot has started up."""
-        self.reset_surprisedays.start()
+        self.startup.record("connect_gateway", self._gateway_connecting)
+        if self._database_opening is not None:
+            opened = await self.database_ready()
+            self._database_opening = None
+            if not opened:
+                await self.close()
+                return
+
+        # The shards this process runs are only known now.
+        with self.startup.phase("load_schedule"):
+            self.scheduler.load(await self.db.fetch_reset_schedule(self.owned_guilds))
+
+        if self._reconcile_on_start:
+            try:
+                with self.startup.phase("reconcile"):
+                    await self.reconcile()
+            except Exception:
+                logger.exception("Failed to reconcile the database with the guild")
+
+        if self._channel_pool is not None:
+            try:
+                with self.startup.phase("load_channel_pool"):
+                    await self.load_channel_pool()
+            except Exception:
+                logger.exception("Failed to load the spare channels")
+            self._channel_pool.start()
+
+        self.scheduler.start()
+        self.member_events.start()
+        self.outbox.start()
+        if self._announcer is not None:
+            self._announcer.start()
+        self.startup.record("ready", self.startup.origin)
+        self.startup.log()
+
+    def command_fingerprint(self) -> str:
+        """Hash everything the slash command definitions are built from: the command plugins, the guilds they are
+        enabled in and the version of lightbulb that turns them into Discord's format."""
+        digest = hashlib.sha256(f"{lightbulb.__version__}:{sorted(self.default_enabled_guilds)}".encode())
+        directory = os.path.join(self.path, "commands")
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".py"):
+                digest.update(name.encode())
+                with open(os.path.join(directory, name), "rb") as file:
+                    digest.update(file.read())
+        return digest.hexdigest()
+
+    async def _manage_application_commands(self, event: hikari.StartedEvent) -> None:
+        # lightbulb's StartedEvent listener, which syncs the slash commands without sync_application_commands().
+        # With the fast startup path, the sync is skipped if the command definitions did not change since the last
+        # successful sync, which saves a request per guild.
+        fingerprint = self.command_fingerprint()
+        if self._fast_startup and self.synced_command_fingerprint() == fingerprint:
+            logger.info("Slash commands did not change since the last sync, skipping it")
+            await self.dispatch(lightbulb.LightbulbStartedEvent(app=self))
+            return
+
+        with self.startup.phase("sync_commands"):
+            await super()._manage_application_commands(event)
+        self._write_command_fingerprint(fingerprint)
+
+    async def sync_application_commands(self) -> None:
+        """Sync the slash commands with Discord and remember their command_fingerprint()."""
+        fingerprint = self.command_fingerprint()
+        # The application is only fetched by the startup sync, which may have been skipped.
+        self.application = self.application or await self.rest.fetch_application()
+        await super().sync_application_commands()
+        self._write_command_fingerprint(fingerprint)
+
+    def _write_command_fingerprint(self, fingerprint: str) -> None:
+        with open(os.path.join(self.path, COMMAND_HASH_FILE), "w") as file:
+            file.write(fingerprint)
+
+    def synced_command_fingerprint(self) -> t.Optional[str]:
+        """The command_fingerprint() of the last successful sync, None if it is unknown."""
+        hash_file = os.path.join(self.path, COMMAND_HASH_FILE)
+        if not os.path.exists(hash_file):
+            return None
+        with open(hash_file) as file:
+            return file.read().strip()
+
+    async def reload_commands(self) -> ReloadStats:
+        """Reload the command plugins through their unload and load functions, keeping the gateway connection, the
+        database and its caches.
+
+        Plugins whose file is gone are unloaded and new files are loaded. Unloading and loading don't yield to the
+        event loop, so no interaction sees the commands missing. If a plugin fails to load, the previous plugins
+        are restored and the error is raised. The slash commands are only synced if their definitions changed.
+
+        Returns
+        -------
+        ReloadStats
+            Statistics about the reload.
+        """
+        stats = ReloadStats()
+        start = time.perf_counter()
+        previous = {extension: sys.modules[extension] for extension in self.extensions}
+        self.unload_extensions(*previous)
+        # The import system caches directory listings, which would hide new files.
+        importlib.invalidate_caches()
+        try:
+            self.load_extensions_from(os.path.join(self.path, "commands"), must_exist=True)
+        except Exception:
+            logger.exception("Failed to reload the command plugins, restoring the previous ones")
+            self.unload_extensions(*self.extensions)
+            sys.modules.update(previous)
+            self.load_extensions(*previous)
+            raise
+        current = set(self.extensions)
+        stats.reloaded = sorted(current & previous.keys())
+        stats.loaded = sorted(current - previous.keys())
+        stats.unloaded = sorted(previous.keys() - current)
+        stats.timings["reload"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if self.command_fingerprint() != self.synced_command_fingerprint():
+            await self.sync_application_commands()
+            stats.synced = True
+        stats.timings["sync"] = time.perf_counter() - start
+
+        logger.info(
+            f"Reloaded {len(current)} command plugins ({len(stats.loaded)} new, {len(stats.unloaded)} removed) in "
+            f"{stats.timings['reload'] * 1000:.1f}ms, "
+            + (f"synced the slash commands in {stats.timings['sync']:.2f}s" if stats.synced else "no sync needed")
+        )
+        return stats
+
+    async def handle_interaction_create_for_application_commands(self, event: hikari.InteractionCreateEvent) -> None:
+        # With the fast startup path, commands can arrive while the database is still opening.
+        if await self.database_ready():
+            await super().handle_interaction_create_for_application_commands(event)
 
     async def on_stopping(self, _: hikari.StoppingEvent) -> None:
         """Called once when the bot is shutting down."""
-        await self.db.close()
+        # With the fast startup path, the database may still be opening.
+        await self.database_ready()
+        await self.member_events.stop()
+        await self.scheduler.stop()
+        if self._outbox is not None:
+            await self._outbox.stop()
+        if self._announcer is not None:
+            await self._announcer.stop()
+        await self.offloader.close()
+        if self._channel_pool is not None:
+            await self._channel_pool.stop()
+        # The database may have failed to open, but still be connected.
+        if self._db is not None:
+            await self._db.close()
+        if self._metrics_server is not None:
+            await self._metrics_server.stop()
+        if self._recorder is not None:
+            self._recorder.close()
+            logger.info(f"Recorded {self._recorder.recorded} events to {self._recorder.path}")
 
-    async def on_member_create(self, event: hikari.MemberCreateEvent) -> None:
-        """On new member join, generate a new surprise day channel."""
+    async def on_command_invocation(self, event: lightbulb.CommandInvocationEvent) -> None:
+        """Start timing a slash command."""
+        self._command_starts[id(event.context)] = time.perf_counter()
 
-        day = await self.db.fetch_or_create_day(event.member)
+    async def on_command_completion(self, event: lightbulb.CommandCompletionEvent) -> None:
+        """Record the duration of a slash command."""
+        if (start := self._command_starts.pop(id(event.context), None)) is not None:
+            metrics.REGISTRY.observe("command_seconds", time.perf_counter() - start, command=event.command.name)
 
-        if not day.channel:  # Do not create a new channel if one already exists (should this even happen?).
-            day.channel = await self.rest.create_guild_text_channel(
+    async def on_command_error(self, event: lightbulb.CommandErrorEvent) -> None:
+        """Record the duration of a slash command that raised."""
+        name = event.context.command.name if event.context.command else "unknown"
+        metrics.REGISTRY.inc("command_errors_total", command=name, error=type(event.exception).__name__)
+        if (start := self._command_starts.pop(id(event.context), None)) is not None:
+            metrics.REGISTRY.observe("command_seconds", time.perf_counter() - start, command=name)
+
+    async def on_member_event(self, event: MemberEvent) -> None:
+        """Queue a member join or leave, coalescing it with pending events of the same member."""
+        if event.guild_id in self._categories:
+            if self._recorder is not None:
+                self._recorder.record_member_event(event)
+            self.member_events.put((event.guild_id, event.user_id), event)
+
+    async def on_interaction_create(self, event: hikari.InteractionCreateEvent) -> None:
+        """Record a slash command, only subscribed while recording."""
+        assert self._recorder is not None
+        if event.interaction.guild_id in self._categories:
+            self._recorder.record_interaction(event.interaction)
+
+    async def on_message_delete(self, event: hikari.GuildMessageDeleteEvent) -> None:
+        """Remember that a surprise day message was deleted, so the next reset recreates it without trying to edit it."""
+        if self.messages.is_valid(event.message_id):
+            self.messages.mark_deleted(event.message_id)
+
+    async def _handle_member_event(self, event: MemberEvent) -> None:
+        if isinstance(event, hikari.MemberCreateEvent):
+            await self.on_member_create(event)
+        else:
+            await self.on_member_delete(event)
+
+    async def on_member_create(self, event: hikari.MemberCreateEvent) -> None:
+        """On new member join, generate a new surprise day channel. If that fails, it is retried through the outbox."""
+        try:
+            await self.provision_member(event.guild_id, event.member)
+        except Exception:
+            logger.exception(f"Failed to generate surprise day for: {event.member.id}, retrying later")
+            await self.outbox.enqueue(
+                "provision",
+                f"provision:{event.guild_id}:{event.member.id}",
                 event.guild_id,
-                event.member.username,
-                category=self.category,
+                {"guild": int(event.guild_id), "user": int(event.member.id)},
+            )
+
+    async def provision_member(self, guild_id: hikari.Snowflake, member: hikari.Member) -> None:
+        """Give a member their surprise day channel and message, and save them to the database."""
+        day = await self.db.fetch_day_by_user(guild_id, member)
+        try:
+            channel_id, message, surprise_day, reset_day = await self._provision_channel(guild_id, member, day)
+        except ProvisionError as e:
+            await self._save_channel(guild_id, member, day, e)
+            raise
+
+        # New members get their row written once, with the channel and message already known.
+        if day is None:
+            self.scheduler.schedule(
+                await self.db.create_day(guild_id, member, message, channel_id, surprise_day, reset_day)
+            )
+        else:
+            day.message, day.channel = message.id, channel_id
+            await self.db.update_day(day)
+
+        logger.info(f"Generated surprise day for: {member.id}")
+
+    async def _save_channel(
+        self, guild_id: hikari.Snowflake, member: hikari.Member, day: t.Optional[SurpriseDay], error: ProvisionError
+    ) -> None:
+        """Save the channel of a member whose message could not be posted, so the retry reuses it."""
+        if day is None:
+            self.scheduler.schedule(
+                await self.db.create_day(guild_id, member, None, error.channel_id, error.surprise_day, error.reset_day)
+            )
+        else:
+            day.message, day.channel = None, error.channel_id
+            await self.db.update_day(day)
+
+    async def _retry_provision(self, payload: t.Mapping[str, t.Any]) -> None:
+        """Outbox handler retrying provision_member()."""
+        guild_id = hikari.Snowflake(payload["guild"])
+        try:
+            member = await self.rest.fetch_member(guild_id, payload["user"])
+        except hikari.NotFoundError:
+            # The member left in the meantime.
+            return
+
+        day = await self.db.fetch_day_by_user(guild_id, member)
+        if day is not None and day.channel is not None and day.message is not None:
+            return
+        await self.provision_member(guild_id, member)
+
+    async def _provision_channel(
+        self, guild_id: hikari.Snowflake, member: hikari.Member, day: t.Optional[SurpriseDay]
+    ) -> t.Tuple[hikari.Snowflake, hikari.Message, datetime.datetime, datetime.datetime]:
+        """Create the surprise day channel of a member and pin their message in it. The database is not touched.
+
+        The channel of an existing day is reused, and its dates are kept.
+
+        Returns
+        -------
+        t.Tuple[hikari.Snowflake, hikari.Message, datetime.datetime, datetime.datetime]
+            The channel ID, the pinned message, the surprise day and the reset day.
+        """
+        if day is not None:
+            surprise_day, reset_day = day.surprise_day, day.reset_day
+        else:
+            surprise_day, reset_day = await self.roll_days(guild_id, member.id)
+
+        # Do not create a new channel if one already exists (should this even happen?).
+        if day is not None and day.channel:
+            channel_id = hikari.Snowflake(day.channel)
+            message = await self._post_surprise_message(channel_id, member, surprise_day)
+            return channel_id, message, surprise_day, reset_day
+
+        if self._channel_pool is not None and (spare := self._channel_pool.claim(guild_id)) is not None:
+            channel_id = hikari.Snowflake(spare)
+            try:
+                # Spare channels are already hidden, they only need the member's name.
+                _, message = await asyncio.gather(
+                    self._rate_limited(self.rest.edit_channel, channel_id, name=member.username),
+                    self._post_surprise_message(channel_id, member, surprise_day),
+                )
+                return channel_id, message, surprise_day, reset_day
+            except hikari.NotFoundError:
+                logger.warning(f"Spare channel {channel_id} was deleted, creating a new one")
+            except Exception as e:
+                raise ProvisionError(channel_id, surprise_day, reset_day) from e
+
+        channel_id = await self._create_channel(guild_id, member.username)
+        try:
+            message = await self._post_surprise_message(channel_id, member, surprise_day)
+        except Exception as e:
+            raise ProvisionError(channel_id, surprise_day, reset_day) from e
+        return channel_id, message, surprise_day, reset_day
+
+    async def _create_channel(self, guild_id: hikari.Snowflake, name: str) -> hikari.Snowflake:
+        """Create a surprise day channel in the category of a guild, hidden from everyone."""
+        return hikari.Snowflake(
+            await self._rate_limited(
+                self.rest.create_guild_text_channel,
+                guild_id,
+                name,
+                category=self._categories[guild_id],
                 permission_overwrites=[
                     hikari.PermissionOverwrite(
-                        id=event.guild_id,
+                        id=guild_id,
                         type=hikari.PermissionOverwriteType.ROLE,
                         deny=hikari.Permissions.VIEW_CHANNEL,
                     )
                 ],
             )
-        channel_id = hikari.Snowflake(day.channel)
+        )
+
+    async def _create_spare_channel(self, guild_id: int) -> int:
+        """Called by the channel pool to create a spare channel."""
+        return await self._create_channel(hikari.Snowflake(guild_id), SPARE_CHANNEL_NAME)
 
-        day.message = await self.rest.create_message(
+    async def _post_surprise_message(
+        self, channel_id: hikari.Snowflake, member: hikari.Member, surprise_day: datetime.datetime
+    ) -> hikari.Message:
+        """Post and pin the message announcing the surprise day of a member."""
+        message = await self._rate_limited(
+            self.rest.create_message,
             channel_id,
-            "{0}'s Surprise Day is on <t:{1}>, <t:{1}:R>".format(
-                event.member.mention, int(day.surprise_day.timestamp())
-            ),
+            "{0}'s Surprise Day is on <t:{1}>, <t:{1}:R>".format(member.mention, int(surprise_day.timestamp())),
         )
+        await self._rate_limited(self.rest.pin_message, channel_id, message.id)
+        self.messages.mark_valid(message.id)
+        return message
 
-        await self.db.update_day(day)
-        await self.rest.pin_message(channel_id, day.message.id)
-        logger.info(f"Generated surprise day for: {event.member.id}")
+    async def announce_surprise_days(self, day_start: int) -> None:
+        """Post a reminder in the channel of every member of the owned guilds whose surprise day starts at day_start."""
+        semaphore = asyncio.Semaphore(self._reset_concurrency)
+
+        async def announce(guild_id: hikari.Snowflake, user: int) -> None:
+            day = await self.db.fetch_day_by_user(guild_id, user)
+            if day is None or day.channel is None:
+                return
+            async with semaphore:
+                await self._rate_limited(
+                    self.rest.create_message, hikari.Snowflake(day.channel), f"Today is <@{user}>'s Surprise Day!"
+                )
+
+        for guild_id in self.owned_guilds:
+            entries = await self.db.fetch_surprise_days(guild_id, day_start, day_start + utils.SECONDS_PER_DAY)
+            results = await asyncio.gather(*(announce(guild_id, user) for _, user in entries), return_exceptions=True)
+            for (_, user), result in zip(entries, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to announce the surprise day of: {user}", exc_info=result)
+            logger.info(f"Announced {len(entries)} surprise days in guild {guild_id}")
+
+    async def load_channel_pool(self) -> None:
+        """Find the spare channels left over from the last run in every owned guild and hand them to the channel pool."""
+        if self._channel_pool is None:
+            return
+
+        for guild_id in self.owned_guilds:
+            spares: t.List[int] = []
+            for channel in await self.rest.fetch_guild_channels(guild_id):
+                # A spare channel may have been claimed right before the bot stopped, without being renamed.
+                if (
+                    channel.parent_id == self._categories[guild_id]
+                    and channel.name == SPARE_CHANNEL_NAME
+                    and await self.db.fetch_day_by_channel(channel.id) is None
+                ):
+                    spares.append(channel.id)
+            self._channel_pool.load(guild_id, spares)
 
     async def on_member_delete(self, event: hikari.MemberDeleteEvent) -> None:
-        """On member leave, clear up the surprise day channel."""
+        """On member leave, clear up the surprise day channel. If that fails, it is retried through the outbox."""
+        try:
+            await self.clean_up_member(event.guild_id, event.user_id)
+        except Exception:
+            logger.exception(f"Failed to clean up surprise day channel for: {event.user_id}, retrying later")
+            await self.outbox.enqueue(
+                "clean_up",
+                f"clean_up:{event.guild_id}:{event.user_id}",
+                event.guild_id,
+                {"guild": int(event.guild_id), "user": int(event.user_id)},
+            )
 
-        day = await self.db.fetch_day_by_user(event.user_id)
+    async def clean_up_member(self, guild_id: hikari.Snowflake, user_id: hikari.Snowflake) -> None:
+        """Delete the surprise day channel of a member who left."""
+        day = await self.db.fetch_day_by_user(guild_id, user_id)
         if day is None or day.channel is None:
             return
-        await self.rest.delete_channel(day.channel)
+        try:
+            await self.rest.delete_channel(day.channel)
+        except hikari.NotFoundError:
+            pass
+        if day.message is not None:
+            self.messages.forget(day.message)
         day.message, day.channel = None, None
 
         await self.db.update_day(day)
-        logger.info(f"Cleaned up surprise day channel for: {event.user_id}")
+        logger.info(f"Cleaned up surprise day channel for: {user_id}")
+
+    async def _retry_clean_up(self, payload: t.Mapping[str, t.Any]) -> None:
+        """Outbox handler retrying clean_up_member()."""
+        guild_id = hikari.Snowflake(payload["guild"])
+        try:
+            await self.rest.fetch_member(guild_id, payload["user"])
+        except hikari.NotFoundError:
+            await self.clean_up_member(guild_id, hikari.Snowflake(payload["user"]))
+        # Otherwise the member joined again in the meantime, and keeps their channel.
+
+    def can_view(self, channel_id: hikari.Snowflake, member_id: hikari.Snowflake) -> t.Optional[bool]:
+        """Check in hikari's cache whether a member was let into a surprise day channel.
+
+        Returns None if the channel is not cached, so the answer is unknown.
+        """
+        channel = self.cache.get_guild_channel(channel_id)
+        if channel is None:
+            return None
+        overwrite = channel.permission_overwrites.get(member_id)
+        return overwrite is not None and hikari.Permissions.VIEW_CHANNEL in overwrite.allow
 
-    @tasks.task(tasks.CronTrigger("0 0 * * *"))
-    async def reset_surprisedays(self):
-        logger.info("Resetting surprise days...")
+    async def grant_access(self, channel_id: hikari.Snowflake, member_id: hikari.Snowflake) -> bool:
+        """Let a member into a surprise day channel, unless the cache shows they already are.
 
-        for day in await self.db.fetch_expired_days(datetime.datetime.now(datetime.timezone.utc)):
-            if day.channel is None:
-                # if channel is None, user probably left, so we clear their entry and continue
-                await self.db.delete_day(day)
+        Returns
+        -------
+        bool
+            False if the member already had access and no request was made.
+        """
+        if self.can_view(channel_id, member_id):
+            metrics.REGISTRY.inc("permission_overwrites_total", action="grant", result="skipped")
+            return False
+        await self._rate_limited(
+            self.rest.edit_permission_overwrites,
+            channel_id,
+            member_id,
+            target_type=hikari.PermissionOverwriteType.MEMBER,
+            allow=hikari.Permissions.VIEW_CHANNEL,
+        )
+        metrics.REGISTRY.inc("permission_overwrites_total", action="grant", result="applied")
+        return True
+
+    async def revoke_access(self, channel_id: hikari.Snowflake, member_id: hikari.Snowflake) -> bool:
+        """Remove a member from a surprise day channel, unless the cache shows they are not in it.
+
+        Returns
+        -------
+        bool
+            False if the member had no access and no request was made.
+        """
+        if self.can_view(channel_id, member_id) is False:
+            metrics.REGISTRY.inc("permission_overwrites_total", action="revoke", result="skipped")
+            return False
+        await self._rate_limited(self.rest.delete_permission_overwrite, channel_id, member_id)
+        metrics.REGISTRY.inc("permission_overwrites_total", action="revoke", result="applied")
+        return True
+
+    async def joined_channels(
+        self, guild_id: hikari.Snowflake, member_id: hikari.Snowflake
+    ) -> t.List[hikari.Snowflake]:
+        """Get the surprise day channels of a guild a member was let into, from the cache if it has the guild's channels."""
+        category = self._categories[guild_id]
+        channels: t.Iterable[hikari.GuildChannel] = self.cache.get_guild_channels_view_for_guild(guild_id).values()
+        if not channels:
+            channels = await self.rest.fetch_guild_channels(guild_id)
+
+        joined: t.List[hikari.Snowflake] = []
+        for channel in channels:
+            if channel.parent_id != category:
                 continue
+            overwrite = channel.permission_overwrites.get(member_id)
+            if overwrite is not None and hikari.Permissions.VIEW_CHANNEL in overwrite.allow:
+                joined.append(channel.id)
+        return joined
+
+    async def reconcile(self) -> t.Sequence[ReconcileStats]:
+        """Reconcile every guild this process owns, one after another.
+
+        Returns
+        -------
+        Sequence[ReconcileStats]
+            Statistics about the reconciliation of each guild.
+        """
+        results: t.List[ReconcileStats] = []
+        for guild_id in sorted(self.owned_guilds):
+            try:
+                results.append(await self.reconcile_guild(guild_id))
+            except Exception:
+                logger.exception(f"Failed to reconcile the database with guild {guild_id}")
+        return results
+
+    async def reconcile_guild(self, guild_id: hikari.Snowflake) -> ReconcileStats:
+        """Bring the database back in sync with a guild, after members joined or left while the bot was down.
+
+        Members without a surprise day channel get one, and the channels of members who left are deleted.
+
+        Returns
+        -------
+        ReconcileStats
+            Statistics about the reconciliation, including the duration of each phase.
+        """
+        stats = ReconcileStats()
+        category = self._categories[guild_id]
+
+        start = time.perf_counter()
+        members, channels, columns = await asyncio.gather(
+            self.rest.fetch_members(guild_id).collect(list),
+            self.rest.fetch_guild_channels(guild_id),
+            self.db.fetch_all_columns((guild_id,)),
+        )
+        stats.members = len(members)
+        stats.timings["fetch"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        channel_ids = array.array("q", (channel.id for channel in channels if channel.parent_id == category))
+        departed_days, missing, lost_members, lost_days = await self.offloader.run(
+            bulk.diff_members,
+            columns.users,
+            columns.channels,
+            array.array("q", (member.id for member in members)),
+            channel_ids,
+        )
+
+        # Only the rows that need work are turned into SurpriseDay objects.
+        departed = [columns[index] for index in departed_days]
+        unprovisioned: t.List[t.Tuple[hikari.Member, t.Optional[SurpriseDay]]] = [
+            (members[position], None) for position in missing
+        ]
+        for position, index in zip(lost_members, lost_days):
+            day = columns[index]
+            # The channel was deleted by hand, a new one is created.
+            day.channel = None
+            unprovisioned.append((members[position], day))
+        stats.timings["diff"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self._reset_concurrency)
+
+        existing_channels = set(channel_ids)
 
-            day.surprise_day, day.reset_day = utils.generate_random_days()
+        async def clean_up(day: SurpriseDay) -> None:
+            assert day.channel is not None
+            async with semaphore:
+                if day.channel in existing_channels:
+                    await self._rate_limited(self.rest.delete_channel, day.channel)
+            day.message, day.channel = None, None
+
+        results = await asyncio.gather(*(clean_up(day) for day in departed), return_exceptions=True)
+        cleaned = [day for day, result in zip(departed, results) if not isinstance(result, BaseException)]
+        await self.db.update_days(cleaned)
+        stats.cleaned = len(cleaned)
+        stats.failed += len(departed) - len(cleaned)
+        stats.timings["clean_up"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+
+        async def provision(
+            member: hikari.Member, day: t.Optional[SurpriseDay]
+        ) -> t.Tuple[hikari.Snowflake, hikari.Message, datetime.datetime, datetime.datetime]:
+            async with semaphore:
+                return await self._provision_channel(guild_id, member, day)
+
+        for batch in utils.chunked(unprovisioned, self._reset_batch_size):
+            results = await asyncio.gather(*(provision(member, day) for member, day in batch), return_exceptions=True)
+
+            created: t.List[NewDay] = []
+            updated: t.List[SurpriseDay] = []
+            for (member, day), result in zip(batch, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"Failed to provision surprise day for: {member.id}, retrying later", exc_info=result)
+                    if isinstance(result, ProvisionError):
+                        await self._save_channel(guild_id, member, day, result)
+                    await self.outbox.enqueue(
+                        "provision",
+                        f"provision:{guild_id}:{member.id}",
+                        guild_id,
+                        {"guild": int(guild_id), "user": int(member.id)},
+                    )
+                    stats.failed += 1
+                    continue
 
-            if day.message is not None:
+                channel_id, message, surprise_day, reset_day = result
+                if day is None:
+                    created.append((guild_id, member, message, channel_id, surprise_day, reset_day))
+                else:
+                    day.message, day.channel = message.id, channel_id
+                    updated.append(day)
+
+            async with self.db.transaction():
+                for day in await self.db.create_days(created):
+                    self.scheduler.schedule(day)
+                await self.db.update_days(updated)
+            stats.provisioned += len(created) + len(updated)
+        stats.timings["provision"] = time.perf_counter() - start
+
+        logger.info(
+            f"Reconciled {stats.members} members of guild {guild_id} in {stats.elapsed:.2f}s: {stats.provisioned} provisioned, "
+            f"{stats.cleaned} cleaned up, {stats.failed} failed "
+            f"({', '.join(f'{phase} {elapsed:.2f}s' for phase, elapsed in stats.timings.items())})"
+        )
+        return stats
+
+    async def reset_expired_days(self) -> ResetStats:
+        """Generate new surprise days for every expired entry of the owned guilds at once.
+
+        The scheduler normally resets each day on its own deadline, this is a full sweep.
+
+        Returns
+        -------
+        ResetStats
+            Statistics about the run.
+        """
+        return await self.reset_days(
+            await self.db.fetch_expired_days(datetime.datetime.now(datetime.timezone.utc), self.owned_guilds)
+        )
+
+    async def _reset_due(self, ids: t.Sequence[int]) -> None:
+        """Called by the scheduler with the IDs of the days whose deadline has passed."""
+        now = time.time()
+        # A day may have been reset by other means since it was scheduled.
+        await self.reset_days([day for day in await self.db.fetch_days(ids) if day.reset_timestamp <= now])
+
+    async def reset_days(self, days: t.Sequence[SurpriseDay]) -> ResetStats:
+        """Generate new surprise days for the passed expired days.
+
+        Channels are handled concurrently, at most reset_concurrency at a time, and the
+        database is updated once per batch of reset_batch_size days.
+
+        Parameters
+        ----------
+        days: t.Sequence[SurpriseDay]
+            The days to reset.
+
+        Returns
+        -------
+        ResetStats
+            Statistics about the run.
+        """
+        if not days:
+            return ResetStats()
+
+        logger.info(f"Resetting {len(days)} surprise days...")
+        stats = ResetStats()
+        start = time.perf_counter()
+
+        # if channel is None, user probably left, so we clear their entry
+        stale = [day for day in days if day.channel is None]
+        await self.db.delete_days(stale)
+        for day in stale:
+            self.scheduler.unschedule(day)
+        stats.deleted = len(stale)
+
+        semaphore = asyncio.Semaphore(self._reset_concurrency)
+        batches = list(utils.chunked((day for day in days if day.channel is not None), self._reset_batch_size))
+        if self._balancer is not None:
+            rerolls = self._balanced_rerolls(batches)
+        else:
+            # Re-roll each batch at once, the next batches are re-rolled while the current one talks to Discord.
+            rerolls = self.offloader.map(bulk.reroll, [(len(batch), time.time()) for batch in batches])
+        async with contextlib.aclosing(rerolls):
+            for batch in batches:
+                surprise_days, reset_days = await anext(rerolls)
+                await self._reset_batch(batch, surprise_days, reset_days, semaphore, stats)
+
+        stats.elapsed = time.perf_counter() - start
+        self._last_reset = stats
+        metrics.REGISTRY.inc("reset_rows_total", stats.processed, result="processed")
+        metrics.REGISTRY.inc("reset_rows_total", stats.deleted, result="deleted")
+        metrics.REGISTRY.inc("reset_rows_total", stats.failed, result="failed")
+        logger.info(
+            f"Reset {stats.processed} surprise days ({stats.deleted} deleted, {stats.failed} failed) "
+            f"in {stats.elapsed:.2f}s, {stats.rows_per_second:.1f} rows/s"
+        )
+        return stats
+
+    async def _fetch_occupancy(self, guild: int, start_day: int, end_day: int) -> Occupancy:
+        """Fetch the occupancy of a guild between two days since the UNIX epoch, keyed by days since the epoch."""
+        occupancy = await self.db.fetch_occupancy(
+            guild, start_day * utils.SECONDS_PER_DAY, end_day * utils.SECONDS_PER_DAY
+        )
+        return {timestamp // utils.SECONDS_PER_DAY: days for timestamp, days in occupancy.items()}
+
+    async def roll_days(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], user: hikari.SnowflakeishOr[hikari.PartialUser]
+    ) -> t.Tuple[datetime.datetime, datetime.datetime]:
+        """Pick a new surprise day and reset day for a member, balanced over the calendar if enabled."""
+        if self._balancer is None:
+            return utils.generate_random_days()
+
+        start_day, end_day, _ = utils.surprise_day_range()
+        occupancy = await self._fetch_occupancy(int(guild), start_day, end_day)
+        surprise_day, reset_day = self._balancer.pick(occupancy, int(guild), int(user))
+        return utils.from_epoch_day(surprise_day), utils.from_epoch_day(reset_day)
+
+    async def _balanced_rerolls(
+        self, batches: t.Sequence[t.Sequence[SurpriseDay]]
+    ) -> t.AsyncIterator[t.Tuple[t.Sequence[int], t.Sequence[int]]]:
+        """Re-roll reset batches with the balancer, yielding the new days of each batch in turn.
+
+        Every batch counts the days picked for the batches before it, so the days of all batches are picked at once
+        from a single read of the occupancy.
+        """
+        assert self._balancer is not None
+        now = time.time()
+        start_day, end_day, _ = utils.surprise_day_range(datetime.datetime.fromtimestamp(now, datetime.timezone.utc))
+        guilds = array.array("q", (day.guild for batch in batches for day in batch))
+        users = array.array("q", (day.user for batch in batches for day in batch))
+        occupancy = {guild: await self._fetch_occupancy(guild, start_day, end_day) for guild in set(guilds)}
+        surprise_days, reset_days = await self.offloader.run(
+            bulk.balance, self._balancer, occupancy, guilds, users, now
+        )
+
+        offset = 0
+        for batch in batches:
+            yield surprise_days[offset : offset + len(batch)], reset_days[offset : offset + len(batch)]
+            offset += len(batch)
+
+    async def _reset_batch(
+        self,
+        batch: t.Sequence[SurpriseDay],
+        surprise_days: t.Sequence[int],
+        reset_days: t.Sequence[int],
+        semaphore: asyncio.Semaphore,
+        stats: ResetStats,
+    ) -> None:
+        """Reset a batch of days to the passed epoch days, then update them in the database at once."""
+        results = await asyncio.gather(
+            *(
+                self._reset_day(day, semaphore, utils.from_epoch_day(surprise_day), utils.from_epoch_day(reset_day))
+                for day, surprise_day, reset_day in zip(batch, surprise_days, reset_days)
+            ),
+            return_exceptions=True,
+        )
+
+        done: t.List[SurpriseDay] = []
+        for day, result in zip(batch, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to reset surprise day for: {day.user}, retrying later", exc_info=result)
+                await self.outbox.enqueue(
+                    "reset",
+                    f"reset:{day.id}:{day.reset_timestamp}",
+                    day.guild,
+                    {"id": day.id, "reset_timestamp": day.reset_timestamp},
+                )
+                stats.failed += 1
+            else:
+                done.append(day)
+
+        await self.db.update_days(done)
+        for day in done:
+            self.scheduler.schedule(day)
+        stats.processed += len(done)
+
+    async def _retry_reset(self, payload: t.Mapping[str, t.Any]) -> None:
+        """Outbox handler retrying the reset of a single day."""
+        days = await self.db.fetch_days((payload["id"],))
+        # The day may have been deleted or reset by other means since.
+        if not days or days[0].reset_timestamp != payload["reset_timestamp"]:
+            return
+
+        day = days[0]
+        if day.channel is None:
+            await self.db.delete_day(day)
+            self.scheduler.unschedule(day)
+            return
+
+        surprise_day, reset_day = await self.roll_days(day.guild, day.user)
+        await self._reset_day(day, asyncio.Semaphore(1), surprise_day, reset_day)
+        await self.db.update_day(day)
+        self.scheduler.schedule(day)
+
+    async def _reset_day(
+        self,
+        day: SurpriseDay,
+        semaphore: asyncio.Semaphore,
+        surprise_day: datetime.datetime,
+        reset_day: datetime.datetime,
+    ) -> None:
+        """Update the pinned message of a single expired day for the new dates. The database is not touched.
+
+        The message is edited in place, and only recreated if it is gone. In recreate mode, or if the message is
+        known to be deleted, the old message is replaced without trying to edit it.
+        """
+        assert day.channel is not None
+        channel_id = hikari.Snowflake(day.channel)
+        content = "<@{0}>'s Surprise Day is on <t:{1}>, <t:{1}:R>".format(
+            hikari.Snowflake(day.user), int(surprise_day.timestamp())
+        )
+
+        async with semaphore:
+            message_id = day.message
+            if message_id is not None and self._reset_edits_messages and not self.messages.is_deleted(message_id):
+                try:
+                    await self._rate_limited(self.rest.edit_message, channel_id, hikari.Snowflake(message_id), content)
+                except hikari.NotFoundError:
+                    self.messages.mark_deleted(message_id)
+                else:
+                    self.messages.mark_valid(message_id)
+                    metrics.REGISTRY.inc("reset_messages_total", action="edited")
+                    day.surprise_day, day.reset_day = surprise_day, reset_day
+                    return
+
+            if message_id is not None and not self.messages.is_deleted(message_id):
                 try:
-                    await self.rest.delete_message(hikari.Snowflake(day.channel), hikari.Snowflake(day.message))
+                    await self._rate_limited(self.rest.delete_message, channel_id, hikari.Snowflake(message_id))
                 except hikari.NotFoundError:
                     pass
 
-            day.message = await self.rest.create_message(
-                day.channel,
-                "<@{0}>'s Surprise Day is on <t:{1}>, <t:{1}:R>".format(
-                    hikari.Snowflake(day.user), int(day.surprise_day.timestamp())
-                ),
-            )
-            await self.rest.pin_message(day.message.channel_id, day.message)
+            message = await self._rate_limited(self.rest.create_message, channel_id, content)
+            await self._rate_limited(self.rest.pin_message, channel_id, message)
+            if message_id is not None:
+                self.messages.forget(message_id)
+            self.messages.mark_valid(message.id)
+            metrics.REGISTRY.inc("reset_messages_total", action="recreated")
 
-            await self.db.update_day(day)
+            day.message, day.surprise_day, day.reset_day = message.id, surprise_day, reset_day
+
+    async def _rate_limited(
+        self, func: t.Callable[..., t.Awaitable[T]], *args: t.Any, retries: int = 3, **kwargs: t.Any
+    ) -> T:
+        """Call a REST method, waiting out rate limits that are too long for hikari to handle itself.
+
+        hikari already queues requests per route bucket and respects the global rate limit, it only
+        gives up when the required wait exceeds its max_rate_limit.
+        """
+        for _ in range(retries):
+            try:
+                return await func(*args, **kwargs)
+            except hikari.RateLimitTooLongError as e:
+                metrics.REGISTRY.inc("rate_limit_retries_total", route=str(e.route))
+                logger.warning(f"Rate limited on {e.route}, retrying in {e.retry_after:.1f}s")
+                await asyncio.sleep(e.retry_after)
+        return await func(*args, **kwargs)
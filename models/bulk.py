@@ -0,0 +1,77 @@
+"""CPU-bound steps of the bulk jobs, run in worker processes by the Offloader.
+
+Everything here is a pure function of arrays and numbers, which pickle cheaply. Spawned worker processes import this
+module and the main module of the bot process, so this module only imports the standard library and utils, and
+main.py only imports hikari and the bot when it is run as a script.
+"""
+from __future__ import annotations
+
+import array
+import datetime
+import typing as t
+
+import utils
+from models.balancer import DayBalancer
+from models.balancer import Occupancy
+
+MemberDiff = t.Tuple["array.array[int]", "array.array[int]", "array.array[int]", "array.array[int]"]
+
+
+def diff_members(
+    users: array.array[int],
+    channels: array.array[int],
+    member_ids: array.array[int],
+    channel_ids: array.array[int],
+) -> MemberDiff:
+    """Compare the days of a guild, in columnar form, with its current members and surprise day channels.
+
+    Parameters
+    ----------
+    users: array.array[int]
+        The user of every day.
+    channels: array.array[int]
+        The channel of every day, 0 if it has none.
+    member_ids: array.array[int]
+        The IDs of the members of the guild.
+    channel_ids: array.array[int]
+        The IDs of the channels in the surprise day category.
+
+    Returns
+    -------
+    MemberDiff
+        The indices of the days whose member left but which still have a channel, the positions in member_ids of
+        the members without a day, and the positions of the members whose channel is gone together with the
+        indices of their days.
+    """
+    members = set(member_ids)
+    existing = set(channel_ids)
+    index_by_user = {user: index for index, user in enumerate(users)}
+
+    departed = array.array("q", (index for index, user in enumerate(users) if channels[index] and user not in members))
+    missing = array.array("q")
+    lost_members = array.array("q")
+    lost_days = array.array("q")
+    for position, member in enumerate(member_ids):
+        index = index_by_user.get(member)
+        if index is None:
+            missing.append(position)
+        elif channels[index] not in existing:
+            lost_members.append(position)
+            lost_days.append(index)
+    return departed, missing, lost_members, lost_days
+
+
+def reroll(count: int, now: float) -> t.Tuple[array.array[int], array.array[int]]:
+    """Generate count new surprise days and reset days from a UNIX timestamp, as days since the UNIX epoch."""
+    return utils.generate_random_day_numbers(count, datetime.datetime.fromtimestamp(now, datetime.timezone.utc))
+
+
+def balance(
+    balancer: DayBalancer,
+    occupancy: t.Mapping[int, Occupancy],
+    guilds: array.array[int],
+    users: array.array[int],
+    now: float,
+) -> t.Tuple[array.array[int], array.array[int]]:
+    """Pick balanced surprise days and reset days for members from a UNIX timestamp, see DayBalancer.pick_many()."""
+    return balancer.pick_many(occupancy, guilds, users, datetime.datetime.fromtimestamp(now, datetime.timezone.utc))
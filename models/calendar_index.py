@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import bisect
+import typing as t
+
+from models.surprise_day import SurpriseDay
+
+Entry = t.Tuple[int, int]
+"""A (surprise_day timestamp, user) pair."""
+
+
+class CalendarIndex:
+    """The surprise days of every guild, sorted by date, to answer range queries without scanning the table.
+
+    Each guild has a sorted list of (surprise_day, user) pairs, so a range is found with two binary searches.
+    The storage keeps it up to date on every write, like the DayCache.
+    """
+
+    __slots__: t.Sequence[str] = ("_guilds", "_timestamps", "_is_complete", "_generation")
+
+    def __init__(self) -> None:
+        self._guilds: t.Dict[int, t.List[Entry]] = {}
+        self._timestamps: t.Dict[t.Tuple[int, int], int] = {}
+        self._is_complete = False
+        self._generation = 0
+
+    @property
+    def is_complete(self) -> bool:
+        """True if the index holds every day of the database, so it can answer queries."""
+        return self._is_complete
+
+    @property
+    def generation(self) -> int:
+        """A counter bumped by every write to the index, to be taken before reading the days to fill() it with."""
+        return self._generation
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def fill(self, days: t.Iterable[SurpriseDay], generation: t.Optional[int] = None) -> None:
+        """Replace the contents of the index with all days of the database.
+
+        If the generation taken before reading the days is passed and the index was written to since, the days may
+        be outdated and the index is left as it is.
+        """
+        if generation is not None and generation != self._generation:
+            return
+        self.clear()
+        for day in days:
+            self._guilds.setdefault(day.guild, []).append((day.surprise_timestamp, day.user))
+            self._timestamps[(day.guild, day.user)] = day.surprise_timestamp
+        for entries in self._guilds.values():
+            entries.sort()
+        self._is_complete = True
+
+    def clear(self) -> None:
+        """Remove every day from the index. It can't answer queries until it is filled again."""
+        self._generation += 1
+        self._guilds.clear()
+        self._timestamps.clear()
+        self._is_complete = False
+
+    def put(self, day: SurpriseDay) -> None:
+        """Add a day to the index, or move it to its new date."""
+        self._generation += 1
+        key = (day.guild, day.user)
+        if self._timestamps.get(key) == day.surprise_timestamp:
+            return
+        self.discard(*key)
+        bisect.insort(self._guilds.setdefault(day.guild, []), (day.surprise_timestamp, day.user))
+        self._timestamps[key] = day.surprise_timestamp
+
+    def discard(self, guild: int, user: int) -> None:
+        """Remove the day of a user in a guild from the index, if it is there."""
+        self._generation += 1
+        if (timestamp := self._timestamps.pop((guild, user), None)) is None:
+            return
+        entries = self._guilds[guild]
+        index = bisect.bisect_left(entries, (timestamp, user))
+        del entries[index]
+
+    def between(self, guild: int, start: int, end: int, limit: t.Optional[int] = None) -> t.List[Entry]:
+        """Get the days of a guild whose surprise day is in [start, end), earliest first.
+
+        Parameters
+        ----------
+        guild: int
+            The guild to look in.
+        start: int
+            The UNIX timestamp to start at, inclusive.
+        end: int
+            The UNIX timestamp to stop at, exclusive.
+        limit: t.Optional[int]
+            The maximum amount of days to return. Defaults to every day in the range.
+
+        Returns
+        -------
+        List[Entry]
+            The (surprise_day, user) pairs in the range.
+        """
+        entries = self._guilds.get(guild, [])
+        low = bisect.bisect_left(entries, (start,))
+        high = bisect.bisect_left(entries, (end,), lo=low)
+        if limit is not None:
+            high = min(high, low + limit)
+        return entries[low:high]
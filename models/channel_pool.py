@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import typing as t
+
+logger = logging.getLogger(__name__)
+
+CreateCallback = t.Callable[[int], t.Awaitable[int]]
+
+SPARE_CHANNEL_NAME = "spare-surprise-day"
+"""The name of pre-created channels that were not claimed by a member yet."""
+
+
+class ChannelPool:
+    """Keeps a number of hidden, pre-created surprise day channels per guild, so joining members don't wait on a
+    channel being created.
+
+    Claimed channels are replaced in the background, at most rate channels per second, so bursts of joins don't
+    compete with each other for the channel creation rate limit.
+    """
+
+    __slots__: t.Sequence[str] = ("_create", "_size", "_rate", "_spares", "_wakeup", "_task")
+
+    def __init__(self, create: CreateCallback, size: int, rate: float = 0.5) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self._create = create
+        self._size = size
+        self._rate = rate
+        self._spares: t.Dict[int, t.Deque[int]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: t.Optional[asyncio.Task[None]] = None
+
+    @property
+    def size(self) -> int:
+        """The amount of spare channels kept per guild."""
+        return self._size
+
+    @property
+    def is_running(self) -> bool:
+        """True if the pool is being refilled in the background."""
+        return self._task is not None and not self._task.done()
+
+    def __len__(self) -> int:
+        return sum(len(spares) for spares in self._spares.values())
+
+    def spares(self, guild: int) -> int:
+        """The amount of spare channels of a guild."""
+        return len(self._spares.get(guild, ()))
+
+    def load(self, guild: int, channels: t.Iterable[int]) -> None:
+        """Start keeping spare channels for a guild, with the spare channels it already has."""
+        self._spares[guild] = collections.deque(channels)
+        self._wakeup.set()
+
+    def claim(self, guild: int) -> t.Optional[int]:
+        """Take a spare channel of a guild, or None if it has none left."""
+        if not (spares := self._spares.get(guild)):
+            return None
+        self._wakeup.set()
+        return spares.popleft()
+
+    async def refill(self) -> int:
+        """Create spare channels until every guild has size of them.
+
+        Returns
+        -------
+        int
+            The amount of channels that were created.
+        """
+        created = 0
+        for guild, spares in list(self._spares.items()):
+            while len(spares) < self._size:
+                try:
+                    spares.append(await self._create(guild))
+                except Exception:
+                    logger.exception(f"Failed to create a spare channel in guild {guild}")
+                    break
+                created += 1
+                await asyncio.sleep(1 / self._rate)
+        return created
+
+    def start(self) -> None:
+        """Start refilling the pool in the background."""
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop refilling the pool. Spare channels are kept."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            await self.refill()
+            # Failed creations are retried after a while, even if no channel is claimed. asyncio.wait is used over
+            # wait_for, which swallows a stop() that races a claim and would keep the pool running.
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait((waiter,), timeout=60.0)
+            finally:
+                waiter.cancel()
@@ -1,26 +1,137 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import contextvars
 import datetime
+import json
 import typing as t
 
 import aiosqlite
 import hikari
 
 import utils
+from models import metrics
+from models import migrations
+from models.calendar_index import CalendarIndex
+from models.calendar_index import Entry
+from models.day_cache import DayCache
+from models.outbox_entry import COLUMNS as OUTBOX_COLUMNS
+from models.outbox_entry import OutboxEntry
+from models.read_pool import ReadPool
+from models.read_pool import apply_pragmas
+from models.storage import NewDay
 from models.surprise_day import SurpriseDay
+from models.surprise_day import SurpriseDayColumns
+
+_transaction: contextvars.ContextVar[t.Optional[Database]] = contextvars.ContextVar("_transaction", default=None)
+
+DEFAULT_PRAGMAS: t.Mapping[str, str] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",
+    "temp_store": "MEMORY",
+    "cache_size": "-16000",
+    "mmap_size": "67108864",
+}
+"""The pragmas Database.connect() runs on every connection. WAL lets readers run while a write is in progress."""
+
+_INSERT_CHUNK_SIZE = 999 // 6
+"""The amount of days create_days() inserts per statement. SQLite before 3.32 allows at most 999 parameters."""
+
+
+def _guild_filter(guilds: t.Optional[t.Collection[int]]) -> t.Tuple[str, t.Sequence[int]]:
+    """Build an SQL condition, to be appended to a WHERE clause, that restricts a query to some guilds."""
+    if guilds is None:
+        return "", ()
+    return f""" AND guild IN ({",".join("?" * len(guilds))})""", tuple(guilds)
 
 
 class Database:
-    __slots__: t.Sequence[str] = ("_connection", "_is_closed")
+    """The default Storage, backed by an SQLite file."""
+
+    __slots__: t.Sequence[str] = ("_connection", "_readers", "_is_closed", "_write_lock", "_cache", "_calendar")
 
-    def __init__(self, connection: aiosqlite.Connection) -> None:
+    def __init__(
+        self,
+        connection: aiosqlite.Connection,
+        cache_size: t.Optional[int] = None,
+        readers: t.Optional[ReadPool] = None,
+        calendar: bool = False,
+    ) -> None:
         self._connection = connection
+        self._readers = readers
         self._is_closed = False
+        self._write_lock = asyncio.Lock()
+        self._cache: t.Optional[DayCache] = DayCache(cache_size) if cache_size else None
+        self._calendar: t.Optional[CalendarIndex] = CalendarIndex() if calendar else None
+
+    @classmethod
+    async def connect(
+        cls,
+        database: str,
+        cache_size: t.Optional[int] = None,
+        read_pool_size: int = 4,
+        pragmas: t.Optional[t.Mapping[str, str]] = None,
+        calendar: bool = False,
+    ) -> Database:
+        """Open a writer connection and a pool of read-only connections to a database file.
+
+        Parameters
+        ----------
+        database: str
+            The path of the database file, created if it does not exist.
+        cache_size: t.Optional[int]
+            The amount of days to cache, caching is disabled if None.
+        read_pool_size: int
+            The amount of read-only connections. Reads go through the writer connection if 0.
+        pragmas: t.Optional[t.Mapping[str, str]]
+            PRAGMA statements to run on every connection, by name. Defaults to DEFAULT_PRAGMAS.
+        calendar: bool
+            Whether to keep a CalendarIndex of the surprise days in memory.
+
+        Returns
+        -------
+        Database
+            The connected database.
+        """
+        pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        connection = await aiosqlite.connect(database)
+        try:
+            await apply_pragmas(connection, pragmas)
+            # Read-only connections can't change the journal mode, the writer already did.
+            readers = (
+                await ReadPool.open(
+                    database, read_pool_size, {name: value for name, value in pragmas.items() if name != "journal_mode"}
+                )
+                if read_pool_size > 0
+                else None
+            )
+        except BaseException:
+            await connection.close()
+            raise
+        return cls(connection, cache_size=cache_size, readers=readers, calendar=calendar)
 
     @property
     def connection(self) -> aiosqlite.Connection:
+        """The connection every write goes through."""
         return self._connection
 
+    @property
+    def readers(self) -> t.Optional[ReadPool]:
+        """The pool of read-only connections, or None if reads go through the writer connection."""
+        return self._readers
+
+    @property
+    def cache(self) -> t.Optional[DayCache]:
+        """The write-through cache of days, or None if caching is disabled."""
+        return self._cache
+
+    @property
+    def calendar(self) -> t.Optional[CalendarIndex]:
+        """The index of days sorted by surprise day, or None if it is disabled."""
+        return self._calendar
+
     @property
     def is_closed(self) -> bool:
         """True if the database connection was closed."""
@@ -28,11 +139,65 @@ class Database:
 
     async def close(self) -> None:
         """Close the database connection."""
+        if self._readers is not None:
+            await self._readers.close()
         await self.connection.close()
         self._is_closed = True
 
+    def _cache_read(self, day: SurpriseDay, generation: int) -> None:
+        # A read that started before a write may return the day as it was before it, see DayCache.put_read().
+        if self._cache is not None:
+            self._cache.put_read(day, generation)
+
+    @contextlib.asynccontextmanager
+    async def _reading(self) -> t.AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection to read from.
+
+        Inside a transaction this is the writer connection, so the transaction sees its own uncommitted writes.
+        """
+        if self._readers is None or _transaction.get() is self:
+            yield self.connection
+            return
+
+        async with self._readers.acquire() as connection:
+            yield connection
+
+    @contextlib.asynccontextmanager
+    async def transaction(self) -> t.AsyncIterator[Database]:
+        """Group every write made inside the block into a single commit.
+
+        Writes made by other tasks wait until the transaction is finished.
+        Transactions may be nested, only the outermost one commits.
+        If the block raises, all of its writes are rolled back.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        if _transaction.get() is self:
+            yield self
+            return
+
+        async with self._write_lock:
+            token = _transaction.set(self)
+            try:
+                yield self
+            except BaseException:
+                await self.connection.rollback()
+                if self._cache is not None:
+                    # The cache was already updated by the rolled back writes.
+                    self._cache.clear()
+                if self._calendar is not None:
+                    self._calendar.clear()
+                raise
+            else:
+                await self.connection.commit()
+            finally:
+                _transaction.reset(token)
+
+    @metrics.timed("database_seconds")
     async def create_day(
         self,
+        guild: hikari.SnowflakeishOr[hikari.PartialGuild],
         user: hikari.SnowflakeishOr[hikari.PartialUser],
         message: t.Optional[hikari.SnowflakeishOr[hikari.PartialMessage]],
         channel: t.Optional[hikari.SnowflakeishOr[hikari.TextableChannel]],
@@ -45,6 +210,8 @@ class Database:
 
         Parameters
         ----------
+        guild: hikari.SnowflakeishOr[hikari.PartialGuild]
+            The guild the user is a member of.
         user: hikari.SnowflakeishOr[hikari.PartialUser]
             The user to create the day for.
         message: t.Optional[hikari.SnowflakeishOr[hikari.PartialMessage]]
@@ -64,21 +231,89 @@ class Database:
         if self.is_closed:
             raise hikari.ComponentStateConflictError("The database connection is closed.")
 
-        cur = await self.connection.cursor()
-        res = await cur.execute(
-            "INSERT INTO surprise_days(discord, message, channel, surprise_day, reset_day) VALUES (?,?,?,?,?)",
-            (
-                str(hikari.Snowflake(user)),
-                str(hikari.Snowflake(message)) if message is not None else None,
-                str(hikari.Snowflake(channel)) if channel is not None else None,
-                int(surprise_day.timestamp()),
-                int(reset_day.timestamp()),
-            ),
+        row = (
+            int(user),
+            int(message) if message is not None else None,
+            int(channel) if channel is not None else None,
+            int(surprise_day.timestamp()),
+            int(reset_day.timestamp()),
+            int(guild),
         )
-        await self.connection.commit()
+        async with self.transaction():
+            res = await self.connection.execute(
+                "INSERT INTO surprise_days(discord, message, channel, surprise_day, reset_day, guild)"
+                " VALUES (?,?,?,?,?,?)",
+                row,
+            )
+
+        assert res.lastrowid is not None
+        day = SurpriseDay(res.lastrowid, *row)
+        if self._cache is not None:
+            self._cache.put(day)
+        if self._calendar is not None:
+            self._calendar.put(day)
+        return day
+
+    @metrics.timed("database_seconds")
+    async def create_days(self, days: t.Iterable[NewDay]) -> t.Sequence[SurpriseDay]:
+        """Create multiple surprise day entries in a single transaction. If one of them fails, none are created.
+
+        The days are inserted with one multi-row statement per _INSERT_CHUNK_SIZE days.
+
+        Parameters
+        ----------
+        days: t.Iterable[NewDay]
+            The days to create, each one as the arguments of create_day().
+
+        Returns
+        -------
+        Sequence[SurpriseDay]
+            The newly created SurpriseDays, in the same order.
 
-        return SurpriseDay(res.lastrowid, user, message, channel, surprise_day, reset_day)
+        Raises
+        ------
+        sqlite3.IntegrityError
+            If a user already has a day in the guild, or appears twice in days.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
 
+        rows = [
+            (
+                int(user),
+                int(message) if message is not None else None,
+                int(channel) if channel is not None else None,
+                int(surprise_day.timestamp()),
+                int(reset_day.timestamp()),
+                int(guild),
+            )
+            for guild, user, message, channel, surprise_day, reset_day in days
+        ]
+        if not rows:
+            return []
+
+        ids: t.Dict[t.Tuple[int, int], int] = {}
+        async with self.transaction():
+            for chunk in utils.chunked(rows, _INSERT_CHUNK_SIZE):
+                res = await self.connection.execute(
+                    "INSERT INTO surprise_days(discord, message, channel, surprise_day, reset_day, guild) VALUES "
+                    + ",".join(["(?,?,?,?,?,?)"] * len(chunk))
+                    + " RETURNING id, guild, discord;",
+                    [value for row in chunk for value in row],
+                )
+                ids.update(((guild, user), id) for id, guild, user in await res.fetchall())
+
+        # RETURNING does not guarantee the order of the input rows.
+        created = [SurpriseDay(ids[(row[5], row[0])], *row) for row in rows]
+        if self._cache is not None:
+            for day in created:
+                self._cache.put(day)
+        if self._calendar is not None:
+            for day in created:
+                self._calendar.put(day)
+        return created
+
+    @metrics.timed("database_seconds")
     async def update_day(
         self,
         day: SurpriseDay,
@@ -93,13 +328,52 @@ class Database:
         if self.is_closed:
             raise hikari.ComponentStateConflictError("The database connection is closed.")
 
-        cur = await self.connection.cursor()
-        await cur.execute(
-            "UPDATE surprise_days SET discord = ?, message = ?, channel = ?, surprise_day = ?, reset_day = ? WHERE id = ?",
-            (day.serialize(with_id=True)),
-        )
-        await self.connection.commit()
+        async with self.transaction():
+            await self.connection.execute(
+                "UPDATE surprise_days SET discord = ?, message = ?, channel = ?, surprise_day = ?, reset_day = ?, guild = ?"
+                " WHERE id = ?",
+                day.serialize(with_id=True),
+            )
+
+        if self._cache is not None:
+            self._cache.put(day)
+        if self._calendar is not None:
+            self._calendar.put(day)
+
+    @metrics.timed("database_seconds")
+    async def update_days(
+        self,
+        days: t.Iterable[SurpriseDay],
+    ) -> None:
+        """Sync the state of multiple SurpriseDays to the database in a single transaction.
 
+        Parameters
+        ----------
+        days: t.Iterable[SurpriseDay]
+            The days to update.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        days = list(days)
+        if not days:
+            return
+
+        async with self.transaction():
+            await self.connection.executemany(
+                "UPDATE surprise_days SET discord = ?, message = ?, channel = ?, surprise_day = ?, reset_day = ?, guild = ?"
+                " WHERE id = ?",
+                [day.serialize(with_id=True) for day in days],
+            )
+
+        if self._cache is not None:
+            for day in days:
+                self._cache.put(day)
+        if self._calendar is not None:
+            for day in days:
+                self._calendar.put(day)
+
+    @metrics.timed("database_seconds")
     async def delete_day(
         self,
         day: SurpriseDay,
@@ -114,20 +388,58 @@ class Database:
         if self.is_closed:
             raise hikari.ComponentStateConflictError("The database connection is closed.")
 
-        cur = await self.connection.cursor()
-        await cur.execute(
-            "DELETE FROM surprise_days WHERE id = ?",
-            (day.id,),
-        )
-        await self.connection.commit()
+        async with self.transaction():
+            await self.connection.execute(
+                "DELETE FROM surprise_days WHERE id = ?",
+                (day.id,),
+            )
+
+        if self._cache is not None:
+            self._cache.discard(day.guild, day.user)
+        if self._calendar is not None:
+            self._calendar.discard(day.guild, day.user)
+
+    @metrics.timed("database_seconds")
+    async def delete_days(
+        self,
+        days: t.Iterable[SurpriseDay],
+    ) -> None:
+        """Delete multiple SurpriseDay entries from the database in a single transaction.
+
+        Parameters
+        ----------
+        days: t.Iterable[SurpriseDay]
+            The days to delete.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        days = list(days)
+        if not days:
+            return
+
+        async with self.transaction():
+            await self.connection.executemany("DELETE FROM surprise_days WHERE id = ?", [(day.id,) for day in days])
+
+        if self._cache is not None:
+            for day in days:
+                self._cache.discard(day.guild, day.user)
+        if self._calendar is not None:
+            for day in days:
+                self._calendar.discard(day.guild, day.user)
 
-    async def fetch_expired_days(self, date: datetime.datetime) -> t.Sequence[SurpriseDay]:
+    @metrics.timed("database_seconds")
+    async def fetch_expired_days(
+        self, date: datetime.datetime, guilds: t.Optional[t.Collection[int]] = None
+    ) -> t.Sequence[SurpriseDay]:
         """Fetch all days that have expired.
 
         Parameters
         ----------
         date: datetime.datetime
             The date to check expiration by.
+        guilds: t.Optional[t.Collection[int]]
+            Only fetch the days of these guilds. Defaults to every guild.
 
         Returns
         -------
@@ -138,13 +450,145 @@ class Database:
             raise hikari.ComponentStateConflictError("The database connection is closed.")
 
         timestamp = int(date.timestamp())
-        cur = await self.connection.cursor()
-        res = await cur.execute(
-            """SELECT * FROM surprise_days WHERE reset_day < ?;""",
-            (timestamp,),
-        )
-        return [SurpriseDay.from_row(tuple(row)) for row in await res.fetchall()]
+        where, params = _guild_filter(guilds)
+        async with self._reading() as connection:
+            res = await connection.execute(
+                f"""SELECT * FROM surprise_days WHERE reset_day < ?{where};""",
+                (timestamp, *params),
+            )
+            return [SurpriseDay.from_row(row) for row in await res.fetchall()]
+
+    @metrics.timed("database_seconds")
+    async def fetch_all_days(self, guilds: t.Optional[t.Collection[int]] = None) -> t.Sequence[SurpriseDay]:
+        """Fetch every day in the database.
+
+        Parameters
+        ----------
+        guilds: t.Optional[t.Collection[int]]
+            Only fetch the days of these guilds. Defaults to every guild.
+
+        Returns
+        -------
+        Sequence[SurpriseDay]
+            A list of all days.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        where, params = _guild_filter(guilds)
+        async with self._reading() as connection:
+            res = await connection.execute(f"""SELECT * FROM surprise_days WHERE 1{where};""", params)
+            return [SurpriseDay.from_row(row) for row in await res.fetchall()]
+
+    @metrics.timed("database_seconds")
+    async def fetch_all_columns(self, guilds: t.Optional[t.Collection[int]] = None) -> SurpriseDayColumns:
+        """Fetch every day in the database in columnar form, which is much more compact than fetch_all_days().
+
+        Parameters
+        ----------
+        guilds: t.Optional[t.Collection[int]]
+            Only fetch the days of these guilds. Defaults to every guild.
+
+        Returns
+        -------
+        SurpriseDayColumns
+            All days.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        where, params = _guild_filter(guilds)
+        columns = SurpriseDayColumns()
+        async with self._reading() as connection:
+            async with connection.execute(f"""SELECT * FROM surprise_days WHERE 1{where};""", params) as cur:
+                while rows := await cur.fetchmany(1000):
+                    for row in rows:
+                        columns.append(row)
+        return columns
+
+    async def iter_days(
+        self, guilds: t.Optional[t.Collection[int]] = None, chunk_size: int = 1000
+    ) -> t.AsyncIterator[t.Sequence[SurpriseDay]]:
+        """Stream every day in the database in chunks, ordered by ID, so memory use does not depend on the table size.
+
+        The chunks come from a single SELECT on a read-only connection, which in WAL mode sees the database as it was
+        when the statement started, however long the caller takes and whatever the bot writes in the meantime.
+        Without a read pool the writer connection is used, and concurrent writes may show up in later chunks.
+
+        Parameters
+        ----------
+        guilds: t.Optional[t.Collection[int]]
+            Only stream the days of these guilds. Defaults to every guild.
+        chunk_size: int
+            The amount of days fetched at a time.
+
+        Returns
+        -------
+        AsyncIterator[Sequence[SurpriseDay]]
+            The days, chunk_size at a time.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        where, params = _guild_filter(guilds)
+        async with self._reading() as connection:
+            async with connection.execute(
+                f"""SELECT * FROM surprise_days WHERE 1{where} ORDER BY id;""", params
+            ) as cur:
+                while rows := await cur.fetchmany(chunk_size):
+                    yield [SurpriseDay.from_row(row) for row in rows]
+
+    @metrics.timed("database_seconds")
+    async def fetch_days(self, ids: t.Iterable[int]) -> t.Sequence[SurpriseDay]:
+        """Fetch days by their entry IDs. IDs that don't exist are skipped.
+
+        Parameters
+        ----------
+        ids: t.Iterable[int]
+            The entry IDs of the days.
+
+        Returns
+        -------
+        Sequence[SurpriseDay]
+            A list of the days that exist.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        days: t.List[SurpriseDay] = []
+        async with self._reading() as connection:
+            # Stay well below SQLite's limit on the amount of parameters.
+            for chunk in utils.chunked(ids, 500):
+                res = await connection.execute(
+                    f"""SELECT * FROM surprise_days WHERE id IN ({",".join("?" * len(chunk))});""",
+                    chunk,
+                )
+                days.extend(SurpriseDay.from_row(row) for row in await res.fetchall())
+        return days
+
+    @metrics.timed("database_seconds")
+    async def fetch_reset_schedule(self, guilds: t.Optional[t.Collection[int]] = None) -> t.Sequence[t.Tuple[int, int]]:
+        """Fetch the entry ID and reset day timestamp of every day, without loading the full rows.
 
+        Parameters
+        ----------
+        guilds: t.Optional[t.Collection[int]]
+            Only fetch the days of these guilds. Defaults to every guild.
+
+        Returns
+        -------
+        Sequence[t.Tuple[int, int]]
+            A list of (id, reset_day) pairs.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        where, params = _guild_filter(guilds)
+        async with self._reading() as connection:
+            res = await connection.execute(f"""SELECT id, reset_day FROM surprise_days WHERE 1{where};""", params)
+            return [(row[0], row[1]) for row in await res.fetchall()]
+
+    @metrics.timed("database_seconds")
     async def fetch_day_by_channel(
         self, channel: hikari.SnowflakeishOr[hikari.TextableChannel]
     ) -> t.Optional[SurpriseDay]:
@@ -163,18 +607,31 @@ class Database:
         if self.is_closed:
             raise hikari.ComponentStateConflictError("The database connection is closed.")
 
-        cur = await self.connection.cursor()
-        channel_id = str(hikari.Snowflake(channel))
-
-        res = await cur.execute("""SELECT * FROM surprise_days WHERE "channel"=?;""", (channel_id,))
-        if row := await res.fetchone():
-            return SurpriseDay.from_row(tuple(row))
+        if self._cache is not None:
+            if (day := self._cache.get_by_channel(int(channel))) is not None or self._cache.is_complete:
+                metrics.REGISTRY.inc("database_cache_total", result="hit")
+                return day
+            metrics.REGISTRY.inc("database_cache_total", result="miss")
+
+        generation = self._cache.generation if self._cache is not None else 0
+        async with self._reading() as connection:
+            res = await connection.execute("""SELECT * FROM surprise_days WHERE "channel"=?;""", (int(channel),))
+            row = await res.fetchone()
+        if row:
+            day = SurpriseDay.from_row(row)
+            self._cache_read(day, generation)
+            return day
 
-    async def fetch_day_by_user(self, user: hikari.SnowflakeishOr[hikari.PartialUser]) -> t.Optional[SurpriseDay]:
-        """Fetch a day by user.
+    @metrics.timed("database_seconds")
+    async def fetch_day_by_user(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], user: hikari.SnowflakeishOr[hikari.PartialUser]
+    ) -> t.Optional[SurpriseDay]:
+        """Fetch a day by guild and user.
 
         Parameters
         ----------
+        guild: hikari.SnowflakeishOr[hikari.PartialGuild]
+            The guild the surprise day belongs to.
         user: hikari.SnowflakeishOr[hikari.PartialUser]
             The user that belongs to the surprise day.
 
@@ -186,19 +643,33 @@ class Database:
         if self.is_closed:
             raise hikari.ComponentStateConflictError("The database connection is closed.")
 
-        user_id = str(hikari.Snowflake(user))
-
-        cur = await self.connection.cursor()
-
-        res = await cur.execute("""SELECT * FROM surprise_days WHERE "discord"=?;""", (user_id,))
-        if row := await res.fetchone():
-            return SurpriseDay.from_row(tuple(row))
+        if self._cache is not None:
+            if (day := self._cache.get_by_user(int(guild), int(user))) is not None or self._cache.is_complete:
+                metrics.REGISTRY.inc("database_cache_total", result="hit")
+                return day
+            metrics.REGISTRY.inc("database_cache_total", result="miss")
+
+        generation = self._cache.generation if self._cache is not None else 0
+        async with self._reading() as connection:
+            res = await connection.execute(
+                """SELECT * FROM surprise_days WHERE "guild"=? AND "discord"=?;""", (int(guild), int(user))
+            )
+            row = await res.fetchone()
+        if row:
+            day = SurpriseDay.from_row(row)
+            self._cache_read(day, generation)
+            return day
 
-    async def fetch_or_create_day(self, user: hikari.SnowflakeishOr[hikari.PartialUser]) -> SurpriseDay:
+    @metrics.timed("database_seconds")
+    async def fetch_or_create_day(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], user: hikari.SnowflakeishOr[hikari.PartialUser]
+    ) -> SurpriseDay:
         """Get a surprise day from the database, or create a new one if it doesn't exist.
 
         Parameters
         ----------
+        guild: hikari.SnowflakeishOr[hikari.PartialGuild]
+            The guild the user is a member of.
         user: hikari.SnowflakeishOr[hikari.PartialUser]
             The user to get the day for.
 
@@ -210,27 +681,245 @@ class Database:
         if self.is_closed:
             raise hikari.ComponentStateConflictError("The database connection is closed.")
 
-        if day := await self.fetch_day_by_user(user):
+        if day := await self.fetch_day_by_user(guild, user):
             return day
 
         surprise_day, reset_day = utils.generate_random_days()
 
-        return await self.create_day(user, None, None, surprise_day, reset_day)
+        return await self.create_day(guild, user, None, None, surprise_day, reset_day)
 
+    @metrics.timed("database_seconds")
     async def create_schema(self) -> None:
-        """Create the database schema if it doesn't exist already."""
+        """Create the database schema, or upgrade an existing database to the latest schema version."""
         if self.is_closed:
             raise hikari.ComponentStateConflictError("The database connection is closed.")
 
-        await self.connection.execute(
-            """CREATE TABLE IF NOT EXISTS "surprise_days" (
-                "id"	INTEGER NOT NULL UNIQUE,
-                "discord"	TEXT NOT NULL UNIQUE,
-                "message"	TEXT,
-                "channel"	TEXT,
-                "surprise_day"	INTEGER NOT NULL,
-                "reset_day"	INTEGER NOT NULL,
-                PRIMARY KEY("id" AUTOINCREMENT)
-            );"""
-        )
-        await self.connection.commit()
+        async with self.transaction():
+            await migrations.migrate(self.connection)
+
+    @metrics.timed("database_seconds")
+    async def adopt_days(self, guild: hikari.SnowflakeishOr[hikari.PartialGuild]) -> int:
+        """Assign every day created before the guild column existed to a guild.
+
+        Parameters
+        ----------
+        guild: hikari.SnowflakeishOr[hikari.PartialGuild]
+            The guild the days belong to.
+
+        Returns
+        -------
+        int
+            The amount of days that were adopted.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        async with self.transaction():
+            res = await self.connection.execute(
+                """UPDATE surprise_days SET guild = ? WHERE guild = 0;""", (int(guild),)
+            )
+
+        if res.rowcount and self._cache is not None:
+            self._cache.clear()
+        if res.rowcount and self._calendar is not None:
+            self._calendar.clear()
+        return res.rowcount
+
+    @metrics.timed("database_seconds")
+    async def enqueue_effect(
+        self, key: str, kind: str, guild: int, payload: t.Mapping[str, t.Any], next_attempt: int
+    ) -> bool:
+        """Add a Discord side effect to the outbox, unless an effect with the same key is already pending.
+
+        Parameters
+        ----------
+        key: str
+            The idempotency key of the effect.
+        kind: str
+            The name of the handler that applies the effect.
+        guild: int
+            The guild the effect belongs to.
+        payload: t.Mapping[str, t.Any]
+            The arguments of the handler, which must be JSON serializable.
+        next_attempt: int
+            The UNIX timestamp of the first attempt.
+
+        Returns
+        -------
+        bool
+            True if the effect was added, False if it was already pending.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        async with self.transaction():
+            res = await self.connection.execute(
+                """INSERT INTO outbox(key, kind, guild, payload, next_attempt) VALUES (?,?,?,?,?)
+                ON CONFLICT(key) DO NOTHING;""",
+                (key, kind, int(guild), json.dumps(payload), next_attempt),
+            )
+        return res.rowcount > 0
+
+    @metrics.timed("database_seconds")
+    async def claim_due_effects(
+        self, now: int, lease: int, limit: int, guilds: t.Optional[t.Collection[int]] = None
+    ) -> t.Sequence[OutboxEntry]:
+        """Claim the outbox entries whose next attempt is due, oldest first.
+
+        Claiming moves the next attempt of the entries to lease in the same statement, so no other process claims
+        them until the claimer rescheduled or deleted them, or crashed and the lease ran out.
+
+        Parameters
+        ----------
+        now: int
+            The current UNIX timestamp.
+        lease: int
+            The UNIX timestamp the claimed entries become due again at.
+        limit: int
+            The maximum amount of entries to claim.
+        guilds: t.Optional[t.Collection[int]]
+            Only claim the entries of these guilds. Defaults to every guild.
+
+        Returns
+        -------
+        Sequence[OutboxEntry]
+            The claimed entries.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        where, params = _guild_filter(guilds)
+        async with self.transaction():
+            res = await self.connection.execute(
+                f"""UPDATE outbox SET next_attempt = ? WHERE id IN (
+                    SELECT id FROM outbox WHERE next_attempt <= ?{where} ORDER BY next_attempt LIMIT ?
+                ) RETURNING {OUTBOX_COLUMNS};""",
+                (lease, now, *params, limit),
+            )
+            rows = await res.fetchall()
+        return [OutboxEntry.from_row(row) for row in rows]
+
+    @metrics.timed("database_seconds")
+    async def reschedule_effect(self, entry: OutboxEntry) -> None:
+        """Sync the attempts, next attempt and last error of an outbox entry to the database."""
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        async with self.transaction():
+            await self.connection.execute(
+                """UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?;""",
+                (entry.attempts, entry.next_attempt, entry.last_error, entry.id),
+            )
+
+    @metrics.timed("database_seconds")
+    async def delete_effect(self, entry: OutboxEntry) -> None:
+        """Remove an outbox entry, because it was applied or given up on."""
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        async with self.transaction():
+            await self.connection.execute("""DELETE FROM outbox WHERE id = ?;""", (entry.id,))
+
+    @metrics.timed("database_seconds")
+    async def count_effects(self) -> int:
+        """Count the entries in the outbox."""
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        async with self._reading() as connection:
+            res = await connection.execute("""SELECT COUNT(*) FROM outbox;""")
+            row = await res.fetchone()
+        return row[0] if row else 0
+
+    @metrics.timed("database_seconds")
+    async def fetch_surprise_days(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], start: int, end: int, limit: t.Optional[int] = None
+    ) -> t.Sequence[Entry]:
+        """Fetch the days of a guild whose surprise day is in [start, end), earliest first.
+
+        Served from the calendar index if it is enabled, which is filled from the database first if it isn't yet.
+
+        Parameters
+        ----------
+        guild: hikari.SnowflakeishOr[hikari.PartialGuild]
+            The guild to look in.
+        start: int
+            The UNIX timestamp to start at, inclusive.
+        end: int
+            The UNIX timestamp to stop at, exclusive.
+        limit: t.Optional[int]
+            The maximum amount of days to fetch. Defaults to every day in the range.
+
+        Returns
+        -------
+        Sequence[Entry]
+            The (surprise_day, user) pairs in the range.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        if self._calendar is not None:
+            if not self._calendar.is_complete:
+                # Under the write lock, so no write lands between the scan and the fill.
+                async with self.transaction():
+                    self._calendar.fill(await self.fetch_all_days())
+            return self._calendar.between(int(guild), start, end, limit)
+
+        async with self._reading() as connection:
+            res = await connection.execute(
+                """SELECT surprise_day, discord FROM surprise_days WHERE guild = ? AND surprise_day >= ?"""
+                """ AND surprise_day < ? ORDER BY surprise_day, discord LIMIT ?;""",
+                (int(guild), start, end, -1 if limit is None else limit),
+            )
+            return [(row[0], row[1]) for row in await res.fetchall()]
+
+    @metrics.timed("database_seconds")
+    async def fetch_occupancy(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], start: int, end: int
+    ) -> t.Mapping[int, int]:
+        """Count the days of a guild per surprise day in [start, end).
+
+        Read from the occupancy table, which triggers keep up to date, so this reads one row per surprise day
+        instead of one per member.
+
+        Parameters
+        ----------
+        guild: hikari.SnowflakeishOr[hikari.PartialGuild]
+            The guild to count in.
+        start: int
+            The UNIX timestamp to start at, inclusive.
+        end: int
+            The UNIX timestamp to stop at, exclusive.
+
+        Returns
+        -------
+        t.Mapping[int, int]
+            The amount of days per surprise day, surprise days without any are left out.
+        """
+        if self.is_closed:
+            raise hikari.ComponentStateConflictError("The database connection is closed.")
+
+        async with self._reading() as connection:
+            res = await connection.execute(
+                """SELECT surprise_day, days FROM surprise_day_occupancy WHERE guild = ? AND surprise_day >= ?"""
+                """ AND surprise_day < ?;""",
+                (int(guild), start, end),
+            )
+            return {row[0]: row[1] for row in await res.fetchall()}
+
+    @metrics.timed("database_seconds")
+    async def warm_cache(self) -> None:
+        """Load every day into the cache and the calendar index, so lookups don't have to hit the disk.
+
+        Does nothing if both are disabled.
+        """
+        if self._cache is None and self._calendar is None:
+            return
+
+        generation = self._cache.generation if self._cache is not None else 0
+        calendar_generation = self._calendar.generation if self._calendar is not None else 0
+        days = await self.fetch_all_days()
+        if self._cache is not None:
+            self._cache.fill(days, generation)
+        if self._calendar is not None:
+            self._calendar.fill(days, calendar_generation)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import collections
+import typing as t
+
+import attr
+
+from models.surprise_day import SurpriseDay
+
+Key = t.Tuple[int, int]
+"""A (guild, user) pair identifying a day."""
+
+
+class DayCache:
+    """An LRU cache of SurpriseDays, indexed by both (guild, user) and channel.
+
+    Days are copied on the way in and out, so callers are free to mutate the days they get.
+
+    Every write bumps a generation counter. Days read from the database are added with put_read() and the generation
+    taken before the read, so a read that raced a write can't bring back the version of a day from before the write.
+    """
+
+    __slots__: t.Sequence[str] = ("_max_size", "_by_user", "_by_channel", "_is_complete", "_generation")
+
+    def __init__(self, max_size: int) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        self._max_size = max_size
+        self._by_user: collections.OrderedDict[Key, SurpriseDay] = collections.OrderedDict()
+        self._by_channel: t.Dict[int, Key] = {}
+        self._is_complete = False
+        self._generation = 0
+
+    @property
+    def max_size(self) -> int:
+        """The maximum amount of days kept in the cache."""
+        return self._max_size
+
+    @property
+    def is_complete(self) -> bool:
+        """True if every day in the database is cached, so a cache miss means the day does not exist."""
+        return self._is_complete
+
+    @property
+    def generation(self) -> int:
+        """A counter bumped by every write to the cache, to be taken before reading days to add with put_read()."""
+        return self._generation
+
+    def __len__(self) -> int:
+        return len(self._by_user)
+
+    def fill(self, days: t.Iterable[SurpriseDay], generation: t.Optional[int] = None) -> None:
+        """Replace the contents of the cache with all days of the database.
+
+        If the generation taken before reading the days is passed and the cache was written to since, the days may
+        be outdated and the cache is left as it is.
+        """
+        if generation is not None and generation != self._generation:
+            return
+        self.clear()
+        # _insert() drops completeness again if the days don't fit.
+        self._is_complete = True
+        for day in days:
+            self._insert(day)
+
+    def clear(self) -> None:
+        """Remove every day from the cache."""
+        self._generation += 1
+        self._by_user.clear()
+        self._by_channel.clear()
+        self._is_complete = False
+
+    def get_by_user(self, guild: int, user: int) -> t.Optional[SurpriseDay]:
+        """Get a copy of the cached day of a user in a guild, or None if it is not cached."""
+        if (day := self._by_user.get((guild, user))) is None:
+            return None
+        self._by_user.move_to_end((guild, user))
+        return attr.evolve(day)
+
+    def get_by_channel(self, channel: int) -> t.Optional[SurpriseDay]:
+        """Get a copy of the cached day belonging to a channel, or None if it is not cached."""
+        if (key := self._by_channel.get(channel)) is None:
+            return None
+        return self.get_by_user(*key)
+
+    def put(self, day: SurpriseDay) -> None:
+        """Add a day that was written to the database to the cache, or replace the cached version of it."""
+        self._generation += 1
+        self._insert(day)
+
+    def put_read(self, day: SurpriseDay, generation: int) -> None:
+        """Add a day read from the database to the cache.
+
+        Nothing is added if the day is already cached, or if the cache was written to since generation was taken
+        before the read, because the read may have returned the day as it was before that write.
+        """
+        if generation == self._generation and (day.guild, day.user) not in self._by_user:
+            self._insert(day)
+
+    def _insert(self, day: SurpriseDay) -> None:
+        key = (day.guild, day.user)
+        self._remove(*key)
+
+        self._by_user[key] = attr.evolve(day)
+        if day.channel is not None:
+            self._by_channel[day.channel] = key
+
+        while len(self._by_user) > self._max_size:
+            _, evicted = self._by_user.popitem(last=False)
+            if evicted.channel is not None:
+                self._by_channel.pop(evicted.channel, None)
+            self._is_complete = False
+
+    def discard(self, guild: int, user: int) -> None:
+        """Remove the day of a user in a guild that was deleted from the database from the cache, if it is cached."""
+        self._generation += 1
+        self._remove(guild, user)
+
+    def _remove(self, guild: int, user: int) -> None:
+        if (day := self._by_user.pop((guild, user), None)) is not None and day.channel is not None:
+            self._by_channel.pop(day.channel, None)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import typing as t
+
+logger = logging.getLogger(__name__)
+
+EventT = t.TypeVar("EventT")
+
+
+class CoalescingQueue(t.Generic[EventT]):
+    """Buffers events and processes them in batches, keeping only the latest pending event per key.
+
+    If a member joins and leaves again before their join was handled, only the leave is processed.
+    """
+
+    __slots__: t.Sequence[str] = (
+        "_handler",
+        "_batch_size",
+        "_concurrency",
+        "_linger",
+        "_pending",
+        "_wakeup",
+        "_task",
+        "_processed",
+        "_coalesced",
+        "_failed",
+        "_last_lag",
+    )
+
+    def __init__(
+        self,
+        handler: t.Callable[[EventT], t.Awaitable[None]],
+        batch_size: int = 50,
+        concurrency: int = 8,
+        linger: float = 0.5,
+    ) -> None:
+        self._handler = handler
+        self._batch_size = batch_size
+        self._concurrency = concurrency
+        self._linger = linger
+        # key -> (time the key was first queued, latest event)
+        self._pending: t.Dict[t.Hashable, t.Tuple[float, EventT]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: t.Optional[asyncio.Task[None]] = None
+        self._processed = 0
+        self._coalesced = 0
+        self._failed = 0
+        self._last_lag = 0.0
+
+    @property
+    def depth(self) -> int:
+        """The amount of events waiting to be processed."""
+        return len(self._pending)
+
+    @property
+    def lag(self) -> float:
+        """The amount of seconds the oldest pending event has been waiting for."""
+        if not self._pending:
+            return 0.0
+        return time.monotonic() - next(iter(self._pending.values()))[0]
+
+    @property
+    def last_lag(self) -> float:
+        """The amount of seconds the oldest event of the last processed batch waited for."""
+        return self._last_lag
+
+    @property
+    def processed(self) -> int:
+        """The amount of events processed so far."""
+        return self._processed
+
+    @property
+    def coalesced(self) -> int:
+        """The amount of events that were dropped, because a newer event for the same key replaced them."""
+        return self._coalesced
+
+    @property
+    def failed(self) -> int:
+        """The amount of events whose handler raised."""
+        return self._failed
+
+    def put(self, key: t.Hashable, event: EventT) -> None:
+        """Queue an event, replacing the pending event with the same key."""
+        if (previous := self._pending.get(key)) is not None:
+            self._pending[key] = (previous[0], event)
+            self._coalesced += 1
+        else:
+            self._pending[key] = (time.monotonic(), event)
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Start processing events in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop processing events. Pending events are kept."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _take_batch(self) -> t.List[t.Tuple[float, EventT]]:
+        batch: t.List[t.Tuple[float, EventT]] = []
+        for key in list(self._pending)[: self._batch_size]:
+            batch.append(self._pending.pop(key))
+        return batch
+
+    async def _handle(self, event: EventT, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            try:
+                await self._handler(event)
+            except Exception:
+                self._failed += 1
+                logger.exception(f"Failed to handle {type(event).__name__}")
+
+    async def _run(self) -> None:
+        semaphore = asyncio.Semaphore(self._concurrency)
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                # Give a burst of events some time to arrive, so flapping members can be coalesced.
+                await asyncio.sleep(self._linger)
+
+            batch = self._take_batch()
+            self._last_lag = time.monotonic() - min(queued for queued, _ in batch)
+            await asyncio.gather(*(self._handle(event, semaphore) for _, event in batch))
+            self._processed += len(batch)
+
+            if self._pending:
+                logger.debug(f"{self.depth} member events pending, {self.lag:.2f}s behind")
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import typing as t
+
+
+class MessageRegistry:
+    """Remembers which surprise day messages are known to exist, and which are known to be deleted.
+
+    A message is valid once the bot posted or edited it, and becomes deleted when the gateway reports its
+    deletion or a REST call can't find it. Messages the registry never saw, like after a restart, are unknown.
+    """
+
+    __slots__: t.Sequence[str] = ("_valid", "_deleted")
+
+    def __init__(self) -> None:
+        self._valid: t.Set[int] = set()
+        self._deleted: t.Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._valid)
+
+    def is_valid(self, message: int) -> bool:
+        """True if the message is known to exist."""
+        return message in self._valid
+
+    def is_deleted(self, message: int) -> bool:
+        """True if the message is known to be deleted."""
+        return message in self._deleted
+
+    def mark_valid(self, message: int) -> None:
+        """Record that a message exists."""
+        self._valid.add(message)
+
+    def mark_deleted(self, message: int) -> None:
+        """Record that a message was deleted."""
+        self._valid.discard(message)
+        self._deleted.add(message)
+
+    def forget(self, message: int) -> None:
+        """Stop tracking a message, because no surprise day refers to it anymore."""
+        self._valid.discard(message)
+        self._deleted.discard(message)
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    from aiohttp import web
+
+logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger("surprise.trace")
+
+T = t.TypeVar("T")
+Labels = t.Tuple[t.Tuple[str, str], ...]
+
+DEFAULT_BUCKETS: t.Sequence[float] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""Upper bounds of the latency histogram buckets, in seconds."""
+
+_timing: contextvars.ContextVar[t.FrozenSet[str]] = contextvars.ContextVar("_timing", default=frozenset())
+"""The histograms timed() is currently recording a duration in, in the current task."""
+
+
+def _labels(labels: t.Mapping[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str, quotes: bool = True) -> str:
+    # The text format requires escaping backslashes and newlines, and double quotes in label values.
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quotes else value
+
+
+def _format(name: str, labels: Labels, extra: t.Optional[t.Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return name
+    return name + "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def nested_name(name: str) -> str:
+    """The histogram timed() records a call in while another call timed in the histogram name is running."""
+    base = name[: -len("_seconds")] if name.endswith("_seconds") else name
+    return base + "_nested_seconds"
+
+
+class _Histogram:
+    __slots__: t.Sequence[str] = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(DEFAULT_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+class Registry:
+    """Counters, gauges and latency histograms, rendered in the Prometheus text format."""
+
+    __slots__: t.Sequence[str] = ("_counters", "_histograms", "_gauges", "_help", "_tracing")
+
+    def __init__(self) -> None:
+        self._counters: t.Dict[str, t.Dict[Labels, float]] = {}
+        self._histograms: t.Dict[str, t.Dict[Labels, _Histogram]] = {}
+        self._gauges: t.Dict[str, t.Callable[[], float]] = {}
+        self._help: t.Dict[str, str] = {}
+        self._tracing = False
+
+    @property
+    def tracing(self) -> bool:
+        """True if every observed duration is also written to the surprise.trace logger as JSON."""
+        return self._tracing
+
+    @tracing.setter
+    def tracing(self, value: bool) -> None:
+        self._tracing = value
+
+    def describe(self, name: str, help: str) -> None:
+        """Set the help text of a metric."""
+        self._help[name] = help
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        """Increase a counter."""
+        series = self._counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """Record a duration in a histogram."""
+        series = self._histograms.setdefault(name, {})
+        key = _labels(labels)
+        if (histogram := series.get(key)) is None:
+            histogram = series[key] = _Histogram()
+        histogram.observe(seconds)
+
+        if self._tracing:
+            trace_logger.info(json.dumps({"metric": name, "seconds": seconds, "time": time.time(), **labels}))
+
+    def gauge(self, name: str, callback: t.Callable[[], float], help: t.Optional[str] = None) -> None:
+        """Register a gauge, whose value is read from callback whenever the metrics are rendered."""
+        self._gauges[name] = callback
+        if help:
+            self.describe(name, help)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: t.List[str] = []
+
+        def header(name: str, kind: str) -> None:
+            if help := self._help.get(name):
+                lines.append(f"# HELP {name} {_escape(help, quotes=False)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, counters in self._counters.items():
+            header(name, "counter")
+            lines.extend(f"{_format(name, labels)} {value}" for labels, value in counters.items())
+
+        for name, histograms in self._histograms.items():
+            header(name, "histogram")
+            for labels, histogram in histograms.items():
+                for bound, count in zip(DEFAULT_BUCKETS, histogram.counts):
+                    lines.append(f"{_format(name + '_bucket', labels, ('le', str(bound)))} {count}")
+                lines.append(f"{_format(name + '_bucket', labels, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{_format(name + '_sum', labels)} {histogram.sum}")
+                lines.append(f"{_format(name + '_count', labels)} {histogram.count}")
+
+        for name, callback in self._gauges.items():
+            header(name, "gauge")
+            try:
+                lines.append(f"{name} {float(callback())}")
+            except Exception:
+                logger.exception(f"Failed to read gauge {name}")
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+"""The registry every metric of the bot is recorded in."""
+
+REGISTRY.describe("database_seconds", "Time spent in Database methods called from outside the database.")
+REGISTRY.describe(
+    nested_name("database_seconds"),
+    "Time spent in Database methods called by other Database methods, already counted in database_seconds.",
+)
+REGISTRY.describe("rest_seconds", "Time spent in Discord REST calls, including hikari's rate limit waits.")
+REGISTRY.describe("rest_errors_total", "Discord REST calls that raised, by exception type.")
+REGISTRY.describe(
+    "rate_limit_retries_total", "Rate limits that were too long for hikari and were waited out by the bot."
+)
+REGISTRY.describe(
+    "reset_messages_total", "Surprise day messages updated by the reset job, by whether they were edited or recreated."
+)
+REGISTRY.describe("outbox_effects_total", "Discord side effects queued, applied, retried or dropped by the outbox.")
+REGISTRY.describe(
+    "permission_overwrites_total", "Channel joins and leaves, by whether the cache showed they were no-ops."
+)
+REGISTRY.describe("command_seconds", "Time spent handling slash commands.")
+REGISTRY.describe("command_errors_total", "Slash commands that raised.")
+
+
+def timed(name: str) -> t.Callable[[t.Callable[..., t.Awaitable[T]]], t.Callable[..., t.Awaitable[T]]]:
+    """Decorate a coroutine function to record its duration in a histogram, labelled by the function name.
+
+    Calls made while another call timed in the same histogram is running, like a bulk method calling the single one,
+    are recorded in nested_name(name) instead, so their time isn't counted twice.
+    """
+
+    def decorator(func: t.Callable[..., t.Awaitable[T]]) -> t.Callable[..., t.Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: t.Any, **kwargs: t.Any) -> T:
+            active = _timing.get()
+            histogram = nested_name(name) if name in active else name
+            token = _timing.set(active | {name})
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                REGISTRY.observe(histogram, time.perf_counter() - start, method=func.__name__)
+                _timing.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+class InstrumentedREST:
+    """Wraps a REST client, timing every call made through it and counting the ones that fail."""
+
+    __slots__: t.Sequence[str] = ("_rest",)
+
+    def __init__(self, rest: t.Any) -> None:
+        self._rest = rest
+
+    def __getattr__(self, name: str) -> t.Any:
+        attribute = getattr(self._rest, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+            result = attribute(*args, **kwargs)
+            # Paginated endpoints return lazy iterators, which are passed through untimed.
+            if inspect.isawaitable(result):
+                return self._timed(name, result)
+            return result
+
+        return wrapper
+
+    async def _timed(self, name: str, awaitable: t.Awaitable[T]) -> T:
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        except Exception as e:
+            REGISTRY.inc("rest_errors_total", method=name, error=type(e).__name__)
+            raise
+        finally:
+            REGISTRY.observe("rest_seconds", time.perf_counter() - start, method=name)
+
+
+class MetricsServer:
+    """Serves the metrics of a registry over HTTP at /metrics."""
+
+    __slots__: t.Sequence[str] = ("_registry", "_host", "_port", "_runner")
+
+    def __init__(self, registry: Registry, host: str = "127.0.0.1", port: int = 9100) -> None:
+        self._registry = registry
+        self._host = host
+        self._port = port
+        self._runner: t.Optional[web.AppRunner] = None
+
+    async def _handle(self, _: web.Request) -> web.Response:
+        from aiohttp import web
+
+        return web.Response(text=self._registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self) -> None:
+        """Start listening."""
+        # aiohttp's server is slow to import and only needed when metrics are served.
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        logger.info(f"Serving metrics on http://{self._host}:{self._port}/metrics")
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
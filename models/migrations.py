@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import logging
+import typing as t
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+Migration = t.Callable[[aiosqlite.Connection], t.Awaitable[None]]
+
+
+async def _create_surprise_days(connection: aiosqlite.Connection) -> None:
+    """Version 1: the original schema, storing snowflakes as TEXT."""
+    await connection.execute(
+        """CREATE TABLE IF NOT EXISTS "surprise_days" (
+            "id"	INTEGER NOT NULL UNIQUE,
+            "discord"	TEXT NOT NULL UNIQUE,
+            "message"	TEXT,
+            "channel"	TEXT,
+            "surprise_day"	INTEGER NOT NULL,
+            "reset_day"	INTEGER NOT NULL,
+            PRIMARY KEY("id" AUTOINCREMENT)
+        );"""
+    )
+
+
+async def _integer_snowflakes(connection: aiosqlite.Connection) -> None:
+    """Version 2: store snowflakes as INTEGER, index the channel and reset_day columns."""
+    await connection.execute(
+        """CREATE TABLE "surprise_days_v2" (
+            "id"	INTEGER NOT NULL UNIQUE,
+            "discord"	INTEGER NOT NULL UNIQUE,
+            "message"	INTEGER,
+            "channel"	INTEGER,
+            "surprise_day"	INTEGER NOT NULL,
+            "reset_day"	INTEGER NOT NULL,
+            PRIMARY KEY("id" AUTOINCREMENT)
+        );"""
+    )
+    await connection.execute(
+        """INSERT INTO "surprise_days_v2"
+            SELECT "id", CAST("discord" AS INTEGER), CAST("message" AS INTEGER), CAST("channel" AS INTEGER),
+                "surprise_day", "reset_day"
+            FROM "surprise_days";"""
+    )
+    await connection.execute("""DROP TABLE "surprise_days";""")
+    await connection.execute("""ALTER TABLE "surprise_days_v2" RENAME TO "surprise_days";""")
+    await connection.execute("""CREATE INDEX "surprise_days_channel" ON "surprise_days"("channel");""")
+    await connection.execute("""CREATE INDEX "surprise_days_reset_day" ON "surprise_days"("reset_day");""")
+
+
+async def _guild_column(connection: aiosqlite.Connection) -> None:
+    """Version 3: add the guild column, users are only unique per guild. Existing rows get guild 0."""
+    await connection.execute(
+        """CREATE TABLE "surprise_days_v3" (
+            "id"	INTEGER NOT NULL UNIQUE,
+            "discord"	INTEGER NOT NULL,
+            "message"	INTEGER,
+            "channel"	INTEGER,
+            "surprise_day"	INTEGER NOT NULL,
+            "reset_day"	INTEGER NOT NULL,
+            "guild"	INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY("id" AUTOINCREMENT),
+            UNIQUE("guild", "discord")
+        );"""
+    )
+    await connection.execute(
+        """INSERT INTO "surprise_days_v3"
+            SELECT "id", "discord", "message", "channel", "surprise_day", "reset_day", 0
+            FROM "surprise_days";"""
+    )
+    await connection.execute("""DROP TABLE "surprise_days";""")
+    await connection.execute("""ALTER TABLE "surprise_days_v3" RENAME TO "surprise_days";""")
+    await connection.execute("""CREATE INDEX "surprise_days_channel" ON "surprise_days"("channel");""")
+    await connection.execute("""CREATE INDEX "surprise_days_reset_day" ON "surprise_days"("reset_day");""")
+
+
+async def _outbox(connection: aiosqlite.Connection) -> None:
+    """Version 4: the outbox of Discord side effects waiting to be retried."""
+    await connection.execute(
+        """CREATE TABLE "outbox" (
+            "id"	INTEGER NOT NULL UNIQUE,
+            "key"	TEXT NOT NULL UNIQUE,
+            "kind"	TEXT NOT NULL,
+            "payload"	TEXT NOT NULL,
+            "attempts"	INTEGER NOT NULL DEFAULT 0,
+            "next_attempt"	INTEGER NOT NULL,
+            "last_error"	TEXT,
+            PRIMARY KEY("id" AUTOINCREMENT)
+        );"""
+    )
+    await connection.execute("""CREATE INDEX "outbox_next_attempt" ON "outbox"("next_attempt");""")
+
+
+async def _surprise_day_index(connection: aiosqlite.Connection) -> None:
+    """Version 5: index the surprise_day column per guild, for calendar queries."""
+    await connection.execute(
+        """CREATE INDEX "surprise_days_guild_surprise_day" ON "surprise_days"("guild", "surprise_day");"""
+    )
+
+
+async def _occupancy(connection: aiosqlite.Connection) -> None:
+    """Version 6: count the days of every guild per surprise day, kept up to date by triggers, for balanced
+    scheduling."""
+    await connection.execute(
+        """CREATE TABLE "surprise_day_occupancy" (
+            "guild"	INTEGER NOT NULL,
+            "surprise_day"	INTEGER NOT NULL,
+            "days"	INTEGER NOT NULL,
+            PRIMARY KEY("guild", "surprise_day")
+        ) WITHOUT ROWID;"""
+    )
+    await connection.execute(
+        """INSERT INTO "surprise_day_occupancy"
+            SELECT "guild", "surprise_day", COUNT(*) FROM "surprise_days" GROUP BY "guild", "surprise_day";"""
+    )
+    # Empty rows are removed, so the table only grows with the amount of distinct surprise days.
+    await connection.execute(
+        """CREATE TRIGGER "surprise_days_occupancy_insert" AFTER INSERT ON "surprise_days" BEGIN
+            INSERT INTO "surprise_day_occupancy" VALUES (NEW."guild", NEW."surprise_day", 1)
+                ON CONFLICT("guild", "surprise_day") DO UPDATE SET "days" = "days" + 1;
+        END;"""
+    )
+    await connection.execute(
+        """CREATE TRIGGER "surprise_days_occupancy_delete" AFTER DELETE ON "surprise_days" BEGIN
+            UPDATE "surprise_day_occupancy" SET "days" = "days" - 1
+                WHERE "guild" = OLD."guild" AND "surprise_day" = OLD."surprise_day";
+            DELETE FROM "surprise_day_occupancy"
+                WHERE "guild" = OLD."guild" AND "surprise_day" = OLD."surprise_day" AND "days" <= 0;
+        END;"""
+    )
+    await connection.execute(
+        """CREATE TRIGGER "surprise_days_occupancy_update" AFTER UPDATE OF "guild", "surprise_day" ON "surprise_days"
+            WHEN OLD."guild" != NEW."guild" OR OLD."surprise_day" != NEW."surprise_day" BEGIN
+            UPDATE "surprise_day_occupancy" SET "days" = "days" - 1
+                WHERE "guild" = OLD."guild" AND "surprise_day" = OLD."surprise_day";
+            DELETE FROM "surprise_day_occupancy"
+                WHERE "guild" = OLD."guild" AND "surprise_day" = OLD."surprise_day" AND "days" <= 0;
+            INSERT INTO "surprise_day_occupancy" VALUES (NEW."guild", NEW."surprise_day", 1)
+                ON CONFLICT("guild", "surprise_day") DO UPDATE SET "days" = "days" + 1;
+        END;"""
+    )
+
+
+async def _outbox_guild(connection: aiosqlite.Connection) -> None:
+    """Version 7: the guild of every outbox entry, so each process of a sharded deployment only applies the effects of
+    its own guilds. Existing entries get the guild of their payload or of their day."""
+    await connection.execute("""ALTER TABLE "outbox" ADD COLUMN "guild" INTEGER NOT NULL DEFAULT 0;""")
+    await connection.execute(
+        """UPDATE "outbox" SET "guild" = COALESCE(
+            json_extract("payload", '$.guild'),
+            (SELECT "guild" FROM "surprise_days" WHERE "id" = json_extract("outbox"."payload", '$.id')),
+            0
+        );"""
+    )
+
+
+MIGRATIONS: t.Sequence[Migration] = (
+    _create_surprise_days,
+    _integer_snowflakes,
+    _guild_column,
+    _outbox,
+    _surprise_day_index,
+    _occupancy,
+    _outbox_guild,
+)
+"""All schema migrations, in order. The schema version of a database is the amount of migrations applied to it."""
+
+
+async def fetch_version(connection: aiosqlite.Connection) -> int:
+    """Fetch the schema version of the database."""
+    async with connection.execute("PRAGMA user_version;") as cur:
+        row = await cur.fetchone()
+    return row[0] if row else 0
+
+
+async def migrate(connection: aiosqlite.Connection) -> int:
+    """Upgrade the database to the latest schema version in place.
+
+    Every migration runs in its own transaction together with the version bump,
+    so an interrupted upgrade can simply be retried.
+
+    Parameters
+    ----------
+    connection: aiosqlite.Connection
+        The connection to migrate. It must not have an open transaction.
+
+    Returns
+    -------
+    int
+        The schema version of the database after migrating.
+    """
+    version = await fetch_version(connection)
+
+    for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        await connection.execute("BEGIN;")
+        try:
+            await migration(connection)
+            # PRAGMA does not support parameters, target is always an int.
+            await connection.execute(f"PRAGMA user_version = {target};")
+        except BaseException:
+            await connection.rollback()
+            raise
+        await connection.commit()
+        logger.info(f"Migrated database to schema version {target}")
+        version = target
+
+    return version
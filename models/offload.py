@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import multiprocessing
+import typing as t
+
+T = t.TypeVar("T")
+
+
+class Offloader:
+    """Runs CPU-bound functions of the bulk jobs in a pool of worker processes, so the event loop keeps serving
+    gateway heartbeats and commands while they run.
+
+    With 0 workers, functions run on the event loop like before, but map() still hands control back to it between
+    chunks. Functions and their arguments must be picklable, see models.bulk.
+    """
+
+    __slots__: t.Sequence[str] = ("_workers", "_executor")
+
+    def __init__(self, workers: int = 0) -> None:
+        if workers < 0:
+            raise ValueError("workers must not be negative.")
+        self._workers = workers
+        self._executor: t.Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    @property
+    def workers(self) -> int:
+        """The amount of worker processes, 0 if functions run on the event loop."""
+        return self._workers
+
+    def _submit(self, func: t.Callable[..., T], *args: t.Any) -> asyncio.Future[T]:
+        if self._executor is None:
+            # Workers are spawned rather than forked, forking a process with running threads is unsafe.
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                self._workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def run(self, func: t.Callable[..., T], *args: t.Any) -> T:
+        """Call func with args in a worker process and wait for its result."""
+        if not self._workers:
+            return func(*args)
+        return await self._submit(func, *args)
+
+    async def map(
+        self, func: t.Callable[..., T], chunks: t.Iterable[t.Sequence[t.Any]], prefetch: t.Optional[int] = None
+    ) -> t.AsyncIterator[T]:
+        """Call func once per chunk of arguments, yielding the results in order as soon as each one is ready.
+
+        Parameters
+        ----------
+        func: t.Callable[..., T]
+            The function to call.
+        chunks: t.Iterable[t.Sequence[t.Any]]
+            The arguments of every call. They are consumed lazily.
+        prefetch: t.Optional[int]
+            The amount of calls running ahead of the consumer. Defaults to twice the amount of workers.
+
+        Returns
+        -------
+        t.AsyncIterator[T]
+            The result of every call, in the order of chunks.
+        """
+        if not self._workers:
+            for args in chunks:
+                yield func(*args)
+                await asyncio.sleep(0)
+            return
+
+        iterator = iter(chunks)
+        pending: t.Deque[asyncio.Future[T]] = collections.deque()
+        try:
+            for args in iterator:
+                pending.append(self._submit(func, *args))
+                if len(pending) >= (prefetch or 2 * self._workers):
+                    break
+            while pending:
+                result = await pending.popleft()
+                if (args := next(iterator, None)) is not None:
+                    pending.append(self._submit(func, *args))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def close(self) -> None:
+        """Stop the worker processes, cancelling the calls that did not start yet."""
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(executor.shutdown, wait=True, cancel_futures=True)
+        )
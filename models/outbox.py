@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+import typing as t
+
+from models import metrics
+from models.outbox_entry import OutboxEntry
+from models.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+EffectHandler = t.Callable[[t.Mapping[str, t.Any]], t.Awaitable[None]]
+
+
+class Outbox:
+    """Retries failed Discord side effects in the background, from a table that survives restarts.
+
+    Every effect has an idempotency key, so an effect that is already pending is not queued twice.
+    Failed attempts are retried with exponential backoff, and dropped after max_attempts.
+    Handlers are called with the payload of the effect and must be safe to call more than once.
+
+    Due effects are claimed for lease seconds before they are applied, so processes sharing the storage never apply
+    the same effect at the same time, and only the effects of the guilds returned by guilds are claimed. An effect
+    whose process crashed while applying it is retried once its lease ran out.
+    """
+
+    __slots__: t.Sequence[str] = (
+        "_storage",
+        "_handlers",
+        "_guilds",
+        "_lease",
+        "_base_delay",
+        "_max_delay",
+        "_max_attempts",
+        "_batch_size",
+        "_concurrency",
+        "_poll_interval",
+        "_wakeup",
+        "_task",
+    )
+
+    def __init__(
+        self,
+        storage: Storage,
+        handlers: t.Mapping[str, EffectHandler],
+        guilds: t.Callable[[], t.Optional[t.Collection[int]]] = lambda: None,
+        lease: float = 600.0,
+        base_delay: float = 10.0,
+        max_delay: float = 3600.0,
+        max_attempts: int = 12,
+        batch_size: int = 50,
+        concurrency: int = 4,
+        poll_interval: float = 30.0,
+    ) -> None:
+        self._storage = storage
+        self._handlers = dict(handlers)
+        self._guilds = guilds
+        self._lease = lease
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._max_attempts = max_attempts
+        self._batch_size = batch_size
+        self._concurrency = concurrency
+        self._poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._task: t.Optional[asyncio.Task[None]] = None
+
+    @property
+    def is_running(self) -> bool:
+        """True if effects are being applied in the background."""
+        return self._task is not None and not self._task.done()
+
+    def backoff(self, attempts: int) -> float:
+        """The amount of seconds to wait after the given amount of failed attempts, with jitter."""
+        delay = min(self._max_delay, self._base_delay * 2 ** (attempts - 1))
+        # Full jitter on the upper half, so effects that failed together don't retry together.
+        return delay * random.uniform(0.5, 1.0)
+
+    async def enqueue(
+        self, kind: str, key: str, guild: int, payload: t.Mapping[str, t.Any], delay: float = 0.0
+    ) -> bool:
+        """Queue a side effect to be applied by the handler of kind.
+
+        Parameters
+        ----------
+        kind: str
+            The name of the handler.
+        key: str
+            The idempotency key of the effect.
+        guild: int
+            The guild the effect belongs to.
+        payload: t.Mapping[str, t.Any]
+            The arguments of the handler, which must be JSON serializable.
+        delay: float
+            The amount of seconds to wait before the first attempt.
+
+        Returns
+        -------
+        bool
+            True if the effect was queued, False if an effect with the same key is already pending.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler for side effects of kind {kind!r}.")
+
+        queued = await self._storage.enqueue_effect(key, kind, guild, payload, int(time.time() + delay))
+        if queued:
+            metrics.REGISTRY.inc("outbox_effects_total", kind=kind, result="queued")
+            self._wakeup.set()
+        return queued
+
+    async def process_due(self) -> int:
+        """Claim and apply every effect of the guilds whose next attempt is due.
+
+        Returns
+        -------
+        int
+            The amount of effects that were attempted.
+        """
+        attempted = 0
+        semaphore = asyncio.Semaphore(self._concurrency)
+        while entries := await self._storage.claim_due_effects(
+            int(time.time()), int(time.time() + self._lease), self._batch_size, self._guilds()
+        ):
+            await asyncio.gather(*(self._apply(entry, semaphore) for entry in entries))
+            attempted += len(entries)
+        return attempted
+
+    async def _apply(self, entry: OutboxEntry, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            try:
+                handler = self._handlers[entry.kind]
+                await handler(entry.payload)
+            except Exception as e:
+                entry.attempts += 1
+                entry.last_error = f"{type(e).__name__}: {e}"
+                if entry.attempts >= self._max_attempts:
+                    logger.error(f"Giving up on side effect {entry.key} after {entry.attempts} attempts", exc_info=e)
+                    metrics.REGISTRY.inc("outbox_effects_total", kind=entry.kind, result="dropped")
+                    await self._storage.delete_effect(entry)
+                    return
+
+                delay = self.backoff(entry.attempts)
+                logger.warning(f"Side effect {entry.key} failed ({entry.last_error}), retrying in {delay:.0f}s")
+                metrics.REGISTRY.inc("outbox_effects_total", kind=entry.kind, result="retried")
+                entry.next_attempt = int(time.time() + delay)
+                await self._storage.reschedule_effect(entry)
+            else:
+                metrics.REGISTRY.inc("outbox_effects_total", kind=entry.kind, result="applied")
+                await self._storage.delete_effect(entry)
+
+    def start(self) -> None:
+        """Start applying effects in the background."""
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop applying effects. Pending effects stay in the outbox."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.process_due()
+            except Exception:
+                logger.exception("Failed to process the outbox")
+            # Retries only become due with time, so the outbox is polled even if nothing new is queued.
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
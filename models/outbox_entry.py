@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import json
+import typing as t
+
+import attr
+
+Row = t.Tuple[int, str, str, int, str, int, int, t.Optional[str]]
+"""A row of the outbox table: id, key, kind, guild, payload, attempts, next_attempt, last_error."""
+
+COLUMNS = "id, key, kind, guild, payload, attempts, next_attempt, last_error"
+"""Every column of the outbox table, in the order OutboxEntry.from_row() expects."""
+
+
+@attr.define()
+class OutboxEntry:
+    """A Discord side effect that failed and is waiting to be retried. Use Storage.enqueue_effect() to create one."""
+
+    id: int = attr.field()
+    """Entry ID"""
+
+    key: str = attr.field()
+    """The idempotency key. Enqueuing an effect with the key of a pending one does nothing."""
+
+    kind: str = attr.field()
+    """The name of the handler that applies the effect."""
+
+    guild: int = attr.field()
+    """The guild the effect belongs to. Only the process handling the guild applies it."""
+
+    payload: t.Dict[str, t.Any] = attr.field()
+    """The arguments of the handler."""
+
+    attempts: int = attr.field()
+    """The amount of times the effect failed."""
+
+    next_attempt: int = attr.field()
+    """The UNIX timestamp of the next attempt."""
+
+    last_error: t.Optional[str] = attr.field()
+    """The error of the last failed attempt."""
+
+    @classmethod
+    def from_row(cls, row: Row) -> OutboxEntry:
+        """Create an OutboxEntry object from a database row, decoding the JSON payload."""
+        id, key, kind, guild, payload, attempts, next_attempt, last_error = row
+        return cls(id, key, kind, guild, json.loads(payload), attempts, next_attempt, last_error)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import typing as t
+
+import aiosqlite
+
+
+class ReadPool:
+    """A fixed amount of read-only connections to a database, handed out one task at a time.
+
+    Every aiosqlite connection runs its queries on its own thread, so reads through the pool
+    run in parallel with each other and with the writer connection.
+    """
+
+    __slots__: t.Sequence[str] = ("_connections", "_idle")
+
+    def __init__(self, connections: t.Sequence[aiosqlite.Connection]) -> None:
+        self._connections = tuple(connections)
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        for connection in self._connections:
+            self._idle.put_nowait(connection)
+
+    @classmethod
+    async def open(cls, database: str, size: int, pragmas: t.Mapping[str, str]) -> ReadPool:
+        """Open size read-only connections to a database file.
+
+        Parameters
+        ----------
+        database: str
+            The path of the database file.
+        size: int
+            The amount of connections.
+        pragmas: t.Mapping[str, str]
+            PRAGMA statements to run on every connection, by name.
+
+        Returns
+        -------
+        ReadPool
+            The pool.
+        """
+        connections: t.List[aiosqlite.Connection] = []
+        try:
+            for _ in range(size):
+                connection = await aiosqlite.connect(f"file:{database}?mode=ro", uri=True)
+                connections.append(connection)
+                await apply_pragmas(connection, {**pragmas, "query_only": "ON"})
+        except BaseException:
+            for connection in connections:
+                await connection.close()
+            raise
+        return cls(connections)
+
+    @property
+    def size(self) -> int:
+        """The amount of connections in the pool."""
+        return len(self._connections)
+
+    @property
+    def idle(self) -> int:
+        """The amount of connections not in use right now."""
+        return self._idle.qsize()
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> t.AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection for the duration of the block, waiting for one to be free if necessary."""
+        connection = await self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def close(self) -> None:
+        """Close every connection of the pool."""
+        for connection in self._connections:
+            await connection.close()
+
+
+async def apply_pragmas(connection: aiosqlite.Connection, pragmas: t.Mapping[str, str]) -> None:
+    """Run a PRAGMA statement on a connection for every name and value."""
+    for name, value in pragmas.items():
+        # PRAGMA does not support parameters, the pragmas come from the bot's configuration.
+        await connection.execute(f"PRAGMA {name} = {value};")
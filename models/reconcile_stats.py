@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import typing as t
+
+import attr
+
+
+@attr.define()
+class ReconcileStats:
+    """Statistics about a reconciliation of the database against the guild."""
+
+    members: int = attr.field(default=0)
+    """The amount of guild members that were checked."""
+
+    provisioned: int = attr.field(default=0)
+    """The amount of members that got a new surprise day channel."""
+
+    cleaned: int = attr.field(default=0)
+    """The amount of channels of departed members that were deleted."""
+
+    failed: int = attr.field(default=0)
+    """The amount of members or channels that could not be reconciled."""
+
+    timings: t.Dict[str, float] = attr.field(factory=dict)
+    """The amount of seconds each phase took, by phase name, in the order they ran."""
+
+    @property
+    def elapsed(self) -> float:
+        """The amount of seconds the whole reconciliation took."""
+        return sum(self.timings.values())
@@ -0,0 +1,157 @@
+"""Recording of the member events and slash commands the bot receives, to replay them offline with
+python -m benchmarks.replay.
+
+A recording is a text file with one JSON array per line, only ever appended to:
+
+    ["surprise-recording", 1]
+    [1718000000.123, "create", guild, user]
+    [1718000000.456, "delete", guild, user]
+    [1718000001.789, "command", guild, channel, user, "surprise-days upcoming", [["count", 4, 5]]]
+
+Command options are [name, hikari.OptionType, value] triples. Usernames and message contents are not recorded.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+import typing as t
+
+import attr
+import hikari
+
+logger = logging.getLogger(__name__)
+
+HEADER = ["surprise-recording", 1]
+"""The first line of every recording, with the version of the format."""
+
+Option = t.Tuple[str, int, t.Any]
+"""A command option: its name, its hikari.OptionType and its value."""
+
+
+@attr.define()
+class RecordedEvent:
+    """A single event of a recording."""
+
+    timestamp: float = attr.field()
+    """The UNIX timestamp the bot received the event at."""
+
+    kind: str = attr.field()
+    """"create" or "delete" for a member joining or leaving, "command" for a slash command."""
+
+    guild: int = attr.field()
+    user: int = attr.field()
+
+    channel: int = attr.field(default=0)
+    """The channel a command was invoked in."""
+
+    command: str = attr.field(default="")
+    """The full name of a command, subcommands included, like "surprise-days week"."""
+
+    options: t.List[Option] = attr.field(factory=list)
+
+
+class EventRecorder:
+    """Appends the events the bot receives to a recording.
+
+    Every event is written as soon as it is received, so a crash loses at most the line being written.
+    """
+
+    __slots__: t.Sequence[str] = ("_path", "_file", "_recorded")
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._file: t.Optional[t.TextIO] = None
+        self._recorded = 0
+
+    @property
+    def path(self) -> str:
+        """The file the events are appended to."""
+        return self._path
+
+    @property
+    def recorded(self) -> int:
+        """The amount of events recorded since the recorder was created."""
+        return self._recorded
+
+    def _write(self, record: t.Sequence[t.Any]) -> None:
+        if self._file is None:
+            # Line buffered, so every event reaches the file in a single write.
+            self._file = open(self._path, "a", buffering=1, encoding="utf-8")
+            if self._file.tell() == 0:
+                self._file.write(json.dumps(HEADER) + "\n")
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._recorded += 1
+
+    def record_member_event(self, event: t.Union[hikari.MemberCreateEvent, hikari.MemberDeleteEvent]) -> None:
+        """Record a member joining or leaving a guild."""
+        kind = "create" if isinstance(event, hikari.MemberCreateEvent) else "delete"
+        self._write([round(time.time(), 3), kind, int(event.guild_id), int(event.user_id)])
+
+    def record_interaction(self, interaction: hikari.PartialInteraction) -> None:
+        """Record a slash command interaction, other interactions are ignored."""
+        if not isinstance(interaction, hikari.CommandInteraction) or interaction.guild_id is None:
+            return
+
+        names = [interaction.command_name]
+        options = interaction.options or ()
+        # Subcommands are options holding the options of the subcommand.
+        while len(options) == 1 and options[0].type in (
+            hikari.OptionType.SUB_COMMAND,
+            hikari.OptionType.SUB_COMMAND_GROUP,
+        ):
+            names.append(options[0].name)
+            options = options[0].options or ()
+
+        self._write(
+            [
+                round(time.time(), 3),
+                "command",
+                int(interaction.guild_id),
+                int(interaction.channel_id),
+                int(interaction.user.id),
+                " ".join(names),
+                [[option.name, int(option.type), option.value] for option in options],
+            ]
+        )
+
+    def close(self) -> None:
+        """Close the recording. Recording another event opens it again."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_recording(lines: t.Iterable[str]) -> t.Iterator[RecordedEvent]:
+    """Parse the lines of a recording, in order.
+
+    A truncated last line, left by a crash while it was written, is skipped.
+
+    Raises
+    ------
+    ValueError
+        If the lines are not a recording in a supported version.
+    """
+    lines = iter(lines)
+    header = next(lines, "")
+    if not header.strip() or json.loads(header) != HEADER:
+        raise ValueError(f"Not a recording in format {HEADER[1]}: {header.strip()[:40]!r}")
+
+    for number, line in enumerate(lines, start=2):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping truncated line {number} of the recording")
+            continue
+        if record[1] == "command":
+            timestamp, kind, guild, channel, user, command, options = record
+            yield RecordedEvent(timestamp, kind, guild, user, channel, command, [tuple(option) for option in options])
+        else:
+            timestamp, kind, guild, user = record
+            yield RecordedEvent(timestamp, kind, guild, user)
+
+
+def open_recording(path: str) -> t.Iterator[RecordedEvent]:
+    """Read the events of a recording file, in order."""
+    with open(path, encoding="utf-8") as file:
+        yield from read_recording(file)
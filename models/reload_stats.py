@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import typing as t
+
+import attr
+
+
+@attr.define()
+class ReloadStats:
+    """Statistics about a hot reload of the command plugins."""
+
+    reloaded: t.List[str] = attr.field(factory=list)
+    """The extensions that were unloaded and loaded again."""
+
+    loaded: t.List[str] = attr.field(factory=list)
+    """The extensions that were loaded for the first time, because their file is new."""
+
+    unloaded: t.List[str] = attr.field(factory=list)
+    """The extensions that were unloaded for good, because their file is gone."""
+
+    synced: bool = attr.field(default=False)
+    """True if the slash commands changed and were synced with Discord."""
+
+    timings: t.Dict[str, float] = attr.field(factory=dict)
+    """The amount of seconds each phase took, by phase name, in the order they ran."""
+
+    @property
+    def elapsed(self) -> float:
+        """The amount of seconds the whole reload took."""
+        return sum(self.timings.values())
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import attr
+
+
+@attr.define()
+class ResetStats:
+    """Statistics about a single run of the surprise day reset job."""
+
+    processed: int = attr.field(default=0)
+    """The amount of surprise days that were successfully reset."""
+
+    deleted: int = attr.field(default=0)
+    """The amount of stale surprise days that were removed, because their user left the guild."""
+
+    failed: int = attr.field(default=0)
+    """The amount of surprise days that could not be reset and will be retried in the next run."""
+
+    elapsed: float = attr.field(default=0.0)
+    """The amount of seconds the run took."""
+
+    @property
+    def rows_per_second(self) -> float:
+        """The throughput of the run, in database rows handled per second."""
+        if self.elapsed <= 0:
+            return 0.0
+        return (self.processed + self.deleted) / self.elapsed
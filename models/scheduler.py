@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import time
+import typing as t
+
+from models.surprise_day import SurpriseDay
+
+logger = logging.getLogger(__name__)
+
+ResetCallback = t.Callable[[t.Sequence[int]], t.Awaitable[None]]
+
+
+class ResetScheduler:
+    """Fires a callback with the IDs of surprise days once their reset day has passed.
+
+    Deadlines are kept in a heap, so only the earliest one has to be waited for.
+    Rescheduling a day replaces its previous deadline.
+    If the callback raises, its days are scheduled again after an exponential backoff, unless they were rescheduled
+    or unscheduled while it ran.
+    """
+
+    __slots__: t.Sequence[str] = (
+        "_callback",
+        "_spread",
+        "_max_batch",
+        "_retry_delay",
+        "_max_retry_delay",
+        "_failures",
+        "_heap",
+        "_deadlines",
+        "_in_flight",
+        "_wakeup",
+        "_task",
+    )
+
+    def __init__(
+        self,
+        callback: ResetCallback,
+        spread: float = 0.0,
+        max_batch: int = 500,
+        retry_delay: float = 30.0,
+        max_retry_delay: float = 3600.0,
+    ) -> None:
+        self._callback = callback
+        self._spread = spread
+        self._max_batch = max_batch
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._failures = 0
+        self._heap: t.List[t.Tuple[float, int]] = []
+        self._deadlines: t.Dict[int, float] = {}
+        self._in_flight: t.Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task: t.Optional[asyncio.Task[None]] = None
+
+    @property
+    def is_running(self) -> bool:
+        """True if the scheduler is running."""
+        return self._task is not None and not self._task.done()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def overdue(self, now: t.Optional[float] = None) -> int:
+        """The amount of days whose deadline has passed, but which were not handed to the callback yet."""
+        now = time.time() if now is None else now
+        return sum(1 for deadline in self._deadlines.values() if deadline <= now)
+
+    def backoff(self, failures: int) -> float:
+        """The amount of seconds to wait before retrying days after the given amount of consecutive failed callbacks."""
+        return min(self._max_retry_delay, self._retry_delay * 2 ** (failures - 1))
+
+    def deadline_of(self, id: int, reset_day: float) -> float:
+        """Get the deadline of a day, which is its reset day delayed by a stable offset of at most spread seconds.
+
+        The offset spreads resets that fall on the same day over the next spread seconds, instead of firing all of them at once.
+        """
+        # Knuth's multiplicative hash, so consecutive IDs end up far apart.
+        return reset_day + (id * 2654435761 % 2**32) / 2**32 * self._spread
+
+    def load(self, entries: t.Iterable[t.Tuple[int, int]]) -> None:
+        """Replace all deadlines with the passed (id, reset_day timestamp) pairs."""
+        self._deadlines = {id: self.deadline_of(id, reset_day) for id, reset_day in entries}
+        self._heap = [(deadline, id) for id, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+        self._wakeup.set()
+
+    def schedule(self, day: SurpriseDay) -> None:
+        """Schedule the reset of a day, replacing its previous deadline."""
+        self.schedule_at(day.id, self.deadline_of(day.id, day.reset_timestamp))
+
+    def schedule_at(self, id: int, deadline: float) -> None:
+        """Schedule the reset of a day at an exact UNIX timestamp, replacing its previous deadline."""
+        self._in_flight.discard(id)
+        self._deadlines[id] = deadline
+        heapq.heappush(self._heap, (deadline, id))
+        if self._heap[0][1] == id:
+            self._wakeup.set()
+
+    def unschedule(self, day: SurpriseDay) -> None:
+        """Stop tracking a day, for example because it was deleted."""
+        self._in_flight.discard(day.id)
+        self._deadlines.pop(day.id, None)
+
+    def start(self) -> None:
+        """Start firing callbacks in the background."""
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop firing callbacks. Deadlines are kept."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _pop_due(self, now: float) -> t.List[int]:
+        due: t.List[int] = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self._max_batch:
+            deadline, id = heapq.heappop(self._heap)
+            # Entries replaced by a later schedule() or removed by unschedule() are skipped.
+            if self._deadlines.get(id) == deadline:
+                del self._deadlines[id]
+                due.append(id)
+        return due
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+
+            if due := self._pop_due(now):
+                self._in_flight = set(due)
+                try:
+                    await self._callback(due)
+                except Exception:
+                    self._failures += 1
+                    delay = self.backoff(self._failures)
+                    logger.exception(f"Failed to reset {len(due)} surprise days, retrying in {delay:.0f}s")
+                    retry, self._in_flight = self._in_flight, set()
+                    for id in retry:
+                        self.schedule_at(id, now + delay)
+                else:
+                    self._failures = 0
+                finally:
+                    self._in_flight = set()
+                continue
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
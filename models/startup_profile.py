@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import time
+import typing as t
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    """Times the phases of the bot's startup, from the first import to serving commands.
+
+    Phases may overlap, like the database opening while the gateway connects, so each one is reported with
+    its offset from the start of the process as well as its duration.
+    """
+
+    __slots__: t.Sequence[str] = ("_origin", "_phases", "_enabled")
+
+    def __init__(self, enabled: bool = True, origin: t.Optional[float] = None) -> None:
+        self._enabled = enabled
+        self._origin = time.perf_counter() if origin is None else origin
+        self._phases: t.Dict[str, t.Tuple[float, float]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """True if the profile is logged once the bot started."""
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        self._enabled = value
+
+    @property
+    def origin(self) -> float:
+        """The time.perf_counter() value the profile started at."""
+        return self._origin
+
+    @property
+    def phases(self) -> t.Mapping[str, t.Tuple[float, float]]:
+        """The (offset, duration) of every finished phase, in seconds, in the order they finished."""
+        return self._phases
+
+    def elapsed(self) -> float:
+        """Seconds since the start of the profile."""
+        return time.perf_counter() - self._origin
+
+    def record(self, name: str, start: float, end: t.Optional[float] = None) -> None:
+        """Record a phase that ran from start until end, or until now, as time.perf_counter() values."""
+        end = time.perf_counter() if end is None else end
+        self._phases[name] = (start - self._origin, end - start)
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> t.Iterator[None]:
+        """Record the time spent in the block as a phase, even if the block raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def report(self) -> str:
+        """Render every phase as a table, with the total time since the start."""
+        width = max((len(name) for name in self._phases), default=0)
+        lines = [f"{'phase':<{width}}  {'start':>8}  {'took':>8}"]
+        lines.extend(
+            f"{name:<{width}}  {offset:>7.3f}s  {duration:>7.3f}s" for name, (offset, duration) in self._phases.items()
+        )
+        lines.append(f"{'total':<{width}}  {'':>8}  {self.elapsed():>7.3f}s")
+        return "\n".join(lines)
+
+    def log(self) -> None:
+        """Log the report, if the profile is enabled."""
+        if self._enabled:
+            logger.info("Startup profile:\n" + self.report())
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import datetime
+import typing as t
+
+import hikari
+
+from models.calendar_index import CalendarIndex
+from models.calendar_index import Entry
+from models.day_cache import DayCache
+from models.outbox_entry import OutboxEntry
+from models.surprise_day import SurpriseDay
+from models.surprise_day import SurpriseDayColumns
+
+NewDay = t.Tuple[
+    hikari.SnowflakeishOr[hikari.PartialGuild],
+    hikari.SnowflakeishOr[hikari.PartialUser],
+    t.Optional[hikari.SnowflakeishOr[hikari.PartialMessage]],
+    t.Optional[hikari.SnowflakeishOr[hikari.TextableChannel]],
+    datetime.datetime,
+    datetime.datetime,
+]
+"""The arguments of Storage.create_day(), used to create days in bulk."""
+
+
+@t.runtime_checkable
+class Storage(t.Protocol):
+    """Where the bot keeps its surprise days.
+
+    models.database.Database (SQLite) is the default implementation, models.postgres.PostgresDatabase can be
+    shared between several bot processes. See Database for the documentation of each method.
+    """
+
+    @property
+    def cache(self) -> t.Optional[DayCache]:
+        """The write-through cache of days, or None if caching is disabled."""
+        ...
+
+    @property
+    def calendar(self) -> t.Optional[CalendarIndex]:
+        """The index of days sorted by surprise day, or None if it is disabled."""
+        ...
+
+    @property
+    def is_closed(self) -> bool:
+        """True if the storage was closed."""
+        ...
+
+    async def close(self) -> None:
+        """Close every connection to the storage."""
+        ...
+
+    def transaction(self) -> t.AsyncContextManager[Storage]:
+        """Group every write made inside the block into a single commit, rolled back if the block raises."""
+        ...
+
+    async def create_day(
+        self,
+        guild: hikari.SnowflakeishOr[hikari.PartialGuild],
+        user: hikari.SnowflakeishOr[hikari.PartialUser],
+        message: t.Optional[hikari.SnowflakeishOr[hikari.PartialMessage]],
+        channel: t.Optional[hikari.SnowflakeishOr[hikari.TextableChannel]],
+        surprise_day: datetime.datetime,
+        reset_day: datetime.datetime,
+    ) -> SurpriseDay:
+        """Create a new surprise day entry."""
+        ...
+
+    async def create_days(self, days: t.Iterable[NewDay]) -> t.Sequence[SurpriseDay]:
+        """Create multiple surprise day entries in a single transaction, returned in the same order.
+
+        Existing days are never overwritten: if a user already has a day in the guild, or appears twice in days, the
+        backend's unique constraint error is raised and none of the days are created.
+        """
+        ...
+
+    async def update_day(self, day: SurpriseDay) -> None:
+        """Sync the state of the passed SurpriseDay to the storage."""
+        ...
+
+    async def update_days(self, days: t.Iterable[SurpriseDay]) -> None:
+        """Sync the state of multiple SurpriseDays to the storage in a single transaction."""
+        ...
+
+    async def delete_day(self, day: SurpriseDay) -> None:
+        """Delete a SurpriseDay entry."""
+        ...
+
+    async def delete_days(self, days: t.Iterable[SurpriseDay]) -> None:
+        """Delete multiple SurpriseDay entries in a single transaction."""
+        ...
+
+    async def fetch_expired_days(
+        self, date: datetime.datetime, guilds: t.Optional[t.Collection[int]] = None
+    ) -> t.Sequence[SurpriseDay]:
+        """Fetch all days whose reset day is before date."""
+        ...
+
+    async def fetch_all_days(self, guilds: t.Optional[t.Collection[int]] = None) -> t.Sequence[SurpriseDay]:
+        """Fetch every day."""
+        ...
+
+    async def fetch_all_columns(self, guilds: t.Optional[t.Collection[int]] = None) -> SurpriseDayColumns:
+        """Fetch every day in columnar form."""
+        ...
+
+    def iter_days(
+        self, guilds: t.Optional[t.Collection[int]] = None, chunk_size: int = 1000
+    ) -> t.AsyncIterator[t.Sequence[SurpriseDay]]:
+        """Stream every day in chunks, ordered by ID, from a consistent snapshot."""
+        ...
+
+    async def fetch_days(self, ids: t.Iterable[int]) -> t.Sequence[SurpriseDay]:
+        """Fetch days by their entry IDs, skipping IDs that don't exist."""
+        ...
+
+    async def fetch_reset_schedule(self, guilds: t.Optional[t.Collection[int]] = None) -> t.Sequence[t.Tuple[int, int]]:
+        """Fetch the (id, reset_day) pair of every day."""
+        ...
+
+    async def fetch_day_by_channel(
+        self, channel: hikari.SnowflakeishOr[hikari.TextableChannel]
+    ) -> t.Optional[SurpriseDay]:
+        """Fetch a day by channel."""
+        ...
+
+    async def fetch_day_by_user(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], user: hikari.SnowflakeishOr[hikari.PartialUser]
+    ) -> t.Optional[SurpriseDay]:
+        """Fetch a day by guild and user."""
+        ...
+
+    async def fetch_or_create_day(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], user: hikari.SnowflakeishOr[hikari.PartialUser]
+    ) -> SurpriseDay:
+        """Get a surprise day, or create a new one if it doesn't exist."""
+        ...
+
+    async def fetch_surprise_days(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], start: int, end: int, limit: t.Optional[int] = None
+    ) -> t.Sequence[Entry]:
+        """Fetch the (surprise_day, user) pairs of a guild whose surprise day is in [start, end), earliest first."""
+        ...
+
+    async def fetch_occupancy(
+        self, guild: hikari.SnowflakeishOr[hikari.PartialGuild], start: int, end: int
+    ) -> t.Mapping[int, int]:
+        """Count the days of a guild per surprise day in [start, end), leaving out surprise days without any."""
+        ...
+
+    async def create_schema(self) -> None:
+        """Create the schema, or upgrade it to the latest version."""
+        ...
+
+    async def adopt_days(self, guild: hikari.SnowflakeishOr[hikari.PartialGuild]) -> int:
+        """Assign every day created before the guild column existed to a guild."""
+        ...
+
+    async def enqueue_effect(
+        self, key: str, kind: str, guild: int, payload: t.Mapping[str, t.Any], next_attempt: int
+    ) -> bool:
+        """Add a Discord side effect of a guild to the outbox, unless an effect with the same key is already pending."""
+        ...
+
+    async def claim_due_effects(
+        self, now: int, lease: int, limit: int, guilds: t.Optional[t.Collection[int]] = None
+    ) -> t.Sequence[OutboxEntry]:
+        """Claim the outbox entries of some guilds whose next attempt is due, oldest first, by atomically moving their
+        next attempt to lease. Processes sharing the database never claim the same entry at the same time."""
+        ...
+
+    async def reschedule_effect(self, entry: OutboxEntry) -> None:
+        """Sync the attempts, next attempt and last error of an outbox entry."""
+        ...
+
+    async def delete_effect(self, entry: OutboxEntry) -> None:
+        """Remove an outbox entry."""
+        ...
+
+    async def count_effects(self) -> int:
+        """Count the entries in the outbox."""
+        ...
+
+    async def warm_cache(self) -> None:
+        """Load every day into the cache and the calendar index, if they are enabled."""
+        ...
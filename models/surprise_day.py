@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import array
 import datetime
 import typing as t
 
 import attr
-import hikari
+
+Row = t.Tuple[int, int, t.Optional[int], t.Optional[int], int, int, int]
+"""A row of the surprise_days table: id, discord, message, channel, surprise_day, reset_day, guild."""
 
 
 @attr.define()
@@ -14,28 +17,51 @@ class SurpriseDay:
     id: int = attr.field()
     """Entry ID"""
 
-    user: hikari.SnowflakeishOr[hikari.PartialUser] = attr.field()
-    """The user this surprise day belongs to."""
+    user: int = attr.field()
+    """The ID of the user this surprise day belongs to."""
 
-    message: t.Optional[hikari.SnowflakeishOr[hikari.PartialMessage]] = attr.field()
+    message: t.Optional[int] = attr.field()
     """The message ID of the surprise day message. May be None if the user left the guild."""
 
-    channel: t.Optional[hikari.SnowflakeishOr[hikari.TextableChannel]] = attr.field()
+    channel: t.Optional[int] = attr.field()
     """The channel ID of the surprise day channel belonging to this user. May be None if the user left the guild."""
 
-    surprise_day: datetime.datetime = attr.field()
-    """The date and time of the surprise day."""
+    surprise_timestamp: int = attr.field()
+    """The UNIX timestamp of the surprise day."""
+
+    reset_timestamp: int = attr.field()
+    """The UNIX timestamp of the reset day, at this date a new surprise day is generated."""
+
+    guild: int = attr.field()
+    """The ID of the guild this surprise day belongs to. 0 for days created before the bot supported multiple guilds."""
+
+    @property
+    def surprise_day(self) -> datetime.datetime:
+        """The date and time of the surprise day, in UTC."""
+        return datetime.datetime.fromtimestamp(self.surprise_timestamp, datetime.timezone.utc)
 
-    reset_day: datetime.datetime = attr.field()
-    """The date and time of the reset day, at this date a new surprise day is generated."""
+    @surprise_day.setter
+    def surprise_day(self, value: datetime.datetime) -> None:
+        self.surprise_timestamp = int(value.timestamp())
+
+    @property
+    def reset_day(self) -> datetime.datetime:
+        """The date and time of the reset day in UTC, at this date a new surprise day is generated."""
+        return datetime.datetime.fromtimestamp(self.reset_timestamp, datetime.timezone.utc)
+
+    @reset_day.setter
+    def reset_day(self, value: datetime.datetime) -> None:
+        self.reset_timestamp = int(value.timestamp())
 
     @classmethod
-    def from_row(cls, row: t.Tuple[int, str, t.Optional[str], t.Optional[str], int, int]) -> SurpriseDay:
+    def from_row(cls, row: Row) -> SurpriseDay:
         """Create a SurpriseDay object from a database row.
 
+        Every column is stored as an integer, so they are used as-is.
+
         Parameters
         ----------
-        row: t.Tuple[int, str, t.Optional[str], t.Optional[str], int, int]
+        row: Row
             A database row.
 
         Returns
@@ -44,19 +70,12 @@ class SurpriseDay:
             A SurpriseDay object.
         """
 
-        return cls(
-            id=row[0],
-            user=hikari.Snowflake(row[1]),
-            message=hikari.Snowflake(row[2]) if row[2] is not None else None,
-            channel=hikari.Snowflake(row[3]) if row[3] is not None else None,
-            surprise_day=datetime.datetime.fromtimestamp(row[4]),
-            reset_day=datetime.datetime.fromtimestamp(row[5]),
-        )
+        return cls(*row)
 
     def serialize(
         self, with_id: bool = False
-    ) -> t.Tuple[str, t.Optional[str], t.Optional[str], int, int] | t.Tuple[
-        str, t.Optional[str], t.Optional[str], int, int, int
+    ) -> t.Tuple[int, t.Optional[int], t.Optional[int], int, int, int] | t.Tuple[
+        int, t.Optional[int], t.Optional[int], int, int, int, int
     ]:
         """Serialize this object into a tuple representing a row for easy database insertion.
 
@@ -67,24 +86,82 @@ class SurpriseDay:
 
         Returns
         -------
-        t.Tuple[str, t.Optional[str], t.Optional[str], int, int] | t.Tuple[str, t.Optional[str], t.Optional[str], int, int, int]
+        t.Tuple[int, t.Optional[int], t.Optional[int], int, int, int] | t.Tuple[int, t.Optional[int], t.Optional[int], int, int, int, int]
             A tuple representing a row for easy database insertion.
         """
 
         if with_id:
             return (
-                str(hikari.Snowflake(self.user)),
-                str(hikari.Snowflake(self.message)) if self.message is not None else None,
-                str(hikari.Snowflake(self.channel)) if self.channel is not None else None,
-                int(self.surprise_day.timestamp()),
-                int(self.reset_day.timestamp()),
+                self.user,
+                self.message,
+                self.channel,
+                self.surprise_timestamp,
+                self.reset_timestamp,
+                self.guild,
                 self.id,
             )
 
-        return (
-            str(hikari.Snowflake(self.user)),
-            str(hikari.Snowflake(self.message)) if self.message is not None else None,
-            str(hikari.Snowflake(self.channel)) if self.channel is not None else None,
-            int(self.surprise_day.timestamp()),
-            int(self.reset_day.timestamp()),
+        return (self.user, self.message, self.channel, self.surprise_timestamp, self.reset_timestamp, self.guild)
+
+
+class SurpriseDayColumns:
+    """Many surprise days stored column by column, in seven arrays of 64 bit integers.
+
+    This takes a fraction of the memory of the same amount of SurpriseDay objects, which are only created when indexed.
+    A missing message or channel is stored as 0.
+    """
+
+    __slots__: t.Sequence[str] = (
+        "ids",
+        "users",
+        "messages",
+        "channels",
+        "surprise_timestamps",
+        "reset_timestamps",
+        "guilds",
+    )
+
+    def __init__(self) -> None:
+        self.ids: array.array[int] = array.array("q")
+        self.users: array.array[int] = array.array("q")
+        self.messages: array.array[int] = array.array("q")
+        self.channels: array.array[int] = array.array("q")
+        self.surprise_timestamps: array.array[int] = array.array("q")
+        self.reset_timestamps: array.array[int] = array.array("q")
+        self.guilds: array.array[int] = array.array("q")
+
+    @classmethod
+    def from_rows(cls, rows: t.Iterable[Row]) -> SurpriseDayColumns:
+        """Create the columns from database rows."""
+        columns = cls()
+        for row in rows:
+            columns.append(row)
+        return columns
+
+    def append(self, row: Row) -> None:
+        """Add a database row to the end of the columns."""
+        self.ids.append(row[0])
+        self.users.append(row[1])
+        self.messages.append(row[2] or 0)
+        self.channels.append(row[3] or 0)
+        self.surprise_timestamps.append(row[4])
+        self.reset_timestamps.append(row[5])
+        self.guilds.append(row[6])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> SurpriseDay:
+        return SurpriseDay(
+            self.ids[index],
+            self.users[index],
+            self.messages[index] or None,
+            self.channels[index] or None,
+            self.surprise_timestamps[index],
+            self.reset_timestamps[index],
+            self.guilds[index],
         )
+
+    def __iter__(self) -> t.Iterator[SurpriseDay]:
+        for index in range(len(self)):
+            yield self[index]
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import csv
+import datetime
+import json
+import typing as t
+
+import utils
+from models.storage import NewDay
+from models.storage import Storage
+from models.surprise_day import SurpriseDay
+
+FORMATS: t.Sequence[str] = ("ndjson", "csv")
+"""The file formats days can be exported to and imported from."""
+
+FIELDS: t.Sequence[str] = ("id", "guild", "user", "message", "channel", "surprise_day", "reset_day")
+"""The fields of an exported day, in CSV column order. Timestamps are UNIX timestamps, empty IDs are null."""
+
+_OPTIONAL_FIELDS = ("message", "channel")
+
+
+def format_for(path: str) -> str:
+    """Guess the format of a file from its extension, NDJSON unless it ends with .csv."""
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def encode_day(day: SurpriseDay) -> t.Dict[str, t.Optional[int]]:
+    """Convert a day into the record written to an export."""
+    return {
+        "id": day.id,
+        "guild": day.guild,
+        "user": day.user,
+        "message": day.message,
+        "channel": day.channel,
+        "surprise_day": day.surprise_timestamp,
+        "reset_day": day.reset_timestamp,
+    }
+
+
+def decode_day(record: t.Mapping[str, t.Any]) -> NewDay:
+    """Convert a record read from an export into the arguments of Storage.create_day().
+
+    The ID of the record is ignored, imported days get a new one.
+
+    Raises
+    ------
+    ValueError
+        If a field is missing or is not an integer.
+    """
+
+    def field(name: str) -> t.Optional[int]:
+        value = record.get(name)
+        if value is None or value == "":
+            if name in _OPTIONAL_FIELDS:
+                return None
+            raise ValueError(f"Missing field {name!r}")
+        return int(value)
+
+    def timestamp(name: str) -> datetime.datetime:
+        value = field(name)
+        assert value is not None
+        return datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+
+    guild, user = field("guild"), field("user")
+    assert guild is not None and user is not None
+    return (guild, user, field("message"), field("channel"), timestamp("surprise_day"), timestamp("reset_day"))
+
+
+def _read_records(file: t.TextIO, format: str) -> t.Iterator[t.Mapping[str, t.Any]]:
+    if format == "csv":
+        yield from csv.DictReader(file)
+        return
+
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+async def export_days(
+    storage: Storage,
+    file: t.TextIO,
+    format: str = "ndjson",
+    guilds: t.Optional[t.Collection[int]] = None,
+    chunk_size: int = 1000,
+) -> int:
+    """Write every day to a file, streamed from a consistent snapshot of the storage.
+
+    Parameters
+    ----------
+    storage: Storage
+        The storage to export from.
+    file: t.TextIO
+        The file to write to. CSV files should be opened with newline="".
+    format: str
+        One of FORMATS.
+    guilds: t.Optional[t.Collection[int]]
+        Only export the days of these guilds. Defaults to every guild.
+    chunk_size: int
+        The amount of days held in memory at a time.
+
+    Returns
+    -------
+    int
+        The amount of exported days.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {format!r}, expected one of {', '.join(FORMATS)}")
+
+    writer = csv.DictWriter(file, FIELDS) if format == "csv" else None
+    if writer is not None:
+        writer.writeheader()
+
+    exported = 0
+    async for days in storage.iter_days(guilds, chunk_size):
+        if writer is not None:
+            writer.writerows(encode_day(day) for day in days)
+        else:
+            file.writelines(json.dumps(encode_day(day)) + "\n" for day in days)
+        exported += len(days)
+    return exported
+
+
+async def import_days(storage: Storage, file: t.TextIO, format: str = "ndjson", chunk_size: int = 1000) -> int:
+    """Create a day for every record of a file, chunk_size days per transaction.
+
+    A chunk that fails, like one with a user who already has a day, is rolled back and the import stops.
+    Every chunk before it stays imported.
+
+    The storage must not be in use by a running bot, whose cache and calendar index would miss the imported days.
+
+    Parameters
+    ----------
+    storage: Storage
+        The storage to import into.
+    file: t.TextIO
+        The file to read from. CSV files should be opened with newline="".
+    format: str
+        One of FORMATS.
+    chunk_size: int
+        The amount of days held in memory at a time.
+
+    Returns
+    -------
+    int
+        The amount of imported days.
+
+    Raises
+    ------
+    ValueError
+        If a record is invalid. No day of its chunk is imported.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {format!r}, expected one of {', '.join(FORMATS)}")
+
+    imported = 0
+    for records in utils.chunked(enumerate(_read_records(file, format), 1), chunk_size):
+        days: t.List[NewDay] = []
+        for number, record in records:
+            try:
+                days.append(decode_day(record))
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Invalid record {number}: {e}") from e
+        await storage.create_days(days)
+        imported += len(days)
+    return imported
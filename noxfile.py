@@ -14,3 +14,15 @@ def format_fix(session: nox.Session):
     session.install("isort")
     session.run("python", "-m", "black", PATH_TO_PROJECT)
     session.run("python", "-m", "isort", PATH_TO_PROJECT)
+
+
+@nox.session()
+def tests(session: nox.Session):
+    session.install("-r", "requirements-dev.txt")
+    session.run("python", "-m", "pytest", *session.posargs)
+
+
+@nox.session()
+def benchmark(session: nox.Session):
+    session.install("-r", "requirements.txt")
+    session.run("python", "-m", "benchmarks", *session.posargs)
@@ -0,0 +1,177 @@
+import asyncio
+import contextlib
+import itertools
+import os
+import sqlite3
+import typing as t
+import urllib.parse
+
+import pytest
+
+from models.database import Database
+from models.storage import Storage
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+"""A PostgreSQL database to run the storage tests against as well. They only touch schemas named test_*."""
+
+_schema_prefixes = itertools.count()
+
+
+@pytest.fixture()
+def database_path(tmp_path) -> str:
+    """The path of an SQLite database file that doesn't exist yet."""
+    return str(tmp_path / "database.sqlite")
+
+
+@pytest.fixture()
+def open_bot(tmp_path) -> t.Callable[..., t.AsyncContextManager[t.Any]]:
+    """Open a SurpriseBot talking to the FakeREST of the benchmarks, without latency or rate limits.
+
+    The context manager yields the bot and its FakeREST, keyword arguments are passed to the bot.
+    """
+    # The bot needs hikari and lightbulb, which only these tests import.
+    from benchmarks.fake_rest import FakeREST
+    from benchmarks.harness import CATEGORY_ID
+    from benchmarks.harness import GUILD_ID
+    from benchmarks.harness import BenchBot
+
+    @contextlib.asynccontextmanager
+    async def open_bot(**kwargs: t.Any) -> t.AsyncIterator[t.Tuple[t.Any, t.Any]]:
+        rest = FakeREST(
+            GUILD_ID, CATEGORY_ID, latency=0.0, jitter=0.0, route_limit=(1000, 1.0), global_limit=(1000, 1.0)
+        )
+        bot = BenchBot(rest, str(tmp_path / "bot.sqlite"), logs="WARNING", **kwargs)
+        await bot.open_database()
+        try:
+            yield bot, rest
+        finally:
+            if bot.channel_pool is not None:
+                await bot.channel_pool.stop()
+            await bot.offloader.close()
+            await bot.db.close()
+
+    return open_bot
+
+
+class Backend:
+    """Opens empty databases of one Storage implementation."""
+
+    name: str = ""
+    integrity_error: t.Type[Exception] = Exception
+
+    async def connect(
+        self, name: str = "database", cache_size: t.Optional[int] = None, calendar: bool = False
+    ) -> Storage:
+        """Open a new, migrated database. Every name is a separate database."""
+        raise NotImplementedError
+
+    async def fetch(self, storage: Storage, sql: str) -> t.List[t.Tuple[t.Any, ...]]:
+        """Run a query outside of the Storage protocol, to look at what it wrote."""
+        raise NotImplementedError
+
+    def cleanup(self) -> None:
+        """Remove every database opened by connect()."""
+
+
+class SQLiteBackend(Backend):
+    name = "sqlite"
+    integrity_error = sqlite3.IntegrityError
+
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+
+    async def connect(
+        self, name: str = "database", cache_size: t.Optional[int] = None, calendar: bool = False
+    ) -> Storage:
+        database = await Database.connect(
+            os.path.join(self._directory, f"{name}.sqlite"), cache_size=cache_size, read_pool_size=2, calendar=calendar
+        )
+        await database.create_schema()
+        return database
+
+    async def fetch(self, storage: Storage, sql: str) -> t.List[t.Tuple[t.Any, ...]]:
+        assert isinstance(storage, Database)
+        async with storage.connection.execute(sql) as cursor:
+            return [tuple(row) for row in await cursor.fetchall()]
+
+
+class PostgresBackend(Backend):
+    name = "postgres"
+
+    def __init__(self, url: str, prefix: str) -> None:
+        # asyncpg is only installed for PostgreSQL deployments.
+        import asyncpg
+
+        self.integrity_error = asyncpg.UniqueViolationError
+        self._url = url
+        self._prefix = prefix
+        self._schemas: t.List[str] = []
+
+    def dsn(self, schema: str) -> str:
+        """The URL of the database, with schema as the only schema on the search path."""
+        separator = "&" if urllib.parse.urlsplit(self._url).query else "?"
+        return f"{self._url}{separator}search_path={schema}"
+
+    async def create_schema(self, name: str) -> str:
+        import asyncpg
+
+        schema = f"test_{self._prefix}_{name}"
+        connection = await asyncpg.connect(self._url)
+        try:
+            await connection.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema};")
+        finally:
+            await connection.close()
+        self._schemas.append(schema)
+        return schema
+
+    async def connect(
+        self, name: str = "database", cache_size: t.Optional[int] = None, calendar: bool = False
+    ) -> Storage:
+        from models.postgres import PostgresDatabase
+
+        database = await PostgresDatabase.connect(
+            self.dsn(await self.create_schema(name)), cache_size=cache_size, calendar=calendar
+        )
+        await database.create_schema()
+        return database
+
+    async def fetch(self, storage: Storage, sql: str) -> t.List[t.Tuple[t.Any, ...]]:
+        from models.postgres import PostgresDatabase
+
+        assert isinstance(storage, PostgresDatabase)
+        async with storage.pool.acquire() as connection:
+            return [tuple(record) for record in await connection.fetch(sql)]
+
+    def cleanup(self) -> None:
+        import asyncpg
+
+        async def drop() -> None:
+            connection = await asyncpg.connect(self._url)
+            try:
+                for schema in self._schemas:
+                    await connection.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+            finally:
+                await connection.close()
+
+        if self._schemas:
+            asyncio.run(drop())
+
+
+@pytest.fixture()
+def postgres_backend() -> t.Iterator[PostgresBackend]:
+    """The PostgreSQL Storage. Skipped unless DATABASE_URL is set."""
+    if not DATABASE_URL:
+        pytest.skip("DATABASE_URL is not set")
+    backend = PostgresBackend(DATABASE_URL, f"{os.getpid()}_{next(_schema_prefixes)}")
+    try:
+        yield backend
+    finally:
+        backend.cleanup()
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def backend(request, tmp_path) -> Backend:
+    """Every Storage implementation. PostgreSQL is skipped unless DATABASE_URL is set."""
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path))
+    return request.getfixturevalue("postgres_backend")
@@ -0,0 +1,39 @@
+import datetime
+
+import pytest
+
+import utils
+from models.balancer import DayBalancer
+from models.balancer import simulate
+
+NOW = datetime.datetime(2024, 3, 10, tzinfo=datetime.timezone.utc)
+
+
+def test_picks_in_the_surprise_day_range():
+    start_day, end_day, reset_day = utils.surprise_day_range(NOW)
+    occupancy = {}
+    picks = [DayBalancer().pick(occupancy, 1, user, NOW) for user in range(1000)]
+
+    assert all(start_day <= day < end_day and reset == reset_day for day, reset in picks)
+    assert sum(occupancy.values()) == 1000
+
+
+def test_seeded_picks_are_reproducible():
+    balancer = DayBalancer(seed="secret")
+    first = balancer.pick_many({1: {}, 2: {}}, [1, 2] * 50, range(100), NOW)
+    assert balancer.pick_many({1: {}, 2: {}}, [1, 2] * 50, range(100), NOW) == first
+    assert DayBalancer(seed="other").pick_many({1: {}, 2: {}}, [1, 2] * 50, range(100), NOW) != first
+    assert DayBalancer(seed="secret").pick({}, 2, 1, NOW) == (first[0][1], first[1][1])
+
+
+def test_more_choices_spread_days_more_evenly():
+    uniform = simulate(DayBalancer(seed="secret", choices=1), 5000, NOW)
+    balanced = simulate(DayBalancer(seed="secret", choices=3), 5000, NOW)
+
+    assert sum(uniform) == sum(balanced) == 5000
+    assert max(balanced) - min(balanced) < max(uniform) - min(uniform)
+
+
+def test_needs_a_choice():
+    with pytest.raises(ValueError):
+        DayBalancer(choices=0)
@@ -0,0 +1,56 @@
+from models.calendar_index import CalendarIndex
+from models.surprise_day import SurpriseDay
+
+
+def day(guild: int, user: int, surprise_timestamp: int) -> SurpriseDay:
+    return SurpriseDay(user, user, None, None, surprise_timestamp, 0, guild)
+
+
+def test_between_bounds():
+    index = CalendarIndex()
+    index.fill([day(1, 3, 200), day(1, 1, 100), day(1, 2, 100), day(1, 4, 300), day(2, 5, 100)])
+
+    assert index.between(1, 100, 300) == [(100, 1), (100, 2), (200, 3)]
+    # start is inclusive, end exclusive, for every user on the boundary.
+    assert index.between(1, 101, 301) == [(200, 3), (300, 4)]
+    assert index.between(1, 0, 100) == []
+    assert index.between(1, 100, 100) == []
+    assert index.between(1, 300, 2**63 - 1) == [(300, 4)]
+    assert index.between(3, 0, 2**63 - 1) == []
+
+
+def test_between_limit():
+    index = CalendarIndex()
+    index.fill([day(1, user, 100 * user) for user in range(1, 6)])
+
+    assert index.between(1, 200, 2**63 - 1, limit=2) == [(200, 2), (300, 3)]
+    assert index.between(1, 200, 400, limit=10) == [(200, 2), (300, 3)]
+    assert index.between(1, 0, 2**63 - 1, limit=0) == []
+
+
+def test_put_and_discard():
+    index = CalendarIndex()
+    index.fill([day(1, 1, 100), day(1, 2, 200)])
+
+    index.put(day(1, 3, 150))
+    index.put(day(1, 1, 300))  # Moves the day instead of adding a second one.
+    index.put(day(1, 2, 200))
+    index.discard(1, 2)
+    index.discard(1, 42)
+    assert index.between(1, 0, 1000) == [(150, 3), (300, 1)]
+    assert len(index) == 2
+
+    index.clear()
+    assert len(index) == 0 and not index.is_complete and index.between(1, 0, 1000) == []
+
+
+def test_fill_ignores_days_read_before_a_write():
+    index = CalendarIndex()
+    generation = index.generation
+    index.put(day(1, 2, 200))
+
+    index.fill([day(1, 1, 100)], generation)
+    assert not index.is_complete and index.between(1, 0, 1000) == [(200, 2)]
+
+    index.fill([day(1, 1, 100), day(1, 2, 200)], index.generation)
+    assert index.is_complete and index.between(1, 0, 1000) == [(100, 1), (200, 2)]
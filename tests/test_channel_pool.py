@@ -0,0 +1,166 @@
+import asyncio
+import time
+
+import pytest
+
+from models.channel_pool import SPARE_CHANNEL_NAME
+from models.channel_pool import ChannelPool
+
+
+def test_claims_spares_in_order():
+    async def main():
+        async def create(guild: int) -> int:
+            raise AssertionError("Nothing should be created")
+
+        pool = ChannelPool(create, 3)
+        pool.load(1, [11, 12])
+        assert (pool.claim(1), pool.claim(1), pool.claim(1)) == (11, 12, None)
+        assert pool.claim(2) is None
+        assert len(pool) == 0
+
+    asyncio.run(main())
+
+
+def test_refill_is_rate_limited():
+    async def main():
+        created = []
+
+        async def create(guild: int) -> int:
+            created.append((guild, time.monotonic()))
+            return 100 + len(created)
+
+        pool = ChannelPool(create, 2, rate=20.0)
+        pool.load(1, [])
+        pool.load(2, [50])
+        assert await pool.refill() == 3
+        assert pool.spares(1) == 2 and pool.spares(2) == 2
+        assert [guild for guild, _ in created] == [1, 1, 2]
+        # At most rate channels per second.
+        assert all(later - earlier >= 0.045 for (_, earlier), (_, later) in zip(created, created[1:]))
+        assert await pool.refill() == 0
+
+    asyncio.run(main())
+
+
+def test_refill_skips_a_guild_that_fails():
+    async def main():
+        async def create(guild: int) -> int:
+            if guild == 1:
+                raise RuntimeError("Missing permissions")
+            return 200
+
+        pool = ChannelPool(create, 1, rate=1000.0)
+        pool.load(1, [])
+        pool.load(2, [])
+        assert await pool.refill() == 1
+        assert pool.spares(1) == 0 and pool.spares(2) == 1
+
+    asyncio.run(main())
+
+
+def test_claims_are_refilled_in_the_background():
+    async def main():
+        created = []
+
+        async def create(guild: int) -> int:
+            created.append(guild)
+            return 300 + len(created)
+
+        pool = ChannelPool(create, 1, rate=1000.0)
+        pool.load(1, [11])
+        pool.start()
+        try:
+            assert pool.claim(1) == 11
+            for _ in range(100):
+                if pool.spares(1):
+                    break
+                await asyncio.sleep(0.01)
+            assert pool.claim(1) == 301
+        finally:
+            await pool.stop()
+
+    asyncio.run(main())
+
+
+def test_needs_a_positive_rate():
+    async def create(guild: int) -> int:
+        return 0
+
+    with pytest.raises(ValueError):
+        ChannelPool(create, 1, rate=0)
+
+
+def test_provision_claims_a_spare(open_bot):
+    from benchmarks.fake_rest import FakeMember
+
+    async def main():
+        async with open_bot(channel_pool_size=1) as (bot, rest):
+            spare = await bot._create_spare_channel(rest.guild_id)
+            bot.channel_pool.load(rest.guild_id, [spare])
+            rest.calls.clear()
+
+            member = FakeMember(rest.next_id(), "alice")
+            await bot.provision_member(rest.guild_id, member)
+
+            day = await bot.db.fetch_day_by_user(rest.guild_id, member)
+            assert day.channel == spare and bot.channel_pool.spares(rest.guild_id) == 0
+            # The spare is renamed after the member and stays in the category, it isn't created again.
+            channel = rest.channels[spare]
+            assert channel.name == "alice" and channel.parent_id == rest.category_id
+            assert rest.messages[day.message].channel_id == spare and rest.messages[day.message].pinned
+            assert rest.calls["create_guild_channel"] == 0
+
+    asyncio.run(main())
+
+
+def test_provision_without_spares_creates_a_channel(open_bot):
+    from benchmarks.fake_rest import FakeMember
+
+    async def main():
+        async with open_bot(channel_pool_size=1) as (bot, rest):
+            deleted = await bot._create_spare_channel(rest.guild_id)
+            del rest.channels[deleted]
+            bot.channel_pool.load(rest.guild_id, [deleted])
+
+            # The first member claims a spare that was deleted, the second finds the pool empty.
+            for name in ("alice", "bob"):
+                member = FakeMember(rest.next_id(), name)
+                await bot.provision_member(rest.guild_id, member)
+                day = await bot.db.fetch_day_by_user(rest.guild_id, member)
+                channel = rest.channels[day.channel]
+                assert day.channel != deleted and channel.name == name and channel.parent_id == rest.category_id
+
+            assert rest.calls["create_guild_channel"] == 3
+
+    asyncio.run(main())
+
+
+def test_provision_error_keeps_the_channel(open_bot):
+    from benchmarks.fake_rest import FakeMember
+    from models.bot import ProvisionError
+
+    async def main():
+        async with open_bot(channel_pool_size=1) as (bot, rest):
+            spare = await bot._create_spare_channel(rest.guild_id)
+            bot.channel_pool.load(rest.guild_id, [spare])
+
+            async def create_message(channel, content):
+                raise RuntimeError("Discord is down")
+
+            rest.create_message = create_message
+            member = FakeMember(rest.next_id(), "alice")
+            with pytest.raises(ProvisionError) as error:
+                await bot.provision_member(rest.guild_id, member)
+            assert error.value.channel_id == spare
+
+            # The channel is saved without a message, so the retry reuses it.
+            day = await bot.db.fetch_day_by_user(rest.guild_id, member)
+            assert day.channel == spare and day.message is None
+
+            del rest.create_message
+            await bot.provision_member(rest.guild_id, member)
+            day = await bot.db.fetch_day_by_user(rest.guild_id, member)
+            assert day.channel == spare and rest.messages[day.message].pinned
+            assert [channel.name for channel in rest.channels.values()].count(SPARE_CHANNEL_NAME) == 0
+
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+
+import hikari
+import pytest
+
+SURPRISE_DAY = datetime.datetime(2030, 5, 17, tzinfo=datetime.timezone.utc)
+RESET_DAY = datetime.datetime(2031, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def test_transaction_commits_every_write(backend):
+    async def main():
+        database = await backend.connect(cache_size=100, calendar=True)
+        try:
+            async with database.transaction():
+                first = await database.create_day(1, 10, None, None, SURPRISE_DAY, RESET_DAY)
+                async with database.transaction():
+                    second = await database.create_day(1, 11, None, None, SURPRISE_DAY, RESET_DAY)
+                # Reads inside the transaction see its own writes.
+                assert sorted(await database.fetch_days([first.id, second.id]), key=lambda day: day.id) == [
+                    first,
+                    second,
+                ]
+
+            database.cache.clear()
+            assert await database.fetch_day_by_user(1, 11) == second
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+def test_nested_transaction_rolls_back_with_the_outer_one(backend):
+    async def main():
+        database = await backend.connect(cache_size=100, calendar=True)
+        try:
+            kept = await database.create_day(1, 10, None, None, SURPRISE_DAY, RESET_DAY)
+            await database.warm_cache()
+            assert database.cache.is_complete and database.calendar.is_complete
+
+            with pytest.raises(RuntimeError):
+                async with database.transaction():
+                    async with database.transaction():
+                        await database.create_day(1, 11, None, None, SURPRISE_DAY, RESET_DAY)
+                    kept.surprise_day = RESET_DAY
+                    await database.update_day(kept)
+                    raise RuntimeError
+
+            # The cache and the calendar saw the rolled back writes, so they must not be trusted anymore.
+            assert len(database.cache) == 0 and not database.cache.is_complete
+            assert len(database.calendar) == 0 and not database.calendar.is_complete
+
+            assert await database.fetch_day_by_user(1, 11) is None
+            day = await database.fetch_day_by_user(1, 10)
+            assert day is not None and day.surprise_day == SURPRISE_DAY
+            assert await database.fetch_surprise_days(1, 0, 2**40) == [(int(SURPRISE_DAY.timestamp()), 10)]
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+def test_bulk_writes(backend):
+    async def main():
+        database = await backend.connect()
+        try:
+            days = await database.create_days(
+                [
+                    (guild, user, user + 100, user + 200, SURPRISE_DAY, RESET_DAY)
+                    for guild in (1, 2)
+                    for user in range(100)
+                ]
+            )
+            assert [(day.guild, day.user, day.message, day.channel) for day in days] == [
+                (guild, user, user + 100, user + 200) for guild in (1, 2) for user in range(100)
+            ]
+            assert len({day.id for day in days}) == 200
+            assert sorted(await database.fetch_all_days(), key=lambda day: day.id) == days
+
+            for day in days[:60]:
+                day.surprise_day += datetime.timedelta(days=day.user)
+                day.message = None
+            await database.update_days(days[:60])
+            await database.delete_days(days[40:])
+            assert sorted(await database.fetch_all_days(), key=lambda day: day.id) == days[:40]
+            assert await database.fetch_occupancy(1, 0, 2**40) == {
+                int((SURPRISE_DAY + datetime.timedelta(days=user)).timestamp()): 1 for user in range(40)
+            }
+
+            assert await database.create_days([]) == []
+            await database.update_days([])
+            await database.delete_days([])
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize(
+    "duplicates",
+    [
+        [(1, 11, None, None, SURPRISE_DAY, RESET_DAY), (1, 10, None, None, SURPRISE_DAY, RESET_DAY)],
+        [(1, 12, None, None, SURPRISE_DAY, RESET_DAY), (1, 12, None, None, SURPRISE_DAY, RESET_DAY)],
+    ],
+    ids=["existing", "repeated"],
+)
+def test_create_days_creates_none_if_one_fails(backend, duplicates):
+    async def main():
+        database = await backend.connect(cache_size=100, calendar=True)
+        try:
+            await database.create_day(1, 10, 100, None, SURPRISE_DAY, RESET_DAY)
+            with pytest.raises(backend.integrity_error):
+                await database.create_days(duplicates)
+
+            # Existing days are never overwritten.
+            database.cache.clear()
+            assert [(day.user, day.message) for day in await database.fetch_all_days()] == [(10, 100)]
+            assert await database.fetch_day_by_user(1, 11) is None
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+def test_closed_database_rejects_transactions(backend):
+    async def main():
+        database = await backend.connect()
+        await database.close()
+        with pytest.raises(hikari.ComponentStateConflictError):
+            async with database.transaction():
+                pass
+
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+import pytest
+
+from models.day_cache import DayCache
+from models.surprise_day import SurpriseDay
+
+
+def day(user: int, channel=None, guild: int = 1) -> SurpriseDay:
+    return SurpriseDay(user, user, None, channel, 100, 200, guild)
+
+
+def test_evicts_the_least_recently_used_day():
+    cache = DayCache(2)
+    cache.fill([day(1, channel=11), day(2, channel=12)])
+    assert cache.is_complete
+
+    # Reading a day makes it the most recently used one.
+    assert cache.get_by_user(1, 1) == day(1, channel=11)
+    cache.put(day(3, channel=13))
+
+    assert cache.get_by_user(1, 2) is None and cache.get_by_channel(12) is None
+    assert cache.get_by_channel(11) == day(1, channel=11)
+    assert cache.get_by_channel(13) == day(3, channel=13)
+    # An evicted day may still exist, so a miss doesn't mean anything anymore.
+    assert not cache.is_complete and len(cache) == 2
+
+
+def test_fill_of_too_many_days_is_incomplete():
+    cache = DayCache(2)
+    cache.fill([day(1), day(2), day(3)])
+    assert not cache.is_complete and len(cache) == 2
+
+
+def test_replacing_a_day_moves_its_channel():
+    cache = DayCache(10)
+    cache.put(day(1, channel=11))
+    cache.put(day(1, channel=21))
+    assert cache.get_by_channel(11) is None
+    assert cache.get_by_channel(21) == day(1, channel=21)
+
+    cache.put(day(1))
+    assert cache.get_by_channel(21) is None and cache.get_by_user(1, 1) == day(1)
+
+    cache.put(day(2, channel=12))
+    cache.discard(1, 2)
+    assert cache.get_by_channel(12) is None and len(cache) == 1
+
+
+def test_days_are_copied():
+    cache = DayCache(10)
+    original = day(1)
+    cache.put(original)
+    original.message = 42
+    cached = cache.get_by_user(1, 1)
+    cached.message = 43
+    assert cache.get_by_user(1, 1).message is None
+
+
+def test_reads_are_ignored_after_a_write():
+    cache = DayCache(10)
+
+    generation = cache.generation
+    cache.put(day(1, channel=11))
+    cache.put_read(day(1), generation)
+    assert cache.get_by_user(1, 1) == day(1, channel=11)
+
+    generation = cache.generation
+    cache.discard(1, 1)
+    cache.put_read(day(1, channel=11), generation)
+    assert cache.get_by_user(1, 1) is None
+
+    generation = cache.generation
+    cache.clear()
+    cache.put_read(day(2), generation)
+    cache.fill([day(1, channel=11)], generation)
+    assert len(cache) == 0 and not cache.is_complete
+
+    # Without a write in between, reads are cached, but never replace a cached day.
+    generation = cache.generation
+    cache.put_read(day(2), generation)
+    cache.put_read(day(2, channel=12), generation)
+    assert cache.get_by_user(1, 2) == day(2)
+    cache.fill([day(3)], cache.generation)
+    assert cache.is_complete and cache.get_by_user(1, 3) == day(3) and cache.get_by_user(1, 2) is None
+
+
+def test_needs_room_for_a_day():
+    with pytest.raises(ValueError):
+        DayCache(0)
@@ -0,0 +1,86 @@
+import asyncio
+
+from models.event_queue import CoalescingQueue
+
+
+async def wait_until_processed(queue: CoalescingQueue, count: int) -> None:
+    async def poll():
+        while queue.processed < count:
+            await asyncio.sleep(0.005)
+
+    await asyncio.wait_for(poll(), 5)
+
+
+def test_keeps_only_the_latest_event_per_key():
+    async def main():
+        handled = []
+
+        async def handler(event):
+            handled.append(event)
+
+        queue = CoalescingQueue(handler, linger=0.01)
+        queue.put(1, "join 1")
+        queue.put(2, "join 2")
+        queue.put(1, "leave 1")
+        queue.put(1, "join 1 again")
+        assert queue.depth == 2 and queue.coalesced == 2
+
+        queue.start()
+        try:
+            await wait_until_processed(queue, 2)
+        finally:
+            await queue.stop()
+
+        # Events keep the position their key was first queued at.
+        assert handled == ["join 1 again", "join 2"]
+        assert queue.depth == 0 and queue.lag == 0.0
+
+    asyncio.run(main())
+
+
+def test_processes_every_key_in_batches():
+    async def main():
+        handled = []
+
+        async def handler(event):
+            handled.append(event)
+
+        queue = CoalescingQueue(handler, batch_size=3, linger=0.01)
+        for key in range(10):
+            queue.put(key, key)
+
+        queue.start()
+        try:
+            await wait_until_processed(queue, 10)
+        finally:
+            await queue.stop()
+
+        assert sorted(handled) == list(range(10)) and queue.coalesced == 0
+
+    asyncio.run(main())
+
+
+def test_failed_events_do_not_stop_the_queue():
+    async def main():
+        handled = []
+
+        async def handler(event):
+            if event == "bad":
+                raise RuntimeError(event)
+            handled.append(event)
+
+        queue = CoalescingQueue(handler, linger=0.01)
+        queue.put(1, "bad")
+        queue.put(2, "good")
+
+        queue.start()
+        try:
+            await wait_until_processed(queue, 2)
+            queue.put(3, "later")
+            await wait_until_processed(queue, 3)
+        finally:
+            await queue.stop()
+
+        assert handled == ["good", "later"] and queue.failed == 1
+
+    asyncio.run(main())
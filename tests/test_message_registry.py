@@ -0,0 +1,106 @@
+import asyncio
+import random
+
+from models.message_registry import MessageRegistry
+
+
+def test_tracks_valid_and_deleted_messages():
+    registry = MessageRegistry()
+    assert not registry.is_valid(1) and not registry.is_deleted(1)
+
+    registry.mark_valid(1)
+    registry.mark_valid(2)
+    assert registry.is_valid(1) and not registry.is_deleted(1) and len(registry) == 2
+
+    registry.mark_deleted(1)
+    assert not registry.is_valid(1) and registry.is_deleted(1) and len(registry) == 1
+
+    registry.forget(1)
+    registry.forget(2)
+    registry.forget(3)
+    assert not registry.is_deleted(1) and not registry.is_valid(2) and len(registry) == 0
+
+
+async def seed_expired(bot, rest):
+    from benchmarks.fake_rest import FakeMember
+    from benchmarks.harness import seed_members
+
+    member = FakeMember(rest.next_id(), "alice")
+    await seed_members(bot, rest, [member], 1, random.Random(0))
+    return await bot.db.fetch_day_by_user(rest.guild_id, member)
+
+
+async def reset(bot, day):
+    # The reset updates the day in place, the old message is returned alongside the stored day.
+    message, reset_day = day.message, day.reset_day
+    stats = await bot.reset_days([day])
+    assert stats.processed == 1 and stats.failed == 0
+    new = await bot.db.fetch_day_by_user(day.guild, day.user)
+    assert new.reset_day > reset_day
+    return message, new
+
+
+def test_reset_edits_the_pinned_message(open_bot):
+    async def main():
+        async with open_bot() as (bot, rest):
+            day = await seed_expired(bot, rest)
+            rest.calls.clear()
+
+            old, new = await reset(bot, day)
+            assert new.message == old
+            message = rest.messages[old]
+            assert message.pinned and f"<t:{int(new.surprise_day.timestamp())}>" in message.content
+            assert bot.messages.is_valid(old)
+            assert rest.calls["edit_message"] == 1
+            assert rest.calls["create_message"] == rest.calls["delete_message"] == rest.calls["pin_message"] == 0
+
+    asyncio.run(main())
+
+
+def test_reset_recreates_a_message_that_is_gone(open_bot):
+    async def main():
+        async with open_bot() as (bot, rest):
+            day = await seed_expired(bot, rest)
+            del rest.messages[day.message]
+            rest.calls.clear()
+
+            old, new = await reset(bot, day)
+            # The new message is stored, and the old one isn't tracked anymore.
+            assert new.message != old and rest.messages[new.message].pinned
+            assert rest.messages[new.message].channel_id == new.channel
+            assert bot.messages.is_valid(new.message) and not bot.messages.is_deleted(old)
+            # Editing found the message gone, so it isn't deleted again.
+            assert rest.calls["edit_message"] == rest.calls["create_message"] == rest.calls["pin_message"] == 1
+            assert rest.calls["delete_message"] == 0
+
+    asyncio.run(main())
+
+
+def test_reset_replaces_the_message_without_editing(open_bot):
+    async def main():
+        async with open_bot(reset_edits_messages=False) as (bot, rest):
+            day = await seed_expired(bot, rest)
+            rest.calls.clear()
+
+            old, new = await reset(bot, day)
+            assert old not in rest.messages and rest.messages[new.message].pinned
+            assert rest.calls["delete_message"] == rest.calls["create_message"] == rest.calls["pin_message"] == 1
+            assert rest.calls["edit_message"] == 0
+
+    asyncio.run(main())
+
+
+def test_reset_skips_messages_known_to_be_deleted(open_bot):
+    async def main():
+        async with open_bot() as (bot, rest):
+            day = await seed_expired(bot, rest)
+            del rest.messages[day.message]
+            bot.messages.mark_deleted(day.message)
+            rest.calls.clear()
+
+            old, new = await reset(bot, day)
+            assert new.message != old and rest.messages[new.message].pinned
+            assert rest.calls["edit_message"] == rest.calls["delete_message"] == 0
+            assert rest.calls["create_message"] == rest.calls["pin_message"] == 1
+
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+import asyncio
+
+from models import metrics
+
+
+def test_render_histogram():
+    registry = metrics.Registry()
+    registry.describe("request_seconds", "Time spent on requests.")
+    for seconds in (0.002, 0.02, 0.02, 20.0):
+        registry.observe("request_seconds", seconds, method="get")
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP request_seconds Time spent on requests.", "# TYPE request_seconds histogram"]
+    buckets = {line.split('le="')[1].split('"')[0]: int(line.rsplit(" ", 1)[1]) for line in lines if "_bucket" in line}
+    # Every bucket counts the observations up to its bound, including those of the smaller buckets.
+    assert buckets["0.001"] == 0
+    assert buckets["0.005"] == 1
+    assert buckets["0.025"] == 3
+    assert buckets["10.0"] == 3
+    assert buckets["+Inf"] == 4
+    assert list(buckets.values()) == sorted(buckets.values())
+    assert lines[-3] == 'request_seconds_bucket{method="get",le="+Inf"} 4'
+    assert lines[-2].startswith('request_seconds_sum{method="get"} 20.04')
+    assert lines[-1] == 'request_seconds_count{method="get"} 4'
+
+
+def test_render_escapes_label_values_and_help():
+    registry = metrics.Registry()
+    registry.describe("errors_total", "Errors, by\nmessage \\ type.")
+    registry.inc("errors_total", message='quote " backslash \\ newline \n end')
+
+    assert registry.render().splitlines() == [
+        "# HELP errors_total Errors, by\\nmessage \\\\ type.",
+        "# TYPE errors_total counter",
+        'errors_total{message="quote \\" backslash \\\\ newline \\n end"} 1.0',
+    ]
+
+
+def test_render_skips_failing_gauges():
+    def broken() -> float:
+        raise RuntimeError("not ready")
+
+    registry = metrics.Registry()
+    registry.gauge("broken", broken)
+    registry.gauge("depth", lambda: 3, help="Queue depth.")
+
+    assert registry.render().splitlines() == [
+        "# TYPE broken gauge",
+        "# HELP depth Queue depth.",
+        "# TYPE depth gauge",
+        "depth 3.0",
+    ]
+
+
+def test_timed_records_reentrant_calls_separately():
+    @metrics.timed("test_timed_seconds")
+    async def inner() -> int:
+        return 1
+
+    @metrics.timed("test_timed_seconds")
+    async def outer() -> int:
+        return await inner() + await inner()
+
+    async def main():
+        assert await outer() == 2
+        assert await inner() == 1
+
+    asyncio.run(main())
+    assert metrics.nested_name("test_timed_seconds") == "test_timed_nested_seconds"
+    lines = metrics.REGISTRY.render().splitlines()
+    assert 'test_timed_seconds_count{method="outer"} 1' in lines
+    assert 'test_timed_seconds_count{method="inner"} 1' in lines
+    assert 'test_timed_nested_seconds_count{method="inner"} 2' in lines
+    assert not any(line.startswith('test_timed_nested_seconds_count{method="outer"}') for line in lines)
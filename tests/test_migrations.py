@@ -0,0 +1,105 @@
+import asyncio
+
+import aiosqlite
+
+from models import migrations
+from models.database import Database
+
+BASELINE_SCHEMA = """CREATE TABLE "surprise_days" (
+    "id"	INTEGER NOT NULL UNIQUE,
+    "discord"	TEXT NOT NULL UNIQUE,
+    "message"	TEXT,
+    "channel"	TEXT,
+    "surprise_day"	INTEGER NOT NULL,
+    "reset_day"	INTEGER NOT NULL,
+    PRIMARY KEY("id" AUTOINCREMENT)
+);"""
+"""The table created by the bot before schema versions existed, which left user_version at 0."""
+
+
+async def fetch_all(connection: aiosqlite.Connection, sql: str):
+    async with connection.execute(sql) as cursor:
+        return await cursor.fetchall()
+
+
+def test_migrate_baseline_database(database_path):
+    async def main():
+        async with aiosqlite.connect(database_path) as connection:
+            await connection.execute(BASELINE_SCHEMA)
+            await connection.executemany(
+                "INSERT INTO surprise_days(discord, message, channel, surprise_day, reset_day) VALUES (?,?,?,?,?)",
+                [("111", "211", "311", 1000, 2000), ("112", None, None, 1000, 3000), ("113", "213", "313", 1500, 2000)],
+            )
+            await connection.commit()
+
+            assert await migrations.migrate(connection) == len(migrations.MIGRATIONS)
+            assert await migrations.fetch_version(connection) == len(migrations.MIGRATIONS)
+
+            rows = await fetch_all(
+                connection,
+                "SELECT id, typeof(discord), discord, message, channel, surprise_day, reset_day, guild"
+                " FROM surprise_days ORDER BY id",
+            )
+            assert rows == [
+                (1, "integer", 111, 211, 311, 1000, 2000, 0),
+                (2, "integer", 112, None, None, 1000, 3000, 0),
+                (3, "integer", 113, 213, 313, 1500, 2000, 0),
+            ]
+            assert await fetch_all(
+                connection, "SELECT guild, surprise_day, days FROM surprise_day_occupancy ORDER BY surprise_day"
+            ) == [(0, 1000, 2), (0, 1500, 1)]
+            indexes = {
+                name for (name,) in await fetch_all(connection, "SELECT name FROM sqlite_master WHERE type='index'")
+            }
+            assert {"surprise_days_channel", "surprise_days_reset_day", "surprise_days_guild_surprise_day"} <= indexes
+
+            # Migrating an up to date database does nothing.
+            assert await migrations.migrate(connection) == len(migrations.MIGRATIONS)
+
+        database = await Database.connect(database_path)
+        try:
+            await database.create_schema()
+            assert await database.adopt_days(5) == 3
+            assert [(day.guild, day.user) for day in await database.fetch_all_days()] == [(5, 111), (5, 112), (5, 113)]
+            assert await database.fetch_occupancy(5, 0, 2000) == {1000: 2, 1500: 1}
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+def test_migrate_new_database(database_path):
+    async def main():
+        async with aiosqlite.connect(database_path) as connection:
+            assert await migrations.fetch_version(connection) == 0
+            assert await migrations.migrate(connection) == len(migrations.MIGRATIONS)
+            assert await fetch_all(connection, "SELECT * FROM surprise_days") == []
+
+    asyncio.run(main())
+
+
+def test_outbox_guild_backfill(database_path):
+    async def main():
+        async with aiosqlite.connect(database_path) as connection:
+            # Stop right before the outbox had a guild column.
+            for version, migration in enumerate(migrations.MIGRATIONS[:-1], start=1):
+                await migration(connection)
+                await connection.execute(f"PRAGMA user_version = {version};")
+            await connection.execute(
+                "INSERT INTO surprise_days(discord, message, channel, surprise_day, reset_day, guild)"
+                " VALUES (1, NULL, NULL, 0, 0, 77)"
+            )
+            await connection.executemany(
+                "INSERT INTO outbox(key, kind, payload, next_attempt) VALUES (?, 'edit', ?, 0)",
+                [("a", '{"guild": 11}'), ("b", '{"id": 1}'), ("c", '{"id": 2}')],
+            )
+            await connection.commit()
+
+            assert await migrations.migrate(connection) == len(migrations.MIGRATIONS)
+            assert await fetch_all(connection, "SELECT key, guild FROM outbox ORDER BY key") == [
+                ("a", 11),
+                ("b", 77),
+                ("c", 0),
+            ]
+
+    asyncio.run(main())
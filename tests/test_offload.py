@@ -0,0 +1,107 @@
+import array
+import asyncio
+import contextlib
+import datetime
+import os
+import subprocess
+import sys
+
+import pytest
+
+import utils
+from models import bulk
+from models.offload import Offloader
+
+NOW = datetime.datetime(2030, 5, 17, 12, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture(params=[0, 1], ids=["in-process", "worker-process"])
+def offloader(request) -> Offloader:
+    """An Offloader running functions on the event loop, and one running them in a spawned worker process."""
+    return Offloader(request.param)
+
+
+def test_runs_in_a_worker_process(offloader):
+    async def main():
+        try:
+            return await offloader.run(os.getpid)
+        finally:
+            await offloader.close()
+
+    assert (asyncio.run(main()) != os.getpid()) == bool(offloader.workers)
+
+
+def test_diff_members(offloader):
+    async def main():
+        try:
+            return await offloader.run(
+                bulk.diff_members,
+                array.array("q", [1, 2, 3]),
+                array.array("q", [10, 0, 30]),
+                array.array("q", [2, 3, 4]),
+                array.array("q", [10]),
+            )
+        finally:
+            await offloader.close()
+
+    departed, missing, lost_members, lost_days = asyncio.run(main())
+    # User 1 left with a channel, member 4 has no day, the channels of members 2 and 3 are gone.
+    assert list(departed) == [0]
+    assert list(missing) == [2]
+    assert list(lost_members) == [0, 1]
+    assert list(lost_days) == [1, 2]
+
+
+def test_reroll(offloader):
+    async def main():
+        try:
+            return await offloader.run(bulk.reroll, 50, NOW.timestamp())
+        finally:
+            await offloader.close()
+
+    surprise_days, reset_days = asyncio.run(main())
+    start_day, end_day, reset_day = utils.surprise_day_range(NOW)
+    assert len(surprise_days) == len(reset_days) == 50
+    assert all(start_day <= day < end_day for day in surprise_days)
+    assert set(reset_days) == {reset_day}
+
+
+def test_map_yields_results_in_order(offloader):
+    async def main():
+        consumed = []
+
+        def chunks():
+            for count in range(6):
+                consumed.append(count)
+                yield count, NOW.timestamp()
+
+        try:
+            results = [len(surprise_days) async for surprise_days, _ in offloader.map(bulk.reroll, chunks(), 2)]
+            assert results == list(range(6)) and consumed == list(range(6))
+
+            # Stopping early cancels the calls running ahead, and leaves the rest of the chunks alone.
+            consumed.clear()
+            async with contextlib.aclosing(offloader.map(bulk.reroll, chunks(), 2)) as rerolls:
+                assert len((await anext(rerolls))[0]) == 0
+            assert len(consumed) <= 3
+        finally:
+            await offloader.close()
+
+    asyncio.run(main())
+
+
+def test_needs_a_non_negative_amount_of_workers():
+    with pytest.raises(ValueError):
+        Offloader(-1)
+
+
+def test_main_is_import_light():
+    # Spawned worker processes run main.py under this name, they must not import the bot with it.
+    code = (
+        "import runpy, sys;"
+        "runpy.run_path('main.py', run_name='__mp_main__');"
+        "print(','.join(sorted(name for name in ('hikari', 'lightbulb', 'models.bot') if name in sys.modules)))"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
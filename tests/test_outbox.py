@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+from models.outbox import Outbox
+
+
+async def fetch_entries(backend, database):
+    return await backend.fetch(
+        database, "SELECT key, guild, attempts, next_attempt, last_error FROM outbox ORDER BY key"
+    )
+
+
+def test_applies_and_deletes_effects(backend):
+    async def main():
+        database = await backend.connect()
+        try:
+            applied = []
+
+            async def handler(payload):
+                applied.append(payload)
+
+            outbox = Outbox(database, {"edit": handler})
+            assert await outbox.enqueue("edit", "a", 1, {"id": 1})
+            # The same key is only queued once.
+            assert not await outbox.enqueue("edit", "a", 1, {"id": 2})
+            assert await outbox.enqueue("edit", "b", 1, {"id": 3}, delay=3600)
+
+            assert await outbox.process_due() == 1
+            assert applied == [{"id": 1}]
+            assert [key for key, *_ in await fetch_entries(backend, database)] == ["b"]
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+def test_failed_effects_back_off(backend):
+    async def main():
+        database = await backend.connect()
+        try:
+
+            async def handler(payload):
+                raise RuntimeError("Discord is down")
+
+            outbox = Outbox(database, {"edit": handler}, base_delay=10.0)
+            await outbox.enqueue("edit", "a", 1, {})
+
+            before = int(time.time())
+            assert await outbox.process_due() == 1
+            [(key, guild, attempts, next_attempt, last_error)] = await fetch_entries(backend, database)
+            assert (key, guild, attempts, last_error) == ("a", 1, 1, "RuntimeError: Discord is down")
+            assert before + 5 <= next_attempt <= int(time.time()) + 10
+            # Not due again until the backoff ran out.
+            assert await outbox.process_due() == 0
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+def test_drops_effects_after_max_attempts(backend):
+    async def main():
+        database = await backend.connect()
+        try:
+            attempts = 0
+
+            async def handler(payload):
+                nonlocal attempts
+                attempts += 1
+                raise RuntimeError("Missing permissions")
+
+            # Without a delay retries are due right away, so they are attempted in the same call.
+            outbox = Outbox(database, {"edit": handler}, base_delay=0.0, max_attempts=3)
+            await outbox.enqueue("edit", "a", 1, {})
+
+            assert await outbox.process_due() == 3
+            assert attempts == 3
+            assert await database.count_effects() == 0
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+def test_only_claims_effects_of_its_guilds(backend):
+    async def main():
+        database = await backend.connect()
+        try:
+            applied = []
+
+            async def handler(payload):
+                applied.append(payload["guild"])
+
+            outbox = Outbox(database, {"edit": handler}, guilds=lambda: [1, 3])
+            for guild in (1, 2, 3):
+                await outbox.enqueue("edit", str(guild), guild, {"guild": guild})
+
+            assert await outbox.process_due() == 2
+            assert sorted(applied) == [1, 3]
+            assert [key for key, *_ in await fetch_entries(backend, database)] == ["2"]
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+def test_claimed_effects_are_leased(backend):
+    async def main():
+        database = await backend.connect()
+        try:
+            await database.enqueue_effect("a", "edit", 1, {}, 0)
+            now = int(time.time())
+            [entry] = await database.claim_due_effects(now, now + 600, 10)
+            assert entry.key == "a" and entry.next_attempt == now + 600
+            assert await database.claim_due_effects(now, now + 600, 10) == []
+            # A claimer that crashed leaves the effect to be claimed again once the lease ran out.
+            assert [entry.key for entry in await database.claim_due_effects(now + 600, now + 1200, 10)] == ["a"]
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+def test_backoff_is_jittered_and_capped():
+    outbox = Outbox(None, {}, base_delay=10.0, max_delay=3600.0)
+    assert all(5.0 <= outbox.backoff(1) <= 10.0 for _ in range(100))
+    assert all(20.0 <= outbox.backoff(3) <= 40.0 for _ in range(100))
+    assert all(1800.0 <= outbox.backoff(30) <= 3600.0 for _ in range(100))
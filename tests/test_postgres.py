@@ -0,0 +1,80 @@
+import asyncio
+import datetime
+import time
+
+from models import postgres
+from models.postgres import PostgresDatabase
+
+SURPRISE_DAY = datetime.datetime(2030, 5, 17, tzinfo=datetime.timezone.utc)
+
+
+def test_concurrent_migrations(postgres_backend):
+    async def main():
+        dsn = postgres_backend.dsn(await postgres_backend.create_schema("database"))
+        databases = [await PostgresDatabase.connect(dsn, min_size=1, max_size=2) for _ in range(4)]
+        try:
+            # The advisory lock makes every process but the first find the schema up to date.
+            await asyncio.gather(*(database.create_schema() for database in databases))
+            assert await postgres_backend.fetch(databases[0], "SELECT version FROM schema_version") == [
+                (len(postgres.MIGRATIONS),)
+            ]
+            await databases[0].create_schema()
+        finally:
+            for database in databases:
+                await database.close()
+
+    asyncio.run(main())
+
+
+def test_concurrent_claims_never_overlap(postgres_backend):
+    async def main():
+        dsn = postgres_backend.dsn(await postgres_backend.create_schema("database"))
+        database = await PostgresDatabase.connect(dsn)
+        other = await PostgresDatabase.connect(dsn)
+        try:
+            await database.create_schema()
+            for key in range(200):
+                await database.enqueue_effect(str(key), "edit", key % 2, {}, 0)
+
+            now = int(time.time())
+
+            async def claim_all(storage):
+                claimed = []
+                while entries := await storage.claim_due_effects(now, now + 600, 7, [0, 1]):
+                    claimed.extend(entry.key for entry in entries)
+                return claimed
+
+            first, second = await asyncio.gather(claim_all(database), claim_all(other))
+            assert not set(first) & set(second)
+            assert sorted(first + second, key=int) == [str(key) for key in range(200)]
+
+            # Only the guilds asked for are claimed.
+            await database.enqueue_effect("guild 2", "edit", 2, {}, 0)
+            assert await database.claim_due_effects(now, now + 600, 10, [0, 1]) == []
+            assert [entry.key for entry in await other.claim_due_effects(now, now + 600, 10, [2])] == ["guild 2"]
+        finally:
+            await database.close()
+            await other.close()
+
+    asyncio.run(main())
+
+
+def test_calendar_fill_ignores_a_scan_raced_by_a_write(postgres_backend):
+    async def main():
+        database = await postgres_backend.connect(calendar=True)
+        try:
+            await database.create_day(1, 10, None, None, SURPRISE_DAY, SURPRISE_DAY)
+            days = await database.fetch_all_days()
+            generation = database.calendar.generation
+            await database.create_day(1, 11, None, None, SURPRISE_DAY, SURPRISE_DAY)
+
+            database.calendar.fill(days, generation)
+            assert not database.calendar.is_complete
+            expected = [(int(SURPRISE_DAY.timestamp()), 10), (int(SURPRISE_DAY.timestamp()), 11)]
+            assert await database.fetch_surprise_days(1, 0, 2**40) == expected
+            assert database.calendar.is_complete
+            assert database.calendar.between(1, 0, 2**40) == expected
+        finally:
+            await database.close()
+
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+import json
+import types
+from unittest import mock
+
+import hikari
+import pytest
+
+from models.recorder import HEADER
+from models.recorder import EventRecorder
+from models.recorder import RecordedEvent
+from models.recorder import open_recording
+from models.recorder import read_recording
+
+
+def option(name, option_type, value=None, options=None):
+    return types.SimpleNamespace(name=name, type=option_type, value=value, options=options)
+
+
+def command_interaction(command_name, options):
+    return mock.Mock(
+        spec=hikari.CommandInteraction,
+        guild_id=hikari.Snowflake(1),
+        channel_id=hikari.Snowflake(20),
+        user=types.SimpleNamespace(id=hikari.Snowflake(10)),
+        command_name=command_name,
+        options=options,
+    )
+
+
+def test_recording_round_trip(tmp_path):
+    path = str(tmp_path / "recording.ndjson")
+    recorder = EventRecorder(path)
+    recorder.record_member_event(mock.Mock(spec=hikari.MemberCreateEvent, guild_id=1, user_id=10))
+    recorder.record_interaction(
+        command_interaction(
+            "surprise-days",
+            [
+                option(
+                    "upcoming",
+                    hikari.OptionType.SUB_COMMAND,
+                    options=[option("count", hikari.OptionType.INTEGER, 5), option("user", hikari.OptionType.USER, 11)],
+                )
+            ],
+        )
+    )
+    recorder.record_interaction(command_interaction("ping", None))
+    # Only slash commands are recorded.
+    recorder.record_interaction(mock.Mock(spec=hikari.ComponentInteraction))
+    recorder.close()
+
+    # Recording again appends to the file, without a second header.
+    recorder.record_member_event(mock.Mock(spec=hikari.MemberDeleteEvent, guild_id=1, user_id=10))
+    recorder.close()
+    assert recorder.recorded == 4
+
+    events = list(open_recording(path))
+    assert [(event.kind, event.guild, event.user) for event in events] == [
+        ("create", 1, 10),
+        ("command", 1, 10),
+        ("command", 1, 10),
+        ("delete", 1, 10),
+    ]
+    assert events[1].channel == 20 and events[1].command == "surprise-days upcoming"
+    assert events[1].options == [("count", hikari.OptionType.INTEGER, 5), ("user", hikari.OptionType.USER, 11)]
+    assert events[2].command == "ping" and events[2].options == []
+    assert all(event.timestamp > 0 for event in events)
+
+
+def test_rejects_other_versions():
+    with pytest.raises(ValueError):
+        list(read_recording([json.dumps([HEADER[0], HEADER[1] + 1]) + "\n", '[1.0,"create",1,10]\n']))
+    with pytest.raises(ValueError):
+        list(read_recording([]))
+
+
+def test_skips_a_truncated_last_line():
+    lines = [json.dumps(HEADER) + "\n", '[1.0,"create",1,10]\n', '[2.0,"delete",1,']
+    assert list(read_recording(lines)) == [RecordedEvent(1.0, "create", 1, 10)]
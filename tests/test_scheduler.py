@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from models.scheduler import ResetScheduler
+from models.surprise_day import SurpriseDay
+
+
+def day(id: int) -> SurpriseDay:
+    return SurpriseDay(id, id, None, None, 0, 0, 1)
+
+
+async def wait_for_calls(calls, count: int) -> None:
+    async def poll():
+        while len(calls) < count:
+            await asyncio.sleep(0.005)
+
+    await asyncio.wait_for(poll(), 5)
+
+
+def test_fires_in_deadline_order():
+    async def main():
+        calls = []
+
+        async def callback(ids):
+            calls.append(list(ids))
+
+        scheduler = ResetScheduler(callback, max_batch=1)
+        now = time.time()
+        scheduler.load([(1, int(now) - 30), (2, int(now) - 10), (3, int(now) - 20), (4, int(now) + 3600)])
+        # Rescheduling replaces the previous deadline, unscheduling removes it.
+        scheduler.schedule_at(2, now - 40)
+        scheduler.schedule_at(5, now - 5)
+        scheduler.schedule_at(6, now - 1)
+        scheduler.schedule_at(6, now + 3600)
+        scheduler.schedule_at(7, now - 1)
+        scheduler.unschedule(day(7))
+
+        scheduler.start()
+        try:
+            await wait_for_calls(calls, 4)
+            await asyncio.sleep(0.05)
+        finally:
+            await scheduler.stop()
+
+        assert calls == [[2], [1], [3], [5]]
+        assert len(scheduler) == 2 and scheduler.overdue() == 0
+
+    asyncio.run(main())
+
+
+def test_batches_due_days():
+    async def main():
+        calls = []
+
+        async def callback(ids):
+            calls.append(list(ids))
+
+        scheduler = ResetScheduler(callback, max_batch=2)
+        now = int(time.time())
+        scheduler.load([(id, now - id) for id in range(1, 6)])
+        scheduler.start()
+        try:
+            await wait_for_calls(calls, 3)
+        finally:
+            await scheduler.stop()
+
+        assert calls == [[5, 4], [3, 2], [1]]
+
+    asyncio.run(main())
+
+
+def test_retries_failed_days_with_backoff():
+    async def main():
+        calls = []
+
+        async def callback(ids):
+            calls.append(list(ids))
+            if len(calls) == 1:
+                # Changed while the callback ran, so they are not retried with the others.
+                scheduler.schedule_at(2, time.time() + 3600)
+                scheduler.unschedule(day(3))
+                raise RuntimeError("Discord is down")
+
+        scheduler = ResetScheduler(callback, retry_delay=0.05)
+        now = int(time.time())
+        scheduler.load([(1, now - 3), (2, now - 2), (3, now - 1)])
+        scheduler.start()
+        try:
+            await wait_for_calls(calls, 2)
+        finally:
+            await scheduler.stop()
+
+        assert calls == [[1, 2, 3], [1]]
+        assert len(scheduler) == 1 and scheduler.overdue() == 0
+
+    asyncio.run(main())
+
+
+def test_backoff_doubles_up_to_the_maximum():
+    async def callback(ids):
+        pass
+
+    scheduler = ResetScheduler(callback, retry_delay=30.0, max_retry_delay=3600.0)
+    assert [scheduler.backoff(failures) for failures in (1, 2, 3)] == [30.0, 60.0, 120.0]
+    assert scheduler.backoff(20) == 3600.0
@@ -0,0 +1,89 @@
+import asyncio
+import datetime
+import io
+import json
+
+import pytest
+
+from models import transfer
+
+SURPRISE_DAY = datetime.datetime(2030, 5, 17, tzinfo=datetime.timezone.utc)
+RESET_DAY = datetime.datetime(2031, 1, 1, tzinfo=datetime.timezone.utc)
+DAYS = [
+    (1, 10, 100, 1000, SURPRISE_DAY, RESET_DAY),
+    (1, 11, None, None, SURPRISE_DAY + datetime.timedelta(days=3), RESET_DAY),
+    (2, 10, 200, 2000, SURPRISE_DAY, RESET_DAY + datetime.timedelta(days=1)),
+]
+
+
+def fields(days):
+    return sorted((day.guild, day.user, day.message, day.channel, day.surprise_day, day.reset_day) for day in days)
+
+
+def records(days):
+    for id, (guild, user, message, channel, surprise_day, reset_day) in enumerate(days, 1):
+        yield {
+            "id": id,
+            "guild": guild,
+            "user": user,
+            "message": message,
+            "channel": channel,
+            "surprise_day": int(surprise_day.timestamp()),
+            "reset_day": int(reset_day.timestamp()),
+        }
+
+
+@pytest.mark.parametrize("format", transfer.FORMATS)
+def test_round_trip(backend, format):
+    async def main():
+        source = await backend.connect("source")
+        target = await backend.connect("target")
+        try:
+            await source.create_days(DAYS)
+            file = io.StringIO(newline="")
+            assert await transfer.export_days(source, file, format, chunk_size=2) == 3
+
+            file.seek(0)
+            assert await transfer.import_days(target, file, format, chunk_size=2) == 3
+            assert fields(await target.fetch_all_days()) == fields(await source.fetch_all_days()) == sorted(DAYS)
+        finally:
+            await source.close()
+            await target.close()
+
+    asyncio.run(main())
+
+
+def test_export_guilds(backend):
+    async def main():
+        database = await backend.connect()
+        try:
+            await database.create_days(DAYS)
+            file = io.StringIO()
+            assert await transfer.export_days(database, file, guilds=[2]) == 1
+            file.seek(0)
+            assert [transfer.decode_day(json.loads(line)) for line in file] == [DAYS[2]]
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+
+def test_import_stops_at_the_failing_chunk(backend):
+    async def main():
+        database = await backend.connect()
+        try:
+            await database.create_day(*DAYS[2])
+            file = io.StringIO("".join(json.dumps(record) + "\n" for record in records(DAYS)))
+            with pytest.raises(backend.integrity_error):
+                await transfer.import_days(database, file, chunk_size=2)
+            # The first chunk stays imported, the one with the duplicate day is rolled back.
+            assert fields(await database.fetch_all_days()) == sorted(DAYS)
+
+            file = io.StringIO('{"guild": 3, "user": 1, "surprise_day": 0, "reset_day": 0}\n{"guild": 3, "user": 2}\n')
+            with pytest.raises(ValueError, match="record 2"):
+                await transfer.import_days(database, file)
+            assert len(await database.fetch_all_days()) == 3
+        finally:
+            await database.close()
+
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+import array
+import datetime
+import random
+
+import utils
+
+NOW = datetime.datetime(2024, 3, 10, 15, 30, tzinfo=datetime.timezone.utc)
+
+
+def test_surprise_day_range():
+    start_day, end_day, reset_day = utils.surprise_day_range(NOW)
+    assert utils.from_epoch_day(start_day) == datetime.datetime(2024, 3, 17, tzinfo=datetime.timezone.utc)
+    assert utils.from_epoch_day(reset_day) == datetime.datetime(2025, 3, 10, tzinfo=datetime.timezone.utc)
+    assert end_day == reset_day - 1
+
+
+def test_generate_random_day_numbers():
+    start_day, end_day, reset_day = utils.surprise_day_range(NOW)
+    surprise_days, reset_days = utils.generate_random_day_numbers(5000, NOW, random.Random(1))
+
+    assert len(surprise_days) == len(reset_days) == 5000
+    assert set(reset_days) == {reset_day}
+    assert all(start_day <= day < end_day for day in surprise_days)
+    # Uniform over the whole range, not clustered at one end.
+    assert min(surprise_days) - start_day < 10 and end_day - max(surprise_days) < 10
+
+    assert utils.generate_random_day_numbers(5000, NOW, random.Random(1)) == (surprise_days, reset_days)
+    assert utils.generate_random_day_numbers(0, NOW) == (array.array("q"), array.array("q"))
+
+
+def test_random_surprise_day_stays_in_the_generated_range():
+    start_day, end_day, _ = utils.surprise_day_range(NOW)
+    for _ in range(1000):
+        assert start_day <= utils.to_epoch_day(utils.random_surprise_day(NOW)) < end_day
+
+
+def test_chunked():
+    assert list(utils.chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(utils.chunked([], 3)) == []
@@ -1,7 +1,12 @@
+from __future__ import annotations
+
+import array
 import datetime
 import random
 import typing as t
 
+SECONDS_PER_DAY = 86400
+
 
 # FIXME: Why not use datetime.date instead?
 def normalize_datetime(t: datetime.datetime) -> datetime.datetime:
@@ -24,7 +29,9 @@ def random_surprise_day(now: datetime.datetime) -> datetime.datetime:
     t = random.random()
 
     surprise_day = normalize_datetime(
-        datetime.datetime.fromtimestamp(start_date.timestamp() * t + end_date.timestamp() * (1 - t))
+        datetime.datetime.fromtimestamp(
+            start_date.timestamp() * t + end_date.timestamp() * (1 - t), datetime.timezone.utc
+        )
     )
     return surprise_day
 
@@ -34,3 +41,79 @@ def generate_random_days() -> t.Tuple[datetime.datetime, datetime.datetime]:
     surprise_day = random_surprise_day(now)
     reset_day = now.replace(year=now.year + 1)
     return (surprise_day, reset_day)
+
+
+def to_epoch_day(date: datetime.datetime) -> int:
+    """Convert a datetime into the amount of whole days since the UNIX epoch."""
+    return int(date.timestamp()) // SECONDS_PER_DAY
+
+
+def from_epoch_day(day: int) -> datetime.datetime:
+    """Convert an amount of days since the UNIX epoch into a UTC datetime at midnight."""
+    return datetime.datetime.fromtimestamp(day * SECONDS_PER_DAY, datetime.timezone.utc)
+
+
+def surprise_day_range(now: t.Optional[datetime.datetime] = None) -> t.Tuple[int, int, int]:
+    """The range new surprise days are picked from, and their reset day, as days since the UNIX epoch.
+
+    Parameters
+    ----------
+    now: t.Optional[datetime.datetime]
+        The date to pick the days from. Defaults to the current time.
+
+    Returns
+    -------
+    t.Tuple[int, int, int]
+        The first possible surprise day, the day after the last possible one and the reset day.
+    """
+    now = normalize_datetime(now or datetime.datetime.now(datetime.timezone.utc))
+
+    start_day = to_epoch_day(now + datetime.timedelta(days=7))
+    reset_day = to_epoch_day(now.replace(year=now.year + 1))
+    # random_surprise_day() picks a point in [start_date, end_date] and truncates it, so end_date itself is never hit.
+    end_day = reset_day - 1
+    return start_day, end_day, reset_day
+
+
+def generate_random_day_numbers(
+    count: int, now: t.Optional[datetime.datetime] = None, rng: t.Optional[random.Random] = None
+) -> t.Tuple[array.array[int], array.array[int]]:
+    """Generate count surprise days and reset days at once, as days since the UNIX epoch.
+
+    Surprise days are uniformly distributed over the same range as random_surprise_day(),
+    so this is the batch version of generate_random_days().
+
+    Parameters
+    ----------
+    count: int
+        The amount of pairs to generate.
+    now: t.Optional[datetime.datetime]
+        The date to generate the days from. Defaults to the current time.
+    rng: t.Optional[random.Random]
+        The random number generator to use, pass a seeded one for reproducible results.
+        Defaults to the global generator of the random module.
+
+    Returns
+    -------
+    t.Tuple[array.array[int], array.array[int]]
+        The surprise days and the reset days, index i of both arrays forms a pair.
+    """
+    start_day, end_day, reset_day = surprise_day_range(now)
+    surprise_days = array.array("q", (rng or random).choices(range(start_day, end_day), k=count))
+    reset_days = array.array("q", [reset_day]) * count
+    return surprise_days, reset_days
+
+
+T = t.TypeVar("T")
+
+
+def chunked(iterable: t.Iterable[T], size: int) -> t.Iterator[t.List[T]]:
+    """Split an iterable into lists of at most size items."""
+    chunk: t.List[T] = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk